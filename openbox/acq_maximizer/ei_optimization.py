@@ -8,6 +8,7 @@
 import abc
 import logging
 import time
+from concurrent.futures import Executor
 from typing import Iterable, List, Union, Tuple, Optional
 
 import random
@@ -15,12 +16,46 @@ import scipy
 import numpy as np
 
 from openbox.acquisition_function.acquisition import AbstractAcquisitionFunction
-from openbox.utils.config_space import get_one_exchange_neighbourhood, \
-    Configuration, ConfigurationSpace
+from openbox.utils.config_space import Configuration, ConfigurationSpace, UniformFloatHyperparameter, \
+    UniformIntegerHyperparameter
+from openbox.utils.config_space.util import LazyConfigurationList, sample_configuration_array, \
+    get_one_exchange_neighbourhood_array
 from openbox.acq_maximizer.random_configuration_chooser import ChooserNoCoolDown, ChooserProb
-from openbox.utils.history_container import HistoryContainer, MultiStartHistoryContainer
+from openbox.utils.history_container import HistoryContainer, MultiStartHistoryContainer, ConfigurationIndex
 from openbox.utils.util_funcs import get_types
-from openbox.utils.constants import MAXINT
+
+
+class MaximizationBudget(object):
+    """Wall-clock and evaluation budget of one acquisition function maximization.
+
+    Parameters
+    ----------
+    time_budget : float, optional
+        Maximum time in seconds. Unlimited if None.
+    eval_budget : int, optional
+        Maximum number of evaluated points. Unlimited if None.
+    """
+
+    def __init__(self, time_budget: Optional[float] = None, eval_budget: Optional[int] = None):
+        self.time_budget = time_budget
+        self.eval_budget = eval_budget
+        self.start_time = time.time()
+        self.n_evaluations = 0
+
+    def consume(self, n_evaluations: int):
+        self.n_evaluations += n_evaluations
+
+    def exhausted(self) -> bool:
+        if self.time_budget is not None and time.time() - self.start_time >= self.time_budget:
+            return True
+        return self.eval_budget is not None and self.n_evaluations >= self.eval_budget
+
+    def remaining(self) -> Tuple[Optional[float], Optional[int]]:
+        """Returns the remaining (time_budget, eval_budget), None if unlimited."""
+        time_budget = None if self.time_budget is None \
+            else max(self.time_budget - (time.time() - self.start_time), 0.0)
+        eval_budget = None if self.eval_budget is None else max(self.eval_budget - self.n_evaluations, 0)
+        return time_budget, eval_budget
 
 
 class AcquisitionFunctionMaximizer(object, metaclass=abc.ABCMeta):
@@ -29,6 +64,10 @@ class AcquisitionFunctionMaximizer(object, metaclass=abc.ABCMeta):
     In order to use this class it has to be subclassed and the method
     ``_maximize`` must be implemented.
 
+    A wall-clock and/or evaluation budget can be set by ``set_budget``. Every
+    maximizer then stops its search when the budget is exhausted and returns
+    the best candidates found so far.
+
     Parameters
     ----------
     acquisition_function : ~openbox.acquisition_function.acquisition.AbstractAcquisitionFunction
@@ -56,6 +95,27 @@ class AcquisitionFunctionMaximizer(object, metaclass=abc.ABCMeta):
         else:
             self.rng = rng
 
+        self.time_budget = None
+        self.eval_budget = None
+        self.budget = MaximizationBudget()
+
+    def set_budget(self, time_budget: Optional[float] = None, eval_budget: Optional[int] = None):
+        """Limits every following call of ``maximize``.
+
+        Parameters
+        ----------
+        time_budget : float, optional
+            Maximum time in seconds. Unlimited if None.
+        eval_budget : int, optional
+            Maximum number of points evaluated by the acquisition function. Unlimited if None.
+        """
+        self.time_budget = time_budget
+        self.eval_budget = eval_budget
+
+    def _start_budget(self) -> MaximizationBudget:
+        self.budget = MaximizationBudget(self.time_budget, self.eval_budget)
+        return self.budget
+
     def maximize(
             self,
             runhistory: HistoryContainer,
@@ -79,6 +139,7 @@ class AcquisitionFunctionMaximizer(object, metaclass=abc.ABCMeta):
         iterable
             An iterable consisting of :class:`openbox.config_space.Configuration`.
         """
+        self._start_budget()
         return [t[1] for t in self._maximize(runhistory, num_points, **kwargs)]
 
     @abc.abstractmethod
@@ -129,6 +190,7 @@ class AcquisitionFunctionMaximizer(object, metaclass=abc.ABCMeta):
         """
 
         acq_values = self.acquisition_function(configs)
+        self.budget.consume(len(configs))
 
         # From here
         # http://stackoverflow.com/questions/20197990/how-to-make-argsort-result-to-be-random-between-equal-values
@@ -140,6 +202,34 @@ class AcquisitionFunctionMaximizer(object, metaclass=abc.ABCMeta):
         # rand_configs list, because the second is a pure python list
         return [(acq_values[ind][0], configs[ind]) for ind in indices[::-1]]
 
+    def _sort_vectors_by_acq_value(
+            self,
+            acq_values: np.ndarray,
+            vectors: np.ndarray,
+            origins: List[str],
+    ) -> Tuple[np.ndarray, LazyConfigurationList]:
+        """Sort candidates in the encoded vector space by acquisition value
+
+        Ties are broken randomly. Configuration objects are only built when
+        the returned list is accessed.
+
+        Parameters
+        ----------
+        acq_values : np.ndarray (N,)
+        vectors : np.ndarray (N, D)
+        origins : list(str)
+
+        Returns
+        -------
+        (sorted acquisition values, lazy list of the sorted configurations)
+        """
+        acq_values = np.asarray(acq_values, dtype=np.float64).reshape(-1)
+        random = self.rng.rand(len(acq_values))
+        # Last column is primary sort key!
+        indices = np.lexsort((random, acq_values))[::-1]
+        configs = LazyConfigurationList(self.config_space, vectors[indices], [origins[ind] for ind in indices])
+        return acq_values[indices], configs
+
 
 class CMAESOptimizer(AcquisitionFunctionMaximizer):
     def __init__(
@@ -183,6 +273,7 @@ class CMAESOptimizer(AcquisitionFunctionMaximizer):
         hp_num = len(bounds) - len(const_idx)
         es = CMAEvolutionStrategy(hp_num * [0], 0.99, inopts={'bounds': [0, 1]})
 
+        self._start_budget()
         eval_num = 0
         next_configs_by_acq_value = list()
         while eval_num < num_points:
@@ -197,11 +288,13 @@ class CMAESOptimizer(AcquisitionFunctionMaximizer):
             es.tell(X, values)
             next_configs_by_acq_value.extend([(values[i], _X[i]) for i in range(es.popsize)])
             eval_num += es.popsize
+            self.budget.consume(es.popsize)
+            if self.budget.exhausted():
+                break
 
         next_configs_by_acq_value.sort(reverse=True, key=lambda x: x[0])
-        next_configs_by_acq_value = [_[1] for _ in next_configs_by_acq_value]
-        next_configs_by_acq_value = [Configuration(self.config_space, vector=array) for array in
-                                     next_configs_by_acq_value]
+        next_configs_by_acq_value = LazyConfigurationList(
+            self.config_space, np.array([_[1] for _ in next_configs_by_acq_value]))
 
         challengers = ChallengerList(next_configs_by_acq_value,
                                      self.config_space,
@@ -227,6 +320,12 @@ class LocalSearch(AcquisitionFunctionMaximizer):
     n_steps_plateau_walk: int
         number of steps during a plateau walk before local search terminates
 
+    best_improvement: bool
+        If True, every walker moves to its best improving neighbor. Otherwise,
+        it moves to the first improving neighbor in the (random) neighborhood order.
+
+    All local searches run in lockstep: in every step, the neighborhoods of all
+    active walkers are scored in a single call of the acquisition function.
     """
 
     def __init__(
@@ -236,15 +335,18 @@ class LocalSearch(AcquisitionFunctionMaximizer):
             rng: Union[bool, np.random.RandomState] = None,
             max_steps: Optional[int] = None,
             n_steps_plateau_walk: int = 10,
+            best_improvement: bool = False,
     ):
         super().__init__(acquisition_function, config_space, rng)
         self.max_steps = max_steps
         self.n_steps_plateau_walk = n_steps_plateau_walk
+        self.best_improvement = best_improvement
 
     def _maximize(
             self,
             runhistory: HistoryContainer,
             num_points: int,
+            start_points: Optional[np.ndarray] = None,
             **kwargs
     ) -> List[Tuple[float, Configuration]]:
         """Starts a local search from the given startpoint and quits
@@ -259,6 +361,10 @@ class LocalSearch(AcquisitionFunctionMaximizer):
             current stats object
         num_points: int
             number of points to be sampled
+        start_points: np.ndarray (N, D), optional
+            vectors to start the local searches from. If not given, the best
+            configurations from previous runs (according to the acquisition
+            function) are used.
         ***kwargs:
             Additional parameters that will be passed to the
             acquisition function
@@ -272,17 +378,18 @@ class LocalSearch(AcquisitionFunctionMaximizer):
 
         """
 
-        init_points = self._get_initial_points(
-            num_points, runhistory)
+        if start_points is not None:
+            init_points = start_points
+        else:
+            init_points = self._get_initial_points(
+                num_points, runhistory)
 
         acq_configs = []
         # Start N local search from different random start points
-        for start_point in init_points:
-            acq_val, configuration = self._one_iter(
-                start_point, **kwargs)
-
-            configuration.origin = "Local Search"
-            acq_configs.append((acq_val, configuration))
+        acq_vals, vectors = self._do_search(init_points, **kwargs)
+        for acq_val, vector in zip(acq_vals, vectors):
+            configuration = Configuration(self.config_space, vector=vector, origin="Local Search")
+            acq_configs.append((float(acq_val), configuration))
 
         # shuffle for random tie-break
         self.rng.shuffle(acq_configs)
@@ -292,11 +399,11 @@ class LocalSearch(AcquisitionFunctionMaximizer):
 
         return acq_configs
 
-    def _get_initial_points(self, num_points, runhistory):
+    def _get_initial_points(self, num_points, runhistory) -> np.ndarray:
 
         if runhistory.empty():
-            init_points = self.config_space.sample_configuration(
-                size=num_points)
+            init_points = sample_configuration_array(
+                self.config_space, num_points, self.rng)
         else:
             # initiate local search with best configurations from previous runs
             configs_previous_runs = runhistory.get_all_configs()
@@ -306,27 +413,39 @@ class LocalSearch(AcquisitionFunctionMaximizer):
                 len(configs_previous_runs_sorted),
                 num_points)
             )
-            init_points = list(
-                map(lambda x: x[1],
-                    configs_previous_runs_sorted[:num_configs_local_search])
-            )
+            init_points = np.array(
+                [x[1].get_array() for x in configs_previous_runs_sorted[:num_configs_local_search]],
+                dtype=np.float64
+            ).reshape(-1, len(self.config_space.get_hyperparameters()))
 
         return init_points
 
-    def _one_iter(
+    def _do_search(
             self,
-            start_point: Configuration,
+            start_points: np.ndarray,
             **kwargs
-    ) -> Tuple[float, Configuration]:
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Runs one local search from every start point in lockstep.
 
-        incumbent = start_point
-        # Compute the acquisition value of the incumbent
-        acq_val_incumbent = self.acquisition_function([incumbent], **kwargs)[0]
+        Start points and neighbors are handled in the encoded vector space.
 
+        Returns the final acquisition values and vectors of all walkers
+        in the order of the start points.
+        """
+        incumbents = np.array(start_points, dtype=np.float64)
+        if incumbents.shape[0] == 0:
+            return np.empty(0), incumbents
+
+        # Compute the acquisition values of the incumbents
+        acq_val_incumbents = self.acquisition_function(
+            LazyConfigurationList(self.config_space, incumbents), **kwargs).flatten()
+        self.budget.consume(incumbents.shape[0])
+
+        active = np.arange(incumbents.shape[0])
         local_search_steps = 0
         neighbors_looked_at = 0
         time_n = []
-        while True:
+        while len(active) > 0:
 
             local_search_steps += 1
             if local_search_steps % 1000 == 0:
@@ -335,40 +454,54 @@ class LocalSearch(AcquisitionFunctionMaximizer):
                     "stuck in a infinite loop?", local_search_steps
                 )
 
-            # Get neighborhood of the current incumbent
+            # Get the neighborhoods of all active incumbents
             # by randomly drawing configurations
-            changed_inc = False
-
-            # Get one exchange neighborhood returns an iterator (in contrast of
-            # the previously returned list).
-            all_neighbors = get_one_exchange_neighbourhood(
-                incumbent, seed=self.rng.randint(MAXINT))
-
-            for neighbor in all_neighbors:
-                s_time = time.time()
-                acq_val = self.acquisition_function([neighbor], **kwargs)
-                neighbors_looked_at += 1
-                time_n.append(time.time() - s_time)
-
-                if acq_val > acq_val_incumbent:
-                    self.logger.debug("Switch to one of the neighbors")
-                    incumbent = neighbor
-                    acq_val_incumbent = acq_val
-                    changed_inc = True
-                    break
-
-            if (not changed_inc) or \
-                    (self.max_steps is not None and
-                     local_search_steps == self.max_steps):
-                self.logger.debug("Local search took %d steps and looked at %d "
-                                  "configurations. Computing the acquisition "
-                                  "value for one configuration took %f seconds"
-                                  " on average.",
-                                  local_search_steps, neighbors_looked_at,
-                                  np.mean(time_n))
+            neighbors, owners = get_one_exchange_neighbourhood_array(
+                self.config_space, incumbents[active], self.rng)
+            if len(neighbors) == 0:
+                break
+
+            # Score all neighborhoods with a single call
+            s_time = time.time()
+            all_acq_vals = self.acquisition_function(
+                LazyConfigurationList(self.config_space, neighbors), **kwargs).flatten()
+            time_n.append((time.time() - s_time) / len(neighbors))
+            neighbors_looked_at += len(neighbors)
+            self.budget.consume(len(neighbors))
+
+            # the neighbors of every walker are contiguous and in random order
+            bounds = np.searchsorted(owners, np.arange(len(active) + 1))
+            still_active = []
+            for k, i in enumerate(active):
+                acq_vals = all_acq_vals[bounds[k]:bounds[k + 1]]
+                improving = np.nonzero(acq_vals > acq_val_incumbents[i])[0]
+                if len(improving) == 0:
+                    continue
+                if self.best_improvement:
+                    # ties are broken by the random neighborhood order
+                    j = improving[np.argmax(acq_vals[improving])]
+                else:
+                    j = improving[0]
+                self.logger.debug("Switch to one of the neighbors")
+                incumbents[i] = neighbors[bounds[k] + j]
+                acq_val_incumbents[i] = acq_vals[j]
+                still_active.append(i)
+            active = np.array(still_active, dtype=np.int64)
+
+            if self.max_steps is not None and local_search_steps == self.max_steps:
+                break
+            if self.budget.exhausted():
+                # the walkers stay at their current best
+                self.logger.debug("Local search stopped after %d steps, budget exhausted.", local_search_steps)
                 break
 
-        return acq_val_incumbent, incumbent
+        self.logger.debug("Local search took %d steps and looked at %d "
+                          "configurations. Computing the acquisition "
+                          "value for one configuration took %f seconds"
+                          " on average.",
+                          local_search_steps, neighbors_looked_at,
+                          np.mean(time_n) if time_n else 0.0)
+        return acq_val_incumbents, incumbents
 
 
 class RandomSearch(AcquisitionFunctionMaximizer):
@@ -383,6 +516,10 @@ class RandomSearch(AcquisitionFunctionMaximizer):
     rng : np.random.RandomState or int, optional
     """
 
+    # Sorted random configurations are scored in chunks of this size,
+    # and the budget is checked between the chunks
+    chunk_size = 1000
+
     def _maximize(
             self,
             runhistory: HistoryContainer,
@@ -410,19 +547,42 @@ class RandomSearch(AcquisitionFunctionMaximizer):
             tuple(acqusition_value, :class:`openbox.config_space.Configuration`).
         """
 
-        if num_points > 1:
-            rand_configs = self.config_space.sample_configuration(
-                size=num_points)
-        else:
-            rand_configs = [self.config_space.sample_configuration(size=1)]
+        acq_values, rand_configs = self._maximize_lazy(runhistory, num_points, _sorted=_sorted)
+        return list(zip(acq_values, rand_configs))
+
+    def _maximize_lazy(
+            self,
+            runhistory: HistoryContainer,
+            num_points: int,
+            _sorted: bool = False,
+            **kwargs
+    ) -> Tuple[np.ndarray, LazyConfigurationList]:
+        """Randomly sampled configurations in the encoded vector space
+
+        Same as ``_maximize``, but returns the acquisition values as an array and
+        the configurations as a lazy list, so that Configuration objects are
+        only built for the candidates that are actually used.
+
+        If the budget is exhausted, the configurations that are not scored yet
+        are appended in random order.
+        """
+        vectors = sample_configuration_array(self.config_space, num_points, self.rng)
         if _sorted:
-            for i in range(len(rand_configs)):
-                rand_configs[i].origin = 'Random Search (sorted)'
-            return self._sort_configs_by_acq_value(rand_configs)
+            acq_values = np.full(num_points, -np.inf)
+            n_scored = 0
+            while n_scored < num_points and not self.budget.exhausted():
+                n = min(self.chunk_size, num_points - n_scored)
+                eval_budget = self.budget.remaining()[1]
+                if eval_budget is not None:
+                    n = min(n, eval_budget)
+                chunk = LazyConfigurationList(self.config_space, vectors[n_scored:n_scored + n])
+                acq_values[n_scored:n_scored + n] = self.acquisition_function(chunk).reshape(-1)
+                self.budget.consume(n)
+                n_scored += n
+            origins = ['Random Search (sorted)'] * n_scored + ['Random Search'] * (num_points - n_scored)
+            return self._sort_vectors_by_acq_value(acq_values, vectors, origins)
         else:
-            for i in range(len(rand_configs)):
-                rand_configs[i].origin = 'Random Search'
-            return [(0, rand_configs[i]) for i in range(len(rand_configs))]
+            return np.zeros(num_points), LazyConfigurationList(self.config_space, vectors, 'Random Search')
 
 
 class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
@@ -450,6 +610,17 @@ class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
     n_sls_iterations: int
         [Local Search] number of local search iterations
 
+    best_improvement: bool
+        [LocalSearch] whether walkers move to their best instead of their first improving neighbor
+
+    elite_pool_size: int
+        number of top candidates kept across iterations. The pool (and the local
+        search endpoints) of the last maximization is rescored in one batch, seeds
+        the local searches and is added to the candidates. 0 disables the pool.
+
+    elite_random_ratio: float
+        fraction of ``num_points`` that is randomly sampled when the pool is not empty
+
     """
 
     def __init__(
@@ -460,7 +631,10 @@ class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
             max_steps: Optional[int] = None,
             n_steps_plateau_walk: int = 10,
             n_sls_iterations: int = 10,
-            rand_prob=0.25
+            rand_prob=0.25,
+            best_improvement: bool = False,
+            elite_pool_size: int = 100,
+            elite_random_ratio: float = 0.5,
     ):
         super().__init__(acquisition_function, config_space, rng)
         self.random_search = RandomSearch(
@@ -473,11 +647,17 @@ class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
             config_space=config_space,
             rng=rng,
             max_steps=max_steps,
-            n_steps_plateau_walk=n_steps_plateau_walk
+            n_steps_plateau_walk=n_steps_plateau_walk,
+            best_improvement=best_improvement,
         )
         self.n_sls_iterations = n_sls_iterations
         self.random_chooser = ChooserProb(prob=rand_prob, rng=rng)
 
+        self.elite_pool_size = elite_pool_size
+        self.elite_random_ratio = elite_random_ratio
+        self.elite_vectors = np.empty((0, len(config_space.get_hyperparameters())))
+        self._n_configs_seen = 0
+
         # =======================================================================
         # self.local_search = DiffOpt(
         #     acquisition_function=acquisition_function,
@@ -515,15 +695,27 @@ class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
         Iterable[Configuration]
             to be concrete: ~openbox.ei_optimization.ChallengerList
         """
+        # local and random search share the budget
+        self._start_budget()
+        self.local_search.budget = self.random_search.budget = self.budget
+
+        acq_values_elite, vectors_elite = self._rescore_elite_pool(runhistory, **kwargs)
+        if len(vectors_elite) > 0:
+            # warm start from the candidates of the last maximization
+            start_points = vectors_elite[:self.n_sls_iterations]
+            num_random_points = int(num_points * self.elite_random_ratio)
+        else:
+            start_points = None
+            num_random_points = num_points
 
         next_configs_by_local_search = self.local_search._maximize(
-            runhistory, self.n_sls_iterations, **kwargs
+            runhistory, self.n_sls_iterations, start_points=start_points, **kwargs
         )
 
         # Get configurations sorted by EI
-        next_configs_by_random_search_sorted = self.random_search._maximize(
+        acq_values_random, configs_random = self.random_search._maximize_lazy(
             runhistory,
-            num_points - len(next_configs_by_local_search),
+            max(num_random_points - len(next_configs_by_local_search), 0),
             _sorted=True,
         )
 
@@ -533,16 +725,32 @@ class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
         # want to use only random configurations. Having them at the begging of
         # the list ensures this (even after adding the configurations by local
         # search, and then sorting them)
-        next_configs_by_acq_value = (
-                next_configs_by_random_search_sorted
-                + next_configs_by_local_search
-        )
-        next_configs_by_acq_value.sort(reverse=True, key=lambda x: x[0])
+        # Only the candidates that are actually used are built as Configuration objects
+        acq_values = np.concatenate([acq_values_random.reshape(-1),
+                                     [acq for acq, _ in next_configs_by_local_search],
+                                     acq_values_elite])
+        vectors_local = np.array([config.get_array() for _, config in next_configs_by_local_search],
+                                 dtype=np.float64).reshape(-1, configs_random.vectors.shape[1])
+        vectors = np.concatenate([configs_random.vectors, vectors_local, vectors_elite])
+        origins = configs_random.origins + [config.origin for _, config in next_configs_by_local_search] \
+            + ['Elite Pool'] * len(vectors_elite)
+        indices = np.argsort(-acq_values, kind='stable')
+        # local searches that did not move return their start point from the pool
+        indices = indices[_unique_row_indices(vectors[indices])]
         self.logger.debug(
             "First 10 acq func (origin) values of selected configurations: %s",
-            str([[_[0], _[1].origin] for _ in next_configs_by_acq_value[:10]])
+            str([[acq_values[ind], origins[ind]] for ind in indices[:10]])
         )
-        next_configs_by_acq_value = [_[1] for _ in next_configs_by_acq_value]
+        next_configs_by_acq_value = LazyConfigurationList(
+            self.config_space, vectors[indices], [origins[ind] for ind in indices])
+
+        if self.elite_pool_size > 0:
+            # keep the top candidates and all local search endpoints
+            n_random = len(configs_random)
+            is_local = (indices >= n_random) & (indices < n_random + len(vectors_local))
+            is_elite = is_local | (np.arange(len(indices)) < self.elite_pool_size)
+            is_elite &= np.isfinite(acq_values[indices])
+            self.elite_vectors = vectors[indices[is_elite]]
 
         challengers = ChallengerList(next_configs_by_acq_value,
                                      self.config_space,
@@ -550,6 +758,38 @@ class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
         self.random_chooser.next_smbo_iteration()
         return challengers
 
+    def _rescore_elite_pool(
+            self,
+            runhistory: HistoryContainer,
+            **kwargs
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rescores the elite pool with the current acquisition function
+
+        The configurations observed since the last maximization are added to the
+        pool, so that the local searches also start from them.
+
+        Returns
+        -------
+        (acquisition values, vectors), sorted by decreasing acquisition value.
+        Both are empty if there is no pool yet.
+        """
+        configs = runhistory.get_all_configs()
+        if len(configs) < self._n_configs_seen:
+            # another history: the pool is stale
+            self.elite_vectors = self.elite_vectors[:0]
+        new_configs = configs[self._n_configs_seen:]
+        self._n_configs_seen = len(configs)
+        if self.elite_pool_size <= 0 or len(self.elite_vectors) == 0:
+            return np.empty(0), self.elite_vectors[:0]
+
+        vectors = np.concatenate([self.elite_vectors] + [config.get_array().reshape(1, -1) for config in new_configs])
+        vectors = vectors[_unique_row_indices(vectors)]
+        acq_values = self.acquisition_function(
+            LazyConfigurationList(self.config_space, vectors), **kwargs).reshape(-1)
+        self.budget.consume(len(vectors))
+        indices = np.argsort(-acq_values, kind='stable')
+        return acq_values[indices], vectors[indices]
+
     def _maximize(
             self,
             runhistory: HistoryContainer,
@@ -559,6 +799,14 @@ class InterleavedLocalAndRandomSearch(AcquisitionFunctionMaximizer):
         raise NotImplementedError()
 
 
+def _unique_row_indices(vectors: np.ndarray) -> np.ndarray:
+    """Returns the sorted indices of the first occurrences of the distinct rows (NaN == NaN)."""
+    if len(vectors) == 0:
+        return np.arange(0)
+    _, indices = np.unique(np.nan_to_num(vectors, nan=-1), axis=0, return_index=True)
+    return np.sort(indices)
+
+
 class ScipyOptimizer(AcquisitionFunctionMaximizer):
     """
     Wraps scipy optimizer. Only on continuous dims.
@@ -596,20 +844,29 @@ class ScipyOptimizer(AcquisitionFunctionMaximizer):
             **kwargs
     ) -> List[Tuple[float, Configuration]]:
 
+        # use analytic gradients if available instead of finite differences
+        use_gradient = self.acquisition_function.has_gradient()
+
         def negative_acquisition(x):
             # shape of x = (d,)
             x = np.clip(x, 0.0, 1.0)    # fix numerical problem in L-BFGS-B
+            if use_gradient:
+                acq, grad = self.acquisition_function.compute_with_gradient(x)
+                return -acq[0, 0], -grad[0]
             return -self.acquisition_function(x, convert=False)[0]  # shape=(1,)
 
+        self._start_budget()
         if initial_config is None:
             initial_config = self.config_space.sample_configuration()
         init_point = initial_config.get_array()
 
         acq_configs = []
-        result = scipy.optimize.minimize(fun=negative_acquisition,
-                                         x0=init_point,
-                                         bounds=self.bounds,
-                                         **self.scipy_config)
+        result = _minimize_with_budget(negative_acquisition,
+                                       x0=init_point,
+                                       budget=self.budget,
+                                       bounds=self.bounds,
+                                       jac=use_gradient,
+                                       **self.scipy_config)
         # if result.success:
         #     acq_configs.append((result.fun, Configuration(self.config_space, vector=result.x)))
         if not result.success:
@@ -651,6 +908,17 @@ class RandomScipyOptimizer(AcquisitionFunctionMaximizer):
     config_space : ~openbox.config_space.ConfigurationSpace
 
     rng : np.random.RandomState or int, optional
+
+    batch_limit : Number of start points optimized jointly by one L-BFGS-B run.
+            Set to 1 to optimize the start points one after another
+
+    prune_after : If given, all starts first run this many L-BFGS-B iterations, and only the
+            starts above the prune_quantile of their acquisition values are continued
+
+    prune_quantile : Quantile of the acquisition values below which starts are pruned
+
+    executor : concurrent.futures.Executor, optional. If given, the batches of start points
+            are optimized on this thread or process pool
     """
 
     def __init__(
@@ -659,10 +927,18 @@ class RandomScipyOptimizer(AcquisitionFunctionMaximizer):
             config_space: ConfigurationSpace,
             rand_prob: float = 0.0,
             rng: Union[bool, np.random.RandomState] = None,
+            batch_limit: int = 10,
+            prune_after: Optional[int] = None,
+            prune_quantile: float = 0.5,
+            executor: Optional[Executor] = None,
     ):
         super().__init__(acquisition_function, config_space, rng)
 
         self.random_chooser = ChooserProb(prob=rand_prob, rng=rng)
+        self.batch_limit = batch_limit
+        self.prune_after = prune_after
+        self.prune_quantile = prune_quantile
+        self.executor = executor
 
         self.random_search = InterleavedLocalAndRandomSearch(
             acquisition_function=acquisition_function,
@@ -683,31 +959,33 @@ class RandomScipyOptimizer(AcquisitionFunctionMaximizer):
             **kwargs
     ) -> List[Tuple[float, Configuration]]:
         assert num_trials >= 3
-        acq_configs = []
+        self._start_budget()
 
+        self.random_search.set_budget(*self.budget.remaining())
         initial_configs = self.random_search.maximize(runhistory, num_points, **kwargs).challengers
+        self.budget.consume(self.random_search.budget.n_evaluations)
         initial_acqs = self.acquisition_function(initial_configs)
-        acq_configs.extend(zip(initial_acqs, initial_configs))
-
-        scipy_initial_configs = [initial_configs[0]] + self.config_space.sample_configuration(num_trials - 1)
-        success_count = 0
-        for config in scipy_initial_configs:
-            scipy_configs = self.scipy_optimizer.maximize(runhistory, initial_config=config).challengers
-            if not scipy_configs:   # empty
-                continue
-            scipy_acqs = self.acquisition_function(scipy_configs)
-            acq_configs.extend(zip(scipy_acqs, scipy_configs))
-            success_count += 1
-        if success_count == 0:
-            self.logger.warning('None of Scipy optimizations are successful in RandomScipyOptimizer.')
-
-        # shuffle for random tie-break
-        self.rng.shuffle(acq_configs)
-
-        # sort according to acq value
-        acq_configs.sort(reverse=True, key=lambda x: x[0])
+        self.budget.consume(len(initial_configs))
+        acq_values = [initial_acqs.reshape(-1)]
+        vectors = [initial_configs.vectors]
+        origins = list(initial_configs.origins)
+
+        # all starts are optimized in batches which share one acquisition (and gradient) evaluation per step
+        start_points = np.concatenate([
+            initial_configs.vectors[:1],
+            sample_configuration_array(self.config_space, num_trials - 1, self.rng),
+        ])
+        scipy_points, scipy_acqs = maximize_multi_start(
+            self.acquisition_function, start_points, self.scipy_optimizer.bounds,
+            maxiter=self.scipy_optimizer.scipy_config['options']['maxiter'],
+            batch_limit=self.batch_limit, prune_after=self.prune_after,
+            prune_quantile=self.prune_quantile, executor=self.executor, budget=self.budget,
+        )
+        acq_values.append(scipy_acqs)
+        vectors.append(scipy_points)
+        origins.extend(['Scipy'] * scipy_points.shape[0])
 
-        configs = [_[1] for _ in acq_configs]
+        _, configs = self._sort_vectors_by_acq_value(np.concatenate(acq_values), np.concatenate(vectors), origins)
 
         challengers = ChallengerList(configs,
                                      self.config_space,
@@ -760,11 +1038,15 @@ class ScipyGlobalOptimizer(AcquisitionFunctionMaximizer):
 
         def negative_acquisition(x):
             # shape of x = (d,)
+            self.budget.consume(1)
             return -self.acquisition_function(x, convert=False)[0]  # shape=(1,)
 
+        self._start_budget()
         acq_configs = []
+        # returning True from the callback stops the evolution
         result = scipy.optimize.differential_evolution(func=negative_acquisition,
-                                                       bounds=self.bounds)
+                                                       bounds=self.bounds,
+                                                       callback=lambda xk, convergence: self.budget.exhausted())
         if not result.success:
             self.logger.debug('Scipy differential evolution optimizer failed. Info:\n%s' % (result,))
         try:
@@ -846,15 +1128,22 @@ class StagedBatchScipyOptimizer(AcquisitionFunctionMaximizer):
         # todo other strategy
         random_points = self.rng.uniform(self.bound[0], self.bound[1], size=(raw_samples, self.dim))
         acq_random = self.acquisition_function(random_points, convert=False).reshape(-1)
+        self.budget.consume(raw_samples)
         idx = np.argsort(acq_random)[::-1][:num_restarts]
         return random_points[idx]
 
     def gen_batch_scipy_points(self, initial_points: np.ndarray):
+        # use analytic gradients if available instead of finite differences
+        use_gradient = self.acquisition_function.has_gradient()
+
         #count = 0  # todo remove
         def f(X_flattened):
             # nonlocal count
             # count += 1
             X = X_flattened.reshape(shapeX)
+            if use_gradient:
+                acq, grad = self.acquisition_function.compute_with_gradient(X)
+                return -acq.sum().item(), -grad.reshape(-1)
             joint_acq = -self.acquisition_function(X, convert=False).sum().item()
             return joint_acq
 
@@ -862,10 +1151,14 @@ class StagedBatchScipyOptimizer(AcquisitionFunctionMaximizer):
         x0 = initial_points.reshape(-1)
         bounds = [self.bound] * x0.shape[0]
 
-        result = self.minimizer(
+        result = _minimize_with_budget(
             f,
             x0=x0,
+            budget=self.budget,
+            n_evaluations=shapeX[0],
+            minimizer=self.minimizer,
             method=self.method,
+            jac=use_gradient,
             bounds=bounds,
             options=dict(maxiter=self.scipy_max_iter),
         )
@@ -889,40 +1182,34 @@ class StagedBatchScipyOptimizer(AcquisitionFunctionMaximizer):
         # print('start optimize')   # todo remove
         # import time
         # t0 = time.time()
-        acq_configs = []
+        self._start_budget()
 
         # random points
         random_points = self.rng.uniform(self.bound[0], self.bound[1], size=(self.num_random, self.dim))
         acq_random = self.acquisition_function(random_points, convert=False)
-        for i in range(random_points.shape[0]):
-            # convert array to Configuration
-            config = Configuration(self.config_space, vector=random_points[i])
-            config.origin = 'Random Search'
-            acq_configs.append((acq_random[i], config))
+        self.budget.consume(self.num_random)
+        acq_values = [acq_random.reshape(-1)]
+        vectors = [random_points]
+        origins = ['Random Search'] * random_points.shape[0]
 
         # scipy points
         initial_points = self.gen_initial_points(num_restarts=self.num_restarts, raw_samples=self.raw_samples)
 
         for start_idx in range(0, self.num_restarts, self.batch_limit):
+            if self.budget.exhausted():
+                break
             end_idx = min(start_idx + self.batch_limit, self.num_restarts)
             # optimize using random restart optimization
             scipy_points = self.gen_batch_scipy_points(initial_points[start_idx:end_idx])
             if scipy_points is None:
                 continue
             acq_scipy = self.acquisition_function(scipy_points, convert=False)
-            for i in range(scipy_points.shape[0]):
-                # convert array to Configuration
-                config = Configuration(self.config_space, vector=scipy_points[i])
-                config.origin = 'Batch Scipy'
-                acq_configs.append((acq_scipy[i], config))
-
-        # shuffle for random tie-break
-        self.rng.shuffle(acq_configs)
-
-        # sort according to acq value
-        acq_configs.sort(reverse=True, key=lambda x: x[0])
+            acq_values.append(acq_scipy.reshape(-1))
+            vectors.append(scipy_points)
+            origins.extend(['Batch Scipy'] * scipy_points.shape[0])
 
-        configs = [_[1] for _ in acq_configs]
+        # sort according to acq value, random tie-break
+        _, configs = self._sort_vectors_by_acq_value(np.concatenate(acq_values), np.concatenate(vectors), origins)
 
         challengers = ChallengerList(configs,
                                      self.config_space,
@@ -958,6 +1245,22 @@ class MESMO_Optimizer(AcquisitionFunctionMaximizer):
 
     rng : np.random.RandomState or int, optional
 
+    num_mc : Number of random points
+
+    num_opt : Number of L-BFGS-B start points
+
+    batch_limit : Number of start points optimized jointly by one L-BFGS-B run
+
+    scipy_maxiter : Maximum number of L-BFGS-B iterations per start point
+
+    prune_after : If given, all starts first run this many L-BFGS-B iterations, and only the
+            starts above the prune_quantile of their acquisition values are continued
+
+    prune_quantile : Quantile of the acquisition values below which starts are pruned
+
+    executor : concurrent.futures.Executor, optional. If given, the batches of start points
+            are optimized on this thread or process pool
+
     """
 
     def __init__(
@@ -967,13 +1270,22 @@ class MESMO_Optimizer(AcquisitionFunctionMaximizer):
             rng: Union[bool, np.random.RandomState] = None,
             num_mc=1000,
             num_opt=1000,
-            rand_prob=0.0
+            rand_prob=0.0,
+            batch_limit: int = 20,
+            scipy_maxiter: int = 200,
+            prune_after: Optional[int] = 10,
+            prune_quantile: float = 0.5,
+            executor: Optional[Executor] = None,
     ):
         super().__init__(acquisition_function, config_space, rng)
         self.random_chooser = ChooserProb(prob=rand_prob, rng=rng)
         self.num_mc = num_mc
         self.num_opt = num_opt
-        self.minimizer = scipy.optimize.minimize
+        self.batch_limit = batch_limit
+        self.scipy_maxiter = scipy_maxiter
+        self.prune_after = prune_after
+        self.prune_quantile = prune_quantile
+        self.executor = executor
 
     def maximize(
             self,
@@ -998,44 +1310,33 @@ class MESMO_Optimizer(AcquisitionFunctionMaximizer):
             to be concrete: ~openbox.ei_optimization.ChallengerList
         """
 
-        def inverse_acquisition(x):
-            # shape of x = (d,)
-            return -self.acquisition_function(x, convert=False)[0]  # shape=(1,)
-
         d = len(self.config_space.get_hyperparameters())
         bound = (0.0, 1.0)  # todo only on continuous dims (int, float) now
         bounds = [bound] * d
-        acq_configs = []
+
+        self._start_budget()
 
         # MC
         x_tries = self.rng.uniform(bound[0], bound[1], size=(self.num_mc, d))
         acq_tries = self.acquisition_function(x_tries, convert=False)
-        for i in range(x_tries.shape[0]):
-            # convert array to Configuration
-            config = Configuration(self.config_space, vector=x_tries[i])
-            config.origin = 'Random Search'
-            acq_configs.append((acq_tries[i], config))
+        self.budget.consume(self.num_mc)
+        acq_values = list(acq_tries.reshape(-1))
+        vectors = list(x_tries)
+        origins = ['Random Search'] * x_tries.shape[0]
 
-        # L-BFGS-B
+        # L-BFGS-B, all starts are optimized in batches
         x_seed = self.rng.uniform(low=bound[0], high=bound[1], size=(self.num_opt, d))
-        for i in range(x_seed.shape[0]):
-            x0 = x_seed[i].reshape(1, -1)
-            result = self.minimizer(inverse_acquisition, x0=x0, method='L-BFGS-B', bounds=bounds)
-            if not result.success:
-                continue
-            # convert array to Configuration
-            config = Configuration(self.config_space, vector=result.x)
-            config.origin = 'Scipy'
-            acq_val = self.acquisition_function(result.x, convert=False)  # [0]
-            acq_configs.append((acq_val, config))
-
-        # shuffle for random tie-break
-        self.rng.shuffle(acq_configs)
-
-        # sort according to acq value
-        acq_configs.sort(reverse=True, key=lambda x: x[0])
+        x_opt, acq_opt = maximize_multi_start(
+            self.acquisition_function, x_seed, bounds, maxiter=self.scipy_maxiter,
+            batch_limit=self.batch_limit, prune_after=self.prune_after,
+            prune_quantile=self.prune_quantile, executor=self.executor, budget=self.budget,
+        )
+        acq_values.extend(acq_opt)
+        vectors.extend(x_opt)
+        origins.extend(['Scipy'] * x_opt.shape[0])
 
-        configs = [_[1] for _ in acq_configs]
+        # sort according to acq value, random tie-break
+        _, configs = self._sort_vectors_by_acq_value(np.array(acq_values), np.array(vectors), origins)
 
         challengers = ChallengerList(configs,
                                      self.config_space,
@@ -1103,19 +1404,8 @@ class USeMO_Optimizer(AcquisitionFunctionMaximizer):
         assert len(acq_vals.shape) == 1 and len(candidates.shape) == 2 \
                and acq_vals.shape[0] == candidates.shape[0]
 
-        acq_configs = []
-        for i in range(acq_vals.shape[0]):
-            # convert array to Configuration todo
-            config = Configuration(self.config_space, vector=candidates[i])
-            acq_configs.append((acq_vals[i], config))
-
-        # shuffle for random tie-break
-        self.rng.shuffle(acq_configs)
-
-        # sort according to acq value
-        acq_configs.sort(reverse=True, key=lambda x: x[0])
-
-        configs = [_[1] for _ in acq_configs]
+        # sort according to acq value, random tie-break
+        _, configs = self._sort_vectors_by_acq_value(acq_vals, candidates, [None] * acq_vals.shape[0])
 
         challengers = ChallengerList(configs,
                                      self.config_space,
@@ -1133,6 +1423,10 @@ class USeMO_Optimizer(AcquisitionFunctionMaximizer):
 
 
 class batchMCOptimizer(AcquisitionFunctionMaximizer):
+    # Maximum number of candidates of a batch maximization if the surrogate cannot draw function samples,
+    # since exact joint samples cost O(N^3) in the number of candidates
+    max_exact_candidates = 500
+
     def __init__(
             self,
             acquisition_function: AbstractAcquisitionFunction,
@@ -1150,6 +1444,7 @@ class batchMCOptimizer(AcquisitionFunctionMaximizer):
             self.batch_size = min(5000, max(2000, 200 * dim))
         else:
             self.batch_size = batch_size
+        self._exact_samples_logged = False
 
     def maximize(
             self,
@@ -1180,8 +1475,9 @@ class batchMCOptimizer(AcquisitionFunctionMaximizer):
         """
         from openbox.utils.samplers import SobolSampler
 
+        self._start_budget()
         cur_idx = 0
-        config_acq = list()
+        acq_values, vectors = list(), list()
         weight_seed = self.rng.randint(0, int(1e8))  # The same weight seed each iteration
 
         while cur_idx < num_points:
@@ -1203,20 +1499,213 @@ class batchMCOptimizer(AcquisitionFunctionMaximizer):
             sobol_sampler = SobolSampler(self.config_space, batch_size,
                                          lower_bounds, upper_bounds,
                                          random_state=self.rng.randint(0, int(1e8)))
-            _configs = sobol_sampler.generate(return_config=True)
-            _acq_values = self.acquisition_function(_configs, seed=weight_seed)
-            config_acq.extend([(_configs[idx], _acq_values[idx]) for idx in range(len(_configs))])
+            _vectors = sobol_sampler.generate(return_config=False)
+            _acq_values = self.acquisition_function(
+                LazyConfigurationList(self.config_space, _vectors), seed=weight_seed)
+            acq_values.append(_acq_values.reshape(-1))
+            vectors.append(_vectors)
 
             cur_idx += self.batch_size
+            self.budget.consume(_vectors.shape[0])
+            if self.budget.exhausted():
+                break
 
-        config_acq.sort(reverse=True, key=lambda x: x[1])
+        acq_values = np.concatenate(acq_values)
+        indices = np.argsort(-acq_values, kind='stable')
+        configs = LazyConfigurationList(self.config_space, np.concatenate(vectors)[indices])
 
-        challengers = ChallengerList([_[0] for _ in config_acq],
+        challengers = ChallengerList(configs,
                                      self.config_space,
                                      self.random_chooser)
         self.random_chooser.next_smbo_iteration()
         return challengers
 
+    def maximize_batch(
+            self,
+            runhistory: HistoryContainer,
+            q: int,
+            num_points: int,
+            num_local_starts: int = 10,
+            max_exchange_rounds: int = 10,
+            **kwargs
+    ) -> List[Configuration]:
+        """Jointly maximizes a batch acquisition function (e.g. qEI) over q points.
+
+        The improvement samples of all candidates (see _get_batch_candidates) are
+        computed in a single pass. The batch is built greedily from the candidates
+        and then refined by exchanging single batch points while the joint value improves.
+
+        Parameters
+        ----------
+        runhistory: ~openbox.utils.history_container.HistoryContainer
+            runhistory object. Observed configurations are not suggested.
+        q: int
+            number of points in the batch
+        num_points: int
+            number of Sobol candidates. If the surrogate cannot draw function samples,
+            at most max_exact_candidates candidates are used.
+        num_local_starts: int
+            number of best observations whose neighbors are candidates (single objective)
+        max_exchange_rounds: int
+            maximum number of passes over the batch to exchange points
+
+        Returns
+        -------
+        list
+            The batch of at most q configurations.
+        """
+        max_candidates = self._get_max_candidates()
+        X_baseline = getattr(self.acquisition_function, 'X_baseline', None)
+        if max_candidates is not None and X_baseline is not None:
+            # the baseline points of qNEI are sampled jointly with the candidates
+            max_candidates = max(max_candidates - X_baseline.shape[0], q)
+        vectors = self._get_batch_candidates(runhistory, q, num_points, num_local_starts,
+                                             max_candidates=max_candidates)
+        samples = self.acquisition_function.improvement_samples(vectors)
+
+        # greedy: add the candidate with the largest joint value to the batch
+        batch = list()
+        best = np.zeros(samples.shape[0])
+        for _ in range(min(q, vectors.shape[0])):
+            values = np.maximum(samples, best[:, None]).mean(axis=0)
+            values[batch] = -np.inf
+            idx = int(np.argmax(values))
+            batch.append(idx)
+            best = np.maximum(best, samples[:, idx])
+
+        # exchange: replace every batch point by the best candidate given the other points
+        for _ in range(max_exchange_rounds):
+            improved = False
+            for i in range(len(batch)):
+                others = batch[:i] + batch[i + 1:]
+                best_others = samples[:, others].max(axis=1) if others else np.zeros(samples.shape[0])
+                values = np.maximum(samples, best_others[:, None]).mean(axis=0)
+                current_value = values[batch[i]]
+                values[others] = -np.inf
+                idx = int(np.argmax(values))
+                if values[idx] > current_value + 1e-12:
+                    batch[i] = idx
+                    improved = True
+            if not improved:
+                break
+
+        return list(LazyConfigurationList(self.config_space, vectors[batch], origins='Batch MC Search'))
+
+    def maximize_thompson(
+            self,
+            runhistory: HistoryContainer,
+            q: int,
+            num_points: int,
+            num_local_starts: int = 10,
+            excluded_configs: Optional[List[Configuration]] = None,
+            **kwargs
+    ) -> List[Configuration]:
+        """Minimizes q posterior function samples of a Thompson sampling acquisition function (TS).
+
+        All functions are evaluated on the same candidates (see _get_batch_candidates)
+        in a single pass, so the cost hardly depends on q. Every function proposes
+        its best candidate that has not been proposed by an earlier function.
+
+        Parameters
+        ----------
+        runhistory: ~openbox.utils.history_container.HistoryContainer
+            runhistory object. Observed configurations are not suggested.
+        q: int
+            number of points in the batch. The acquisition function must have drawn q functions.
+        num_points: int
+            number of Sobol candidates. If the surrogate cannot draw function samples,
+            at most max_exact_candidates candidates are used.
+        num_local_starts: int
+            number of best observations whose neighbors are candidates (single objective)
+        excluded_configs: list, optional
+            configurations which are not suggested either, e.g. running ones
+
+        Returns
+        -------
+        list
+            The batch of at most q configurations.
+        """
+        max_candidates = self._get_max_candidates()
+        vectors = self._get_batch_candidates(runhistory, q, num_points, num_local_starts, excluded_configs,
+                                             max_candidates=max_candidates)
+        function_values = self.acquisition_function.function_values(vectors)
+
+        batch = list()
+        chosen = np.zeros(vectors.shape[0], dtype=bool)
+        for values in function_values[:min(q, vectors.shape[0])]:
+            values = np.where(chosen, np.inf, values)
+            idx = int(np.argmin(values))
+            batch.append(idx)
+            chosen[idx] = True
+
+        return list(LazyConfigurationList(self.config_space, vectors[batch], origins='Thompson Sampling'))
+
+    def _get_batch_candidates(
+            self,
+            runhistory: HistoryContainer,
+            q: int,
+            num_points: int,
+            num_local_starts: int,
+            excluded_configs: Optional[List[Configuration]] = None,
+            max_candidates: Optional[int] = None,
+    ) -> np.ndarray:
+        """Returns the distinct candidate vectors of a batch maximization.
+
+        The candidates are num_points Sobol points (random points if the space has
+        categorical hyperparameters, conditions or forbidden clauses) and the neighbors of the
+        num_local_starts best observations at two scales. Observed and excluded
+        configurations are removed. If there are more than max_candidates candidates,
+        a random subset is kept. The candidates consume the evaluation budget.
+        """
+        from openbox.utils.samplers import SobolSampler
+
+        self._start_budget()
+        if self.budget.eval_budget is not None:
+            num_points = max(min(num_points, self.budget.eval_budget), q)
+        if max_candidates is not None:
+            num_points = min(num_points, max_candidates)
+        hps = self.config_space.get_hyperparameters()
+        if all(isinstance(hp, (UniformFloatHyperparameter, UniformIntegerHyperparameter)) for hp in hps) \
+                and not self.config_space.get_conditions() and not self.config_space.get_forbiddens():
+            sobol_sampler = SobolSampler(self.config_space, num_points,
+                                         random_state=self.rng.randint(0, int(1e8)))
+            vectors = sobol_sampler.generate(return_config=False)
+        else:
+            # Sobol points only cover spaces of numerical hyperparameters
+            vectors = sample_configuration_array(self.config_space, num_points, self.rng)
+        configs = runhistory.configurations
+        if len(configs) > 0:
+            perfs = runhistory.get_transformed_perfs(transform=None)
+            if perfs.ndim == 1:
+                # the encoded configurations keep inactive hyperparameters NaN, unlike get_config_array()
+                best_indices = np.argsort(perfs, kind='stable')[:num_local_starts]
+                starts = np.array([configs[idx].get_array() for idx in best_indices])
+                local_vectors = [get_one_exchange_neighbourhood_array(self.config_space, starts, self.rng,
+                                                                      stdev=stdev)[0]
+                                 for stdev in (0.2, 0.05)]
+                vectors = np.vstack([vectors] + local_vectors)
+        vectors = vectors[_unique_row_indices(vectors)]
+
+        excluded_index = ConfigurationIndex(excluded_configs)
+        is_new = [not runhistory.config_index.contains_vector(vector) and not excluded_index.contains_vector(vector)
+                  for vector in vectors]
+        vectors = vectors[np.asarray(is_new, dtype=bool)]
+        if max_candidates is not None and vectors.shape[0] > max_candidates:
+            vectors = vectors[np.sort(self.rng.choice(vectors.shape[0], max_candidates, replace=False))]
+        self.budget.consume(vectors.shape[0])
+        return vectors
+
+    def _get_max_candidates(self) -> Optional[int]:
+        """Returns the maximum number of candidates, which is only limited if the surrogate
+        cannot draw function samples and exact joint samples are used instead."""
+        if self.acquisition_function.has_function_samples():
+            return None
+        if not self._exact_samples_logged:
+            self._exact_samples_logged = True
+            self.logger.warning('The surrogate cannot draw function samples (e.g. the kernel has conditions). '
+                                'Exact joint samples are used on at most %d candidates.' % self.max_exact_candidates)
+        return self.max_exact_candidates
+
     def _maximize(
             self,
             runhistory: HistoryContainer,
@@ -1265,3 +1754,208 @@ class ChallengerList(object):
                 self._index += 1
             self._iteration += 1
             return config
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+def _minimize_with_budget(fun, x0, budget: MaximizationBudget, n_evaluations=1,
+                          minimizer=scipy.optimize.minimize, **kwargs):
+    """Runs a scipy minimizer until the budget is exhausted.
+
+    ``fun`` may return the value or (value, gradient). Each call consumes
+    ``n_evaluations`` of the budget. If the budget is exhausted, the best point
+    evaluated so far is returned in an unsuccessful OptimizeResult.
+    """
+    best = dict(x=np.array(x0, dtype=np.float64), fun=np.inf)
+
+    def budgeted_fun(x):
+        if budget.exhausted():
+            raise _BudgetExhausted()
+        result = fun(x)
+        budget.consume(n_evaluations)
+        value = result[0] if isinstance(result, tuple) else result
+        if np.all(value < best['fun']):
+            best.update(x=np.array(x), fun=value)
+        return result
+
+    try:
+        return minimizer(budgeted_fun, x0=x0, **kwargs)
+    except _BudgetExhausted:
+        return scipy.optimize.OptimizeResult(x=best['x'], fun=best['fun'], success=False,
+                                             message='Budget of the acquisition maximization exhausted.')
+
+
+def maximize_multi_start(
+        acquisition_function: AbstractAcquisitionFunction,
+        start_points: np.ndarray,
+        bounds: List[Tuple[float, float]],
+        maxiter: int = 200,
+        batch_limit: Optional[int] = None,
+        prune_after: Optional[int] = None,
+        prune_quantile: float = 0.5,
+        executor: Optional[Executor] = None,
+        memory: int = 10,
+        budget: Optional[MaximizationBudget] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Maximizes the acquisition function with L-BFGS from many start points in lockstep.
+
+    Every start keeps its own L-BFGS memory and line search (with projection onto the
+    bounds), but all starts of a batch are evaluated by one vectorized call of the
+    acquisition function (and its gradient) per step. Without analytic gradients, the
+    forward differences of all starts and dimensions are computed in one call as well.
+    If ``prune_after`` is given, the starts whose acquisition values are below the
+    ``prune_quantile`` quantile after this many iterations are stopped early. If the
+    ``budget`` is exhausted, all starts stop at their current points.
+
+    Parameters
+    ----------
+    acquisition_function : AbstractAcquisitionFunction
+    start_points : np.ndarray (N, D)
+    bounds : list of (lower, upper)
+        Bounds of the D dimensions.
+    maxiter : int
+        Maximum number of iterations.
+    batch_limit : int, optional
+        Maximum number of starts optimized in lockstep. By default, all starts form one batch.
+    prune_after : int, optional
+        Number of iterations after which the worse starts of every batch are pruned.
+    prune_quantile : float
+        Quantile of the acquisition values below which starts are pruned.
+    executor : concurrent.futures.Executor, optional
+        If given, the batches are optimized on this thread or process pool.
+    memory : int
+        Number of correction pairs kept by L-BFGS.
+    budget : MaximizationBudget, optional
+        Budget of the maximization. With a process pool, evaluations are only counted per process.
+
+    Returns
+    -------
+    (optimized points (N, D), acquisition values (N,)) in the order of the start points.
+    Pruned starts are returned at the points where they were stopped.
+    """
+    points = np.array(start_points, dtype=np.float64).reshape(-1, len(bounds))
+    if points.shape[0] == 0:
+        return points, np.empty(0)
+    batch_limit = batch_limit or points.shape[0]
+    budget = budget or MaximizationBudget()
+    args = (np.array(bounds, dtype=np.float64), maxiter, prune_after, prune_quantile, memory, budget)
+    batches = [points[i:i + batch_limit] for i in range(0, points.shape[0], batch_limit)]
+    if executor is None:
+        results = [_maximize_lockstep(acquisition_function, batch, *args) for batch in batches]
+    else:
+        futures = [executor.submit(_maximize_lockstep, acquisition_function, batch, *args) for batch in batches]
+        results = [future.result() for future in futures]
+    return np.concatenate([X for X, _ in results]), np.concatenate([acq for _, acq in results])
+
+
+def _maximize_lockstep(acquisition_function, X, bounds, maxiter, prune_after, prune_quantile, memory, budget,
+                       pgtol=1e-5, ftol=2.2e-9):
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    use_gradient = acquisition_function.has_gradient()
+
+    def value(X):
+        budget.consume(X.shape[0])
+        return -acquisition_function(X, convert=False).reshape(-1)
+
+    def value_and_gradient(X):
+        budget.consume(X.shape[0])
+        if use_gradient:
+            acq, grad = acquisition_function.compute_with_gradient(X)
+        else:
+            acq, grad = _acquisition_with_finite_differences(acquisition_function, X, upper)
+        return -acq.reshape(-1), -grad
+
+    n, d = X.shape
+    X = np.clip(X, lower, upper)
+    f, g = value_and_gradient(X)
+    S = np.zeros((n, memory, d))  # correction pairs, oldest first
+    Y = np.zeros((n, memory, d))
+    n_pairs = np.zeros(n, dtype=np.int64)
+    active = np.ones(n, dtype=bool)
+
+    for it in range(maxiter):
+        if budget.exhausted():
+            break
+        if prune_after is not None and it == prune_after:
+            active &= f <= np.quantile(f, 1 - prune_quantile)
+        idx = np.nonzero(active)[0]
+        if len(idx) == 0:
+            break
+        x, fx, gx = X[idx], f[idx], g[idx]
+
+        # variables at a bound with the gradient pointing outwards are fixed in this step
+        free = ~(((x <= lower) & (gx > 0)) | ((x >= upper) & (gx < 0)))
+        pg = np.where(free, gx, 0.0)
+        done = np.abs(pg).max(axis=1) <= pgtol
+
+        direction = -_lbfgs_direction(pg, S[idx], Y[idx]) * free
+        not_descent = np.sum(direction * pg, axis=1) >= 0
+        direction[not_descent] = -pg[not_descent]
+        step = np.where(n_pairs[idx] == 0, 1.0 / np.maximum(np.linalg.norm(pg, axis=1), 1e-12), 1.0)
+
+        # backtracking line search with projection onto the bounds
+        x_new, f_new = x.copy(), fx.copy()
+        accepted = np.zeros(len(idx), dtype=bool)
+        pending = ~done
+        for _ in range(20):
+            j = np.nonzero(pending)[0]
+            if len(j) == 0:
+                break
+            xt = np.clip(x[j] + step[j, None] * direction[j], lower, upper)
+            ft = value(xt)
+            ok = ft <= fx[j] + 1e-4 * np.sum((xt - x[j]) * gx[j], axis=1)
+            x_new[j[ok]], f_new[j[ok]] = xt[ok], ft[ok]
+            accepted[j[ok]] = True
+            pending[j[ok]] = False
+            step[j[~ok]] *= 0.5
+
+        # starts that converged or whose line search failed are stopped
+        active[idx[~accepted]] = False
+        moved = idx[accepted]
+        if len(moved) == 0:
+            continue
+        f_moved, g_moved = value_and_gradient(x_new[accepted])
+        s, y = x_new[accepted] - x[accepted], g_moved - gx[accepted]
+        update = np.sum(s * y, axis=1) > 1e-10
+        S[moved[update]] = np.roll(S[moved[update]], -1, axis=1)
+        Y[moved[update]] = np.roll(Y[moved[update]], -1, axis=1)
+        S[moved[update], -1], Y[moved[update], -1] = s[update], y[update]
+        n_pairs[moved[update]] = np.minimum(n_pairs[moved[update]] + 1, memory)
+
+        small_decrease = (f[moved] - f_moved) <= ftol * np.maximum.reduce(
+            [np.abs(f[moved]), np.abs(f_moved), np.ones(len(moved))])
+        active[moved[small_decrease]] = False
+        X[moved], f[moved], g[moved] = x_new[accepted], f_moved, g_moved
+    return X, -f
+
+
+def _lbfgs_direction(g, S, Y):
+    """L-BFGS two-loop recursion for a batch, returns H g. Empty (zero) pairs are skipped."""
+    sy = np.sum(S * Y, axis=2)
+    rho = np.divide(1.0, sy, out=np.zeros_like(sy), where=sy > 0)
+    q = g.copy()
+    alpha = np.zeros(sy.shape)
+    for i in reversed(range(S.shape[1])):
+        alpha[:, i] = rho[:, i] * np.sum(S[:, i] * q, axis=1)
+        q -= alpha[:, i, None] * Y[:, i]
+    yy = np.sum(Y[:, -1] * Y[:, -1], axis=1)
+    gamma = np.divide(sy[:, -1], yy, out=np.ones_like(yy), where=yy > 0)
+    r = gamma[:, None] * q
+    for i in range(S.shape[1]):
+        beta = rho[:, i] * np.sum(Y[:, i] * r, axis=1)
+        r += S[:, i] * (alpha[:, i] - beta)[:, None]
+    return r
+
+
+def _acquisition_with_finite_differences(acquisition_function, X, upper, eps=np.sqrt(np.finfo(np.float64).eps)):
+    """Forward differences of the acquisition function, one vectorized evaluation for all points
+    and dimensions (the acquisition value of a point does not depend on the other points)."""
+    n, d = X.shape
+    steps = np.where(X + eps <= upper, eps, -eps)  # step backward at the upper bound
+    X_all = np.repeat(X[None], d + 1, axis=0)
+    X_all[1:][np.arange(d), :, np.arange(d)] += steps.T
+    acq_all = acquisition_function(X_all.reshape(-1, d), convert=False).reshape(d + 1, n)
+    grad = (acq_all[1:] - acq_all[0]).T / steps
+    return acq_all[0], grad
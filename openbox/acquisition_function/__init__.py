@@ -24,6 +24,9 @@ from openbox.acquisition_function.multi_objective_acquisition import (
 from openbox.acquisition_function.mc_acquisition import (
     MCEI,
     MCEIC,
+    qEI,
+    qNEI,
+    TS,
 )
 
 from openbox.acquisition_function.mc_multi_objective_acquisition import (
@@ -53,6 +56,9 @@ __all__ = [
 
     'MCEI',
     'MCEIC',
+    'qEI',
+    'qNEI',
+    'TS',
 
     'MCParEGO',
     'MCParEGOC',
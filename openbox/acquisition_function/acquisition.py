@@ -109,6 +109,52 @@ class AbstractAcquisitionFunction(object, metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    def has_gradient(self) -> bool:
+        """Whether compute_with_gradient() is available.
+
+        Requires that the class computing the acquisition value also implements
+        _compute_with_gradient() (so subclasses which only override _compute
+        fall back to finite differences) and that all models support gradients.
+        """
+        def owner(name):
+            return next(cls for cls in type(self).__mro__ if name in cls.__dict__)
+
+        if owner('_compute_with_gradient') is not owner('_compute'):
+            return False
+        models = list(self.model) if isinstance(self.model, list) else [self.model]
+        models += list(getattr(self, 'constraint_models', None) or [])
+        return all(hasattr(model, 'supports_gradient') and model.supports_gradient() for model in models)
+
+    def compute_with_gradient(self, X: np.ndarray, **kwargs):
+        """Computes the acquisition values and their gradients for the
+        array representation X of configurations. Requires has_gradient().
+
+        Parameters
+        ----------
+        X : np.ndarray(N, D) or np.ndarray(D,)
+
+        Returns
+        -------
+        np.ndarray(N, 1)
+            acquisition values for X
+        np.ndarray(N, D)
+            gradients of the acquisition values wrt X
+        """
+        if len(X.shape) == 1:
+            X = X[np.newaxis, :]
+
+        acq, grad = self._compute_with_gradient(X, **kwargs)
+        if np.any(np.isnan(acq)):
+            idx = np.where(np.isnan(acq))[0]
+            acq[idx, :] = -np.finfo(np.float).max
+            grad[idx, :] = 0
+        return acq, grad
+
+    def _compute_with_gradient(self, X: np.ndarray, **kwargs):
+        """Computes the acquisition values (N, 1) and their gradients (N, D)
+        for the points X (N, D). Optional for derived classes."""
+        raise NotImplementedError()
+
 
 class EI(AbstractAcquisitionFunction):
     r"""Computes for a given x the expected improvement as
@@ -188,6 +234,35 @@ class EI(AbstractAcquisitionFunction):
 
         return f
 
+    def _compute_with_gradient(self, X: np.ndarray, **kwargs):
+        """Computes the EI value and its gradient wrt X.
+
+        Parameters
+        ----------
+        X: np.ndarray(N, D), The input points where the acquisition function
+            should be evaluated.
+
+        Returns
+        -------
+        np.ndarray(N, 1)
+            Expected Improvement of X
+        np.ndarray(N, D)
+            Gradient of the Expected Improvement wrt X
+        """
+        if self.eta is None:
+            raise ValueError('No current best specified. Call update('
+                             'eta=<int>) to inform the acquisition function '
+                             'about the current best value.')
+
+        m, v, dm, dv = self.model.predict_with_gradient(X)
+        s = np.sqrt(v)
+        z = (self.eta - m - self.par) / s
+        cdf, pdf = norm.cdf(z), norm.pdf(z)
+        f = (self.eta - m - self.par) * cdf + s * pdf
+        # dEI/dm = -cdf(z), dEI/ds = pdf(z), ds = dv / 2s
+        grad = -cdf * dm + pdf * dv / (2 * s)
+        return f, grad
+
 
 class EIC(EI):
     r"""Computes for a given x the expected constrained improvement as
@@ -239,6 +314,33 @@ class EIC(EI):
             f *= norm.cdf(-m / s)
         return f
 
+    def _compute_with_gradient(self, X: np.ndarray, **kwargs):
+        """Computes the EIC value and its gradient wrt X.
+
+        Parameters
+        ----------
+        X: np.ndarray(N, D), The input points where the acquisition function
+            should be evaluated.
+
+        Returns
+        -------
+        np.ndarray(N, 1)
+            Expected Constrained Improvement of X
+        np.ndarray(N, D)
+            Gradient of the Expected Constrained Improvement wrt X
+        """
+        f, grad = super()._compute_with_gradient(X)
+        for model in self.constraint_models:
+            m, v, dm, dv = model.predict_with_gradient(X)
+            s = np.sqrt(v)
+            z = -m / s
+            pof = norm.cdf(z)
+            # dz = -dm / s + m ds / s^2, ds = dv / 2s
+            pof_grad = norm.pdf(z) * (-dm / s + m * dv / (2 * s ** 3))
+            grad = grad * pof + f * pof_grad
+            f = f * pof
+        return f, grad
+
 
 class EIPS(EI):
     def __init__(self,
@@ -400,6 +502,36 @@ class LogEI(AbstractAcquisitionFunction):
 
         return log_ei.reshape((-1, 1))
 
+    def _compute_with_gradient(self, X: np.ndarray, **kwargs):
+        """Computes the LogEI value and its gradient wrt X.
+
+        Parameters
+        ----------
+        X: np.ndarray(N, D), The input points where the acquisition function
+            should be evaluated.
+
+        Returns
+        -------
+        np.ndarray(N, 1)
+            Expected Improvement of X
+        np.ndarray(N, D)
+            Gradient of the Expected Improvement wrt X
+        """
+        if self.eta is None:
+            raise ValueError('No current best specified. Call update('
+                             'eta=<int>) to inform the acquisition function '
+                             'about the current best value.')
+
+        m, var_, dm, dvar = self.model.predict_with_gradient(X)
+        std = np.sqrt(var_)
+        f_min = self.eta - self.par
+        v = (f_min - m) / std
+        exp_term = np.exp(0.5 * var_ + m)
+        log_ei = (np.exp(f_min) * norm.cdf(v)) - (exp_term * norm.cdf(v - std))
+        # The terms with dv cancel out since exp(f_min) * pdf(v) == exp_term * pdf(v - std)
+        grad = exp_term * (-norm.cdf(v - std) * (dm + 0.5 * dvar) + norm.pdf(v - std) * dvar / (2 * std))
+        return log_ei, grad
+
 
 class LPEI(EI):
     def __init__(self,
@@ -516,6 +648,33 @@ class PI(AbstractAcquisitionFunction):
         std = np.sqrt(var_)
         return norm.cdf((self.eta - m - self.par) / std)
 
+    def _compute_with_gradient(self, X: np.ndarray, **kwargs):
+        """Computes the PI value and its gradient wrt X.
+
+        Parameters
+        ----------
+        X: np.ndarray(N, D)
+           Points to evaluate PI. N is the number of points and D the dimension for the points
+
+        Returns
+        -------
+        np.ndarray(N, 1)
+            Probability of Improvement of X
+        np.ndarray(N, D)
+            Gradient of the Probability of Improvement wrt X
+        """
+        if self.eta is None:
+            raise ValueError('No current best specified. Call update('
+                             'eta=<float>) to inform the acquisition function '
+                             'about the current best value.')
+
+        m, var_, dm, dvar = self.model.predict_with_gradient(X)
+        std = np.sqrt(var_)
+        z = (self.eta - m - self.par) / std
+        # dz = -dm / std - z dstd / std, dstd = dvar / 2std
+        grad = norm.pdf(z) * (-dm / std - z * dvar / (2 * var_))
+        return norm.cdf(z), grad
+
 
 class LCB(AbstractAcquisitionFunction):
     def __init__(self,
@@ -569,6 +728,30 @@ class LCB(AbstractAcquisitionFunction):
         beta = 2 * np.log((X.shape[1] * self.num_data ** 2) / self.par)
         return -(m - np.sqrt(beta) * std)
 
+    def _compute_with_gradient(self, X: np.ndarray, **kwargs):
+        """Computes the LCB value and its gradient wrt X.
+
+        Parameters
+        ----------
+        X: np.ndarray(N, D)
+           Points to evaluate LCB. N is the number of points and D the dimension for the points
+
+        Returns
+        -------
+        np.ndarray(N, 1)
+            (Negative) Lower Confidence Bound of X
+        np.ndarray(N, D)
+            Gradient of the (Negative) Lower Confidence Bound wrt X
+        """
+        if self.num_data is None:
+            raise ValueError('No current number of Datapoints specified. Call update('
+                             'num_data=<int>) to inform the acquisition function '
+                             'about the number of datapoints.')
+        m, var_, dm, dvar = self.model.predict_with_gradient(X)
+        std = np.sqrt(var_)
+        beta = 2 * np.log((X.shape[1] * self.num_data ** 2) / self.par)
+        return -(m - np.sqrt(beta) * std), -dm + np.sqrt(beta) * dvar / (2 * std)
+
 
 class Uncertainty(AbstractAcquisitionFunction):
     def __init__(self,
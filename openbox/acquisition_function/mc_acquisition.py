@@ -1,6 +1,6 @@
 # License: MIT
 
-from typing import List
+from typing import List, Union
 
 import numpy as np
 
@@ -9,7 +9,47 @@ from openbox.surrogate.base.base_model import AbstractModel
 from openbox.surrogate.base.gp import GaussianProcess
 
 
-class MCEI(AbstractAcquisitionFunction):
+class AbstractMCAcquisitionFunction(AbstractAcquisitionFunction):
+    """Base class of Monte Carlo acquisition functions.
+
+    If a surrogate supports ``draw_function_samples()``, ``mc_times`` posterior
+    functions are drawn once after every update of the acquisition function and
+    evaluated on all candidates of the iteration, instead of drawing joint samples
+    on every call. Other surrogates fall back to ``sample_functions()``.
+    """
+
+    def __init__(self, model: Union[AbstractModel, List[AbstractModel]], **kwargs):
+        super().__init__(model=model, **kwargs)
+        self.mc_times = kwargs.get('mc_times', 10)
+        self._function_samples = dict()
+
+    def update(self, **kwargs):
+        super().update(**kwargs)
+        self._function_samples = dict()
+
+    def _get_function_samples(self, model: AbstractModel):
+        """Returns the functions drawn from model since the last update, or None if it cannot draw functions."""
+        key = id(model)
+        if key not in self._function_samples:
+            draw_function_samples = getattr(model, 'draw_function_samples', None)
+            self._function_samples[key] = None if draw_function_samples is None \
+                else draw_function_samples(n_funcs=self.mc_times)
+        return self._function_samples[key]
+
+    def has_function_samples(self) -> bool:
+        """Whether the samples of the model are cheap function samples instead of exact joint samples,
+        which cost O(N^3) in the number of points."""
+        return self._get_function_samples(self.model) is not None
+
+    def _sample_functions(self, model: AbstractModel, X: np.ndarray) -> np.ndarray:
+        """Returns mc_times posterior samples of model at X, shape (mc_times, N)."""
+        function_samples = self._get_function_samples(model)
+        if function_samples is None:
+            return model.sample_functions(X, n_funcs=self.mc_times).transpose()
+        return function_samples(X).transpose()
+
+
+class MCEI(AbstractMCAcquisitionFunction):
     def __init__(self,
                  model: AbstractModel,
                  par: float = 0.0,
@@ -18,7 +58,6 @@ class MCEI(AbstractAcquisitionFunction):
         self.long_name = 'MC-Expected Improvement'
         self.par = par
         self.eta = None
-        self.mc_times = kwargs.get('mc_times', 10)
 
     def _compute(self, X: np.ndarray, **kwargs):
         if self.eta is None:
@@ -27,7 +66,7 @@ class MCEI(AbstractAcquisitionFunction):
                              'about the current best value.')
 
         Y_samples = np.zeros(shape=(self.mc_times, len(X)))
-        Y_samples[:, :] = self.model.sample_functions(X, n_funcs=self.mc_times).transpose()
+        Y_samples[:, :] = self._sample_functions(self.model, X)
 
         mc_ei = np.maximum(self.eta - Y_samples - self.par, 0)
         ei = mc_ei.mean(axis=0)
@@ -35,7 +74,7 @@ class MCEI(AbstractAcquisitionFunction):
         return ei
 
 
-class MCEIC(AbstractAcquisitionFunction):
+class MCEIC(AbstractMCAcquisitionFunction):
     def __init__(self,
                  model: AbstractModel,
                  constraint_models: List[GaussianProcess],
@@ -46,7 +85,6 @@ class MCEIC(AbstractAcquisitionFunction):
         self.constraint_models = constraint_models
         self.par = par
         self.eta = None
-        self.mc_times = kwargs.get('mc_times', 10)
         self.eps = kwargs.get('eps', 1)
 
     def _compute(self, X: np.ndarray, **kwargs):
@@ -56,13 +94,116 @@ class MCEIC(AbstractAcquisitionFunction):
                              'about the current best value.')
 
         Y_samples = np.zeros(shape=(self.mc_times, X.shape[0]))
-        Y_samples[:, :] = self.model.sample_functions(X, n_funcs=self.mc_times).transpose()
+        Y_samples[:, :] = self._sample_functions(self.model, X)
 
         eic = np.maximum(self.eta - Y_samples - self.par, 0)
         for c_model in self.constraint_models:
             constraint_samples = np.zeros(shape=(self.mc_times, X.shape[0]))
-            constraint_samples[:, :] = c_model.sample_functions(X, n_funcs=self.mc_times).transpose()
+            constraint_samples[:, :] = self._sample_functions(c_model, X)
             eic *= 1/(1 + np.exp(constraint_samples/self.eps))
 
         eic = eic.mean(axis=0).reshape(-1, 1)
         return eic
+
+
+class qEI(AbstractMCAcquisitionFunction):
+    """Batch (q-) expected improvement.
+
+    qEI(x_1, ..., x_q) = E[max_j max(eta - f(x_j), 0)]
+
+    The expectation is estimated with ``mc_times`` posterior functions, which are
+    fixed between two updates (fixed base samples). The improvement samples of
+    all candidates are therefore jointly distributed, and the value of any batch
+    of candidates is the mean over the functions of the best improvement in the
+    batch (see joint_value()). Called on single points, it is the MC-EI.
+
+    Wilson, J. and Hutter, F. and Deisenroth, M.
+    Maximizing acquisition functions for Bayesian optimization
+    In: NeurIPS 2018
+    """
+
+    def __init__(self,
+                 model: AbstractModel,
+                 par: float = 0.0,
+                 **kwargs):
+        kwargs.setdefault('mc_times', 128)
+        super().__init__(model=model, **kwargs)
+        self.long_name = 'q-Expected Improvement'
+        self.par = par
+        self.eta = None
+
+    def improvement_samples(self, X: np.ndarray) -> np.ndarray:
+        """Returns the improvement of every posterior function at X, shape (mc_times, N)."""
+        if self.eta is None:
+            raise ValueError('No current best specified. Call update('
+                             'eta=<int>) to inform the acquisition function '
+                             'about the current best value.')
+        Y_samples = self._sample_functions(self.model, X)
+        return np.maximum(self.eta - Y_samples - self.par, 0)
+
+    @staticmethod
+    def joint_value(improvement_samples: np.ndarray) -> float:
+        """Returns the acquisition value of the batch with the given improvement samples, shape (mc_times, q)."""
+        return improvement_samples.max(axis=1).mean()
+
+    def _compute(self, X: np.ndarray, **kwargs):
+        return self.improvement_samples(X).mean(axis=0).reshape(-1, 1)
+
+
+class qNEI(qEI):
+    """Batch (q-) noisy expected improvement.
+
+    Like qEI, but the incumbent of every posterior function is its minimum over
+    the observed points ``X_baseline`` instead of the noisy best observation eta.
+
+    Letham, B. and Karrer, B. and Ottoni, G. and Bakshy, E.
+    Constrained Bayesian Optimization with Noisy Experiments
+    In: Bayesian Analysis 2019
+    """
+
+    def __init__(self,
+                 model: AbstractModel,
+                 par: float = 0.0,
+                 **kwargs):
+        super().__init__(model=model, par=par, **kwargs)
+        self.long_name = 'q-Noisy Expected Improvement'
+        self.X_baseline = None
+
+    def improvement_samples(self, X: np.ndarray) -> np.ndarray:
+        if self.X_baseline is None:
+            raise ValueError('No observed points specified. Call update('
+                             'X_baseline=<np.ndarray>) to inform the acquisition function '
+                             'about the observed points.')
+        # baseline and candidates are sampled jointly
+        n_baseline = self.X_baseline.shape[0]
+        Y_samples = self._sample_functions(self.model, np.vstack((self.X_baseline, X)))
+        incumbents = Y_samples[:, :n_baseline].min(axis=1, keepdims=True)
+        return np.maximum(incumbents - Y_samples[:, n_baseline:] - self.par, 0)
+
+
+class TS(AbstractMCAcquisitionFunction):
+    """Thompson sampling.
+
+    ``mc_times`` posterior functions are drawn after every update, and each of
+    them proposes its minimizer (see function_values()). Called on points, it is
+    the negative value of the first function, so that maximizing it minimizes
+    a single posterior function sample.
+
+    Kandasamy, K. and Krishnamurthy, A. and Schneider, J. and Poczos, B.
+    Parallelised Bayesian Optimisation via Thompson Sampling
+    In: AISTATS 2018
+    """
+
+    def __init__(self,
+                 model: AbstractModel,
+                 **kwargs):
+        kwargs.setdefault('mc_times', 1)
+        super().__init__(model=model, **kwargs)
+        self.long_name = 'Thompson Sampling'
+
+    def function_values(self, X: np.ndarray) -> np.ndarray:
+        """Returns the values of the posterior functions at X, shape (mc_times, N)."""
+        return self._sample_functions(self.model, X)
+
+    def _compute(self, X: np.ndarray, **kwargs):
+        return -self.function_values(X)[0].reshape(-1, 1)
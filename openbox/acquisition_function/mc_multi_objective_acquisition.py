@@ -5,25 +5,24 @@ from typing import List
 import numpy as np
 from scipy.stats import norm
 
-from openbox.acquisition_function.acquisition import AbstractAcquisitionFunction
+from openbox.acquisition_function.mc_acquisition import AbstractMCAcquisitionFunction
 from openbox.surrogate.base.base_model import AbstractModel
 from openbox.surrogate.base.gp import GaussianProcess
 
 
-class MCParEGO(AbstractAcquisitionFunction):
+class MCParEGO(AbstractMCAcquisitionFunction):
     def __init__(self,
                  model: List[AbstractModel],
                  **kwargs):
         super().__init__(model=model, **kwargs)
         self.long_name = 'Pareto Efficient Global Optimization'
-        self.mc_times = kwargs.get('mc_times', 10)
 
     def _compute(self, X: np.ndarray, **kwargs):
         from openbox.utils.multi_objective import get_chebyshev_scalarization
 
         Y_samples = np.zeros(shape=(self.mc_times, X.shape[0], len(self.model)))
         for idx in range(len(self.model)):
-            Y_samples[:, :, idx] = self.model[idx].sample_functions(X, n_funcs=self.mc_times).transpose()
+            Y_samples[:, :, idx] = self._sample_functions(self.model[idx], X)
 
         Y_mean = Y_samples.mean(axis=0)
         weights = np.random.random_sample(len(self.model))
@@ -36,7 +35,7 @@ class MCParEGO(AbstractAcquisitionFunction):
         return acq
 
 
-class MCEHVI(AbstractAcquisitionFunction):
+class MCEHVI(AbstractMCAcquisitionFunction):
     r"""Monte Carlo Expected Hypervolume Improvement supporting m>=2 outcomes.
 
     This assumes minimization.
@@ -62,7 +61,6 @@ class MCEHVI(AbstractAcquisitionFunction):
         """
         super().__init__(model=model, **kwargs)
         self.long_name = 'Monte Carlo Expected Hypervolume Improvement'
-        self.mc_times = kwargs.get('mc_times', 10)
         ref_point = np.asarray(ref_point)
         self.ref_point = ref_point
 
@@ -70,7 +68,7 @@ class MCEHVI(AbstractAcquisitionFunction):
         # Generate samples from posterior
         Y_samples = np.zeros(shape=(self.mc_times, X.shape[0], len(self.model)))
         for idx in range(len(self.model)):
-            Y_samples[:, :, idx] = self.model[idx].sample_functions(X, n_funcs=self.mc_times).transpose()
+            Y_samples[:, :, idx] = self._sample_functions(self.model[idx], X)
 
         # Compute Y's hypervolume improvement by summing up contributions in each cell
         Z_samples = np.maximum(Y_samples, np.expand_dims(self.cell_lower_bounds, axis=(1, 2)))
@@ -170,7 +170,7 @@ def update_observation(request):
             )
             config_advisor.update_observation(observation)
 
-            config_advisor.save_history()
+            config_advisor.save_history(journal=True)
 
             print('-' * 21)
             print('Update observation')
@@ -7,7 +7,6 @@ from ConfigSpace import ConfigurationSpace, Configuration
 
 from openbox.core.base import build_surrogate, Observation
 from openbox.surrogate.base.base_model import AbstractModel
-from openbox.utils.config_space import convert_configurations_to_array
 from openbox.utils.history_container import HistoryContainer, MOHistoryContainer
 from openbox.utils.util_funcs import check_random_state
 
@@ -307,7 +306,7 @@ class SafeOptAdvisor:
         if len(self.to_eval) == 0:  # If self.to_eval has some configs, it's the seed set. Evaluate them first.
 
             # Train GP model
-            X = convert_configurations_to_array(self.history_container.configurations)
+            X = self.history_container.get_config_array()
             Y = self.history_container.get_transformed_perfs()
             self.objective_surrogate.train(X, Y[:, 0] if Y.ndim == 2 else Y)
 
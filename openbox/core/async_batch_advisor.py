@@ -1,9 +1,7 @@
 # License: MIT
 
-import copy
 import numpy as np
 
-from openbox.utils.config_space.util import convert_configurations_to_array
 from openbox.utils.constants import MAXINT, SUCCESS
 from openbox.core.base import Observation
 from openbox.core.generic_advisor import Advisor
@@ -31,7 +29,6 @@ class AsyncBatchAdvisor(Advisor):
 
         self.batch_size = batch_size
         self.batch_strategy = batch_strategy
-        self.running_configs = list()
         self.bo_start_n = 3
         super().__init__(config_space,
                          num_objs=num_objs,
@@ -56,26 +53,42 @@ class AsyncBatchAdvisor(Advisor):
         if self.batch_strategy is None:
             self.batch_strategy = 'default'
 
-        assert self.batch_strategy in ['default', 'median_imputation', 'local_penalization']
+        assert self.batch_strategy in ['default', 'median_imputation', 'kriging_believer', 'local_penalization',
+                                       'thompson_sampling']
 
         if self.num_objs > 1 or self.num_constraints > 0:
-            # local_penalization only supports single objective with no constraint
-            assert self.batch_strategy in ['default', 'median_imputation', ]
+            # local_penalization and thompson_sampling only support single objective with no constraint
+            assert self.batch_strategy in ['default', 'median_imputation', 'kriging_believer']
 
         if self.batch_strategy == 'local_penalization':
             self.acq_type = 'lpei'
+        elif self.batch_strategy == 'thompson_sampling':
+            self.acq_type = 'ts'
+            self.acq_optimizer_type = 'batchmc'
+            # only these surrogates provide posterior function samples
+            if self.surrogate_type not in ['gp', 'gp_incremental', 'gp_rbf', 'gp_sparse', 'gp_multi', 'gp_multi_tied',
+                                           'prf']:
+                self.surrogate_type = 'gp'
+                self.logger.warning('Surrogate model has changed to Gaussian Process '
+                                    'since thompson_sampling batch strategy is used.')
+
+    @property
+    def running_configs(self):
+        return list(self.history_container.running_config_index)
 
     def get_suggestion(self, history_container=None):
-        self.logger.info('#Call get_suggestion. len of running configs = %d.' % len(self.running_configs))
+        running_config_index = self.history_container.running_config_index
+        self.logger.info('#Call get_suggestion. len of running configs = %d.' % len(running_config_index))
         config = self._get_suggestion(history_container)
-        self.running_configs.append(config)
+        running_config_index.add(config)
         return config
 
     def _get_suggestion(self, history_container=None):
         if history_container is None:
             history_container = self.history_container
 
-        num_config_all = len(history_container.configurations) + len(self.running_configs)
+        running_config_index = self.history_container.running_config_index
+        num_config_all = len(history_container.configurations) + len(running_config_index)
         num_config_successful = len(history_container.successful_perfs)
 
         if (num_config_all < self.init_num) or \
@@ -91,27 +104,17 @@ class AsyncBatchAdvisor(Advisor):
         if self.rng.random() < self.rand_prob:
             self.logger.info('Sample random config. rand_prob=%f.' % self.rand_prob)
             return self.sample_random_configs(1, history_container,
-                                              excluded_configs=self.running_configs)[0]
+                                              excluded_configs=running_config_index)[0]
 
-        X = convert_configurations_to_array(history_container.configurations)
+        X = history_container.get_config_array()
         Y = history_container.get_transformed_perfs(transform=None)
         # cY = history_container.get_transformed_constraint_perfs(transform='bilog')
 
-        if self.batch_strategy == 'median_imputation':
-            # set bilog_transform=False to get real cY for estimating median
-            cY = history_container.get_transformed_constraint_perfs(transform=None)
-
-            estimated_y = np.median(Y, axis=0).reshape(-1).tolist()
-            estimated_c = np.median(cY, axis=0).tolist() if self.num_constraints > 0 else None
-            batch_history_container = copy.deepcopy(history_container)
-            # imputation
-            for config in self.running_configs:
-                observation = Observation(config=config, objs=estimated_y, constraints=estimated_c,
-                                          trial_state=SUCCESS, elapsed_time=None)
-                batch_history_container.update_observation(observation)
-
-            # use super class get_suggestion
-            return super().get_suggestion(batch_history_container)
+        if self.batch_strategy in ['median_imputation', 'kriging_believer']:
+            # fantasize the running configs with the median (constant liar) or the predicted mean
+            fantasy_type = 'constant_liar' if self.batch_strategy == 'median_imputation' else 'kriging_believer'
+            return self.get_fantasy_suggestions(1, history_container, pending_configs=self.running_configs,
+                                                fantasy_type=fantasy_type)[0]
 
         elif self.batch_strategy == 'local_penalization':
             # local_penalization only supports single objective with no constraint
@@ -127,23 +130,38 @@ class AsyncBatchAdvisor(Advisor):
             )
             return challengers.challengers[0]
 
+        elif self.batch_strategy == 'thompson_sampling':
+            # the minimizer of a posterior function sample, excluding the running configs
+            self.alter_model(history_container)
+            self.train_surrogates(X, [Y], [])
+            self.acquisition_function.update(model=self.surrogate_model, mc_times=1)
+            self.optimizer.set_budget(time_budget=self.get_optimizer_time_budget(history_container),
+                                      eval_budget=self.acq_optimizer_eval_budget)
+            configs = self.optimizer.maximize_thompson(runhistory=history_container, q=1, num_points=5000,
+                                                       excluded_configs=self.running_configs)
+            if len(configs) > 0:
+                return configs[0]
+            self.logger.warning('Cannot get non duplicate configuration from BO candidates. Sample random config.')
+            return self.sample_random_configs(1, history_container,
+                                              excluded_configs=running_config_index)[0]
+
         elif self.batch_strategy == 'default':
             # select first N candidates
             candidates = super().get_suggestion(history_container, return_list=True)
 
             for config in candidates:
-                if config not in self.running_configs and config not in history_container.configurations:
+                if config not in running_config_index and config not in history_container.config_index:
                     return config
 
             self.logger.warning('Cannot get non duplicate configuration from BO candidates (len=%d). '
                                 'Sample random config.' % (len(candidates),))
             return self.sample_random_configs(1, history_container,
-                                              excluded_configs=self.running_configs)[0]
+                                              excluded_configs=running_config_index)[0]
         else:
             raise ValueError('Invalid sampling strategy - %s.' % self.batch_strategy)
 
     def update_observation(self, observation: Observation):
         config = observation.config
-        assert config in self.running_configs
-        self.running_configs.remove(config)
+        assert config in self.history_container.running_config_index
+        self.history_container.running_config_index.remove(config)
         super().update_observation(observation)
@@ -1,6 +1,8 @@
 # License: MIT
 
 import sys
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from openbox.utils.constants import MAXINT, SUCCESS
 from openbox.acquisition_function import *
 from openbox.utils.util_funcs import get_types
@@ -48,6 +50,9 @@ acq_dict = {
     'mesmoc': MESMOC,
     'mesmoc2': MESMOC2,
     'mceic': MCEIC,
+    'qei': qEI,
+    'qnei': qNEI,
+    'ts': TS,
 }
 
 
@@ -98,7 +103,7 @@ def build_optimizer(func_str='local_random', acq_func=None, config_space=None, r
                      rng=rng)
 
 
-def build_surrogate(func_str='gp', config_space=None, rng=None, history_hpo_data=None):
+def build_surrogate(func_str='gp', config_space=None, rng=None, history_hpo_data=None, n_outputs=1):
     assert config_space is not None
     func_str = func_str.lower()
     types, bounds = get_types(config_space)
@@ -114,6 +119,17 @@ def build_surrogate(func_str='gp', config_space=None, rng=None, history_hpo_data
                   'https://open-box.readthedocs.io/en/latest/installation/install_pyrfr.html')
             return skRandomForestWithInstances(types=types, bounds=bounds, seed=seed)
 
+    elif func_str == 'prf_incremental':
+        try:
+            from openbox.surrogate.base.rf_with_instances_incremental import IncrementalRandomForestWithInstances
+            return IncrementalRandomForestWithInstances(types=types, bounds=bounds, seed=seed)
+        except ModuleNotFoundError:
+            from openbox.surrogate.base.rf_with_instances_sklearn import skRandomForestWithInstances
+            print('[Build Surrogate] Incremental probabilistic random forest requires pyrfr. '
+                  'Use probabilistic random forest based on scikit-learn instead. Please install pyrfr: '
+                  'https://open-box.readthedocs.io/en/latest/installation/install_pyrfr.html')
+            return skRandomForestWithInstances(types=types, bounds=bounds, seed=seed)
+
     elif func_str == 'sk_prf':
         from openbox.surrogate.base.rf_with_instances_sklearn import skRandomForestWithInstances
         return skRandomForestWithInstances(types=types, bounds=bounds, seed=seed)
@@ -128,11 +144,14 @@ def build_surrogate(func_str='gp', config_space=None, rng=None, history_hpo_data
 
     elif func_str.startswith('gp'):
         from openbox.surrogate.base.build_gp import create_gp_model
+        # the GP (and the priors of its kernel) own their random state, so that independent
+        # models give the same results whether they are trained sequentially or concurrently
         return create_gp_model(model_type=func_str,
                                config_space=config_space,
                                types=types,
                                bounds=bounds,
-                               rng=rng)
+                               rng=np.random.RandomState(seed),
+                               n_outputs=n_outputs)
     elif func_str.startswith('mfgpe'):
         from openbox.surrogate.tlbo.mfgpe import MFGPE
         inner_surrogate_type = 'prf'
@@ -159,3 +178,51 @@ def build_surrogate(func_str='gp', config_space=None, rng=None, history_hpo_data
             raise ValueError('Invalid string %s for tlbo surrogate!' % func_str)
     else:
         raise ValueError('Invalid string %s for surrogate!' % func_str)
+
+
+def _train_surrogate(model, X, y):
+    model.train(X, y)
+    return model
+
+
+def train_surrogates(models, X, targets, executor: Executor = None):
+    """
+    Train independent surrogate models on the same inputs, concurrently if an executor is given.
+
+    Models are submitted to a process pool if their ``train_backend`` is 'processes' and to other executors
+    if it is 'threads' or 'processes'. The other models are trained in the caller. Every model owns its
+    random state, so the results do not depend on the executor.
+
+    Parameters
+    ----------
+    models: list
+        Surrogate models.
+    X: np.ndarray
+        Input data points.
+    targets: list
+        Target values of each model.
+    executor: concurrent.futures.Executor, optional
+
+    Returns
+    -------
+    The trained models. Models trained in a process pool are new objects.
+    """
+    if executor is None or len(models) <= 1:
+        return [_train_surrogate(model, X, y) for model, y in zip(models, targets)]
+
+    backends = ('processes', ) if isinstance(executor, ProcessPoolExecutor) else ('threads', 'processes')
+    futures = [executor.submit(_train_surrogate, model, X, y) if model.train_backend in backends else None
+               for model, y in zip(models, targets)]
+    trained = [_train_surrogate(model, X, y) if future is None else None
+               for model, y, future in zip(models, targets, futures)]
+    return [model if future is None else future.result() for model, future in zip(trained, futures)]
+
+
+def build_surrogate_executor(models, n_jobs):
+    """
+    Build an executor for train_surrogates: a process pool if some models hold the GIL during training,
+    and a thread pool otherwise.
+    """
+    if all(model.train_backend != 'processes' for model in models):
+        return ThreadPoolExecutor(max_workers=n_jobs)
+    return ProcessPoolExecutor(max_workers=n_jobs)
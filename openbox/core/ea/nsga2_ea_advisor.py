@@ -1,14 +1,15 @@
 # License: MIT
 from typing import List
 
+import numpy as np
 from ConfigSpace import Configuration
 
 from openbox.core.ea.base_ea_advisor import Individual
-from openbox.core.ea.base_ea_advisor import pareto_layers
 from openbox.core.ea.base_ea_advisor import EAAdvisor
 from openbox.utils.constants import MAXINT, SUCCESS
 from openbox.utils.config_space import get_one_exchange_neighbourhood
 from openbox.core.base import Observation
+from openbox.utils.multi_objective.pareto import pareto_layers, crowding_distance
 
 
 class NSGA2EAdvisor(EAAdvisor):
@@ -140,16 +141,6 @@ class NSGA2EAdvisor(EAAdvisor):
         return ret_config
 
     def crowding_select(self, xs: List[Individual], num) -> List[Individual]:
-        INF = 1e7
-        llen = len(xs)
-        dim = len(xs[0]['perf'])
-        xs = [[x, 0] for x in xs]
-        for k in range(dim):
-            xs = sorted(xs, key=lambda xv: xv[0]['perf'][k], reverse=True)
-            xs[0][1] += INF
-            xs[-1][1] += INF
-            for t in range(1, llen - 1):
-                xs[t][1] += xs[t - 1][0]['perf'][k] - xs[t + 1][0]['perf'][k]
-        xs = sorted(xs, key=lambda xv: xv[1], reverse=True)
-        xs = xs[:num]
-        return [x for (x, v) in xs]
+        distances = crowding_distance(np.array([x['perf'] for x in xs], dtype=np.float64).reshape(len(xs), -1))
+        order = np.argsort(-distances, kind='stable')[:num]
+        return [xs[i] for i in order]
@@ -2,16 +2,17 @@ import random
 from typing import Optional, Callable, List, Type, Union
 
 import numpy as np
+from concurrent.futures import Executor
 from ConfigSpace import ConfigurationSpace, Configuration
 
 from openbox.core.ea.regularized_ea_advisor import RegularizedEAAdvisor
 from openbox.acquisition_function import AbstractAcquisitionFunction
-from openbox.core.base import build_acq_func, build_surrogate, Observation
+from openbox.core.base import build_acq_func, build_surrogate, train_surrogates, Observation
 from openbox.core.ea.base_ea_advisor import Individual
 from openbox.core.ea.base_modular_ea_advisor import ModularEAAdvisor
 from openbox.surrogate.base.base_model import AbstractModel
-from openbox.utils.config_space import convert_configurations_to_array
-from openbox.utils.multi_objective import NondominatedPartitioning, get_chebyshev_scalarization
+from openbox.utils.multi_objective import IncrementalNondominatedPartitioning, APPROX_MAX_CELLS, \
+    get_chebyshev_scalarization
 
 
 class SAEAAdvisor(ModularEAAdvisor):
@@ -41,7 +42,9 @@ class SAEAAdvisor(ModularEAAdvisor):
 
                  gen_multiplier=50,
 
-                 ref_point=None
+                 ref_point=None,
+
+                 surrogate_executor: Optional[Executor] = None,
                  ):
 
         self.ea = ea if isinstance(ea, ModularEAAdvisor) else ea(config_space)
@@ -96,7 +99,14 @@ class SAEAAdvisor(ModularEAAdvisor):
                                self.constraint_surrogates, config_space=config_space)
         self.acq_type = acq
 
+        self.partitioning = None
+        if acq in {'ehvi', 'ehvic'}:
+            self.partitioning = IncrementalNondominatedPartitioning(
+                self.num_objs, max_cells=APPROX_MAX_CELLS if self.num_objs >= 4 else None)
+
         self.gen_multiplier = gen_multiplier
+        # the objective and constraint surrogates are trained concurrently on this executor if given
+        self.surrogate_executor = surrogate_executor
 
         self.is_models_trained = False
 
@@ -121,7 +131,7 @@ class SAEAAdvisor(ModularEAAdvisor):
     def _sel(self, parent: List[Individual], sub: List[Individual]) -> List[Individual]:
         self.ea.sel()
 
-        X = convert_configurations_to_array(self.history_container.configurations)
+        X = self.history_container.get_config_array()
         Y = self.history_container.get_transformed_perfs(transform=None)
 
         # Alternate option: use untransformed perfs (may be enabled in the future)
@@ -132,11 +142,13 @@ class SAEAAdvisor(ModularEAAdvisor):
 
         cY = self.history_container.get_transformed_constraint_perfs(transform='bilog')
 
-        for i in range(self.num_objs):
-            self.objective_surrogates[i].train(X, Y[:, i] if Y.ndim == 2 else Y)
-
-        for i in range(self.num_constraints):
-            self.constraint_surrogates[i].train(X, cY[:, i])
+        models = train_surrogates(self.objective_surrogates + self.constraint_surrogates, X,
+                                  [Y[:, i] if Y.ndim == 2 else Y for i in range(self.num_objs)]
+                                  + [cY[:, i] for i in range(self.num_constraints)],
+                                  executor=self.surrogate_executor)
+        # models trained in other processes are copies
+        self.objective_surrogates[:] = models[:self.num_objs]
+        self.constraint_surrogates[:] = models[self.num_objs:]
 
         # Code copied from generic_advisor.py
 
@@ -159,8 +171,8 @@ class SAEAAdvisor(ModularEAAdvisor):
                                 eta=get_chebyshev_scalarization(weights, Y)(np.atleast_2d(mo_incumbent_value)),
                                 num_data=num_config_evaluated)
             elif self.acq_type.startswith('ehvi'):
-                partitioning = NondominatedPartitioning(self.num_objs, Y)
-                cell_bounds = partitioning.get_hypercell_bounds(ref_point=self.ref_point)
+                self.partitioning.update(Y)
+                cell_bounds = self.partitioning.get_hypercell_bounds(ref_point=self.ref_point)
                 self.acq.update(model=self.objective_surrogates,
                                 constraint_models=self.constraint_surrogates,
                                 cell_lower_bounds=cell_bounds[0],
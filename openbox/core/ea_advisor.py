@@ -46,7 +46,6 @@ class EA_Advisor(object, metaclass=abc.ABCMeta):
         # Init parallel settings
         self.batch_size = batch_size
         self.init_num = batch_size  # for compatibility in pSMBO
-        self.running_configs = list()
 
         # Basic components in Advisor.
         self.optimization_strategy = optimization_strategy
@@ -98,9 +97,13 @@ class EA_Advisor(object, metaclass=abc.ABCMeta):
                 next_config = self.sample_random_config(excluded_configs=self.all_configs)
 
         self.all_configs.add(next_config)
-        self.running_configs.append(next_config)
+        self.history_container.running_config_index.add(next_config)
         return next_config
 
+    @property
+    def running_configs(self):
+        return list(self.history_container.running_config_index)
+
     def get_suggestions(self, batch_size=None, history_container=None):
         if batch_size is None:
             batch_size = self.batch_size
@@ -127,8 +130,8 @@ class EA_Advisor(object, metaclass=abc.ABCMeta):
         perf = observation.objs[0]
         trial_state = observation.trial_state
 
-        assert config in self.running_configs
-        self.running_configs.remove(config)
+        assert config in self.history_container.running_config_index
+        self.history_container.running_config_index.remove(config)
 
         # update population
         if trial_state == SUCCESS and perf < MAXINT:
@@ -2,23 +2,44 @@
 
 import os
 import abc
+import copy
+import time
 import numpy as np
 
 from openbox.utils.util_funcs import check_random_state
 from openbox.utils.logging_utils import get_logger
 from openbox.utils.history_container import HistoryContainer, MOHistoryContainer, \
-    MultiStartHistoryContainer
+    MultiStartHistoryContainer, ConfigurationIndex
 from openbox.utils.constants import MAXINT, SUCCESS
 from openbox.utils.samplers import SobolSampler, LatinHypercubeSampler
-from openbox.utils.multi_objective import get_chebyshev_scalarization, NondominatedPartitioning
 from openbox.utils.config_space.util import convert_configurations_to_array
-from openbox.core.base import build_acq_func, build_optimizer, build_surrogate
+from openbox.utils.multi_objective import get_chebyshev_scalarization, IncrementalNondominatedPartitioning, \
+    APPROX_MAX_CELLS
+from openbox.core.base import build_acq_func, build_optimizer, build_surrogate, \
+    train_surrogates, build_surrogate_executor
 from openbox.core.base import Observation
 
 
 class Advisor(object, metaclass=abc.ABCMeta):
     """
     Basic Advisor Class, which adopts a policy to sample a configuration.
+
+    The acquisition function maximization can be limited by ``acq_optimizer_time_budget`` (seconds)
+    and ``acq_optimizer_eval_budget`` (evaluated points) per suggestion. If ``acq_optimizer_time_ratio``
+    is given, the time of a suggestion (surrogate training plus maximization) is further limited to
+    this fraction of the median elapsed time of the evaluated trials, so that the advisor overhead stays
+    a bounded fraction of the trial cost.
+
+    By default, the surrogates are retrained and the acquisition function is maximized for every suggestion.
+    If ``refit_interval`` (new observations) or ``refit_time_interval`` (seconds) is given, the surrogates
+    are only refit when one of these has elapsed since the last refit. In between, suggestions are served
+    from the ranked challengers of the last maximization that are not in the history yet. The time trigger
+    depends on the machine load, so ``refit_strict=True`` ignores it to keep runs reproducible.
+
+    The objective and constraint surrogates are independent and can be trained concurrently on
+    ``surrogate_executor``. If only ``surrogate_n_jobs`` > 1 is given, a thread pool is built if all
+    surrogates release the GIL during training, and a process pool otherwise. The pool built by the
+    advisor is shut down by ``close()`` (or on leaving a ``with`` block); a given executor is left to its owner.
     """
 
     def __init__(self, config_space,
@@ -37,6 +58,14 @@ class Advisor(object, metaclass=abc.ABCMeta):
                  output_dir='logs',
                  task_id='default_task_id',
                  random_state=None,
+                 acq_optimizer_time_budget=None,
+                 acq_optimizer_eval_budget=None,
+                 acq_optimizer_time_ratio=None,
+                 refit_interval=None,
+                 refit_time_interval=None,
+                 refit_strict=False,
+                 surrogate_executor=None,
+                 surrogate_n_jobs=1,
                  **kwargs):
 
         # Create output (logging) directory.
@@ -60,6 +89,15 @@ class Advisor(object, metaclass=abc.ABCMeta):
         self.constraint_surrogate_type = None
         self.acq_type = acq_type
         self.acq_optimizer_type = acq_optimizer_type
+        self.acq_optimizer_time_budget = acq_optimizer_time_budget
+        self.acq_optimizer_eval_budget = acq_optimizer_eval_budget
+        self.acq_optimizer_time_ratio = acq_optimizer_time_ratio
+        self.refit_interval = refit_interval
+        self.refit_time_interval = refit_time_interval
+        self.refit_strict = refit_strict
+        self.surrogate_executor = surrogate_executor
+        self.surrogate_n_jobs = surrogate_n_jobs
+        self._owns_surrogate_executor = False
         self.init_num = initial_trials
         self.config_space = config_space
         self.config_space_seed = self.rng.randint(MAXINT)
@@ -86,6 +124,7 @@ class Advisor(object, metaclass=abc.ABCMeta):
         self.acquisition_function = None
         self.optimizer = None
         self.auto_alter_model = False
+        self.reset_challenger_cache()
         self.algo_auto_selection()
         self.check_setup()
         self.setup_bo_basics()
@@ -161,11 +200,10 @@ class Advisor(object, metaclass=abc.ABCMeta):
 
         if num_config_evaluated == 300:
             if self.surrogate_type == 'gp':
-                self.surrogate_type = 'prf'
-                self.logger.info('n_observations=300, change surrogate model from GP to PRF!')
-                if self.acq_optimizer_type == 'random_scipy':
-                    self.acq_optimizer_type = 'local_random'
-                    self.logger.info('n_observations=300, change acq optimizer from random_scipy to local_random!')
+                # GP is only auto-selected for continuous-heavy spaces, where the sparse GP keeps
+                # GP-quality uncertainty at O(n*m^2) training cost instead of falling back to PRF.
+                self.surrogate_type = 'gp_sparse'
+                self.logger.info('n_observations=300, change surrogate model from GP to sparse GP!')
                 self.setup_bo_basics()
 
     def check_setup(self):
@@ -186,7 +224,7 @@ class Advisor(object, metaclass=abc.ABCMeta):
             else:  # with constraints
                 assert self.acq_type in ['eic', ]
                 if self.constraint_surrogate_type is None:
-                    self.constraint_surrogate_type = 'gp'
+                    self.constraint_surrogate_type = self.default_constraint_surrogate_type()
 
         # multi-objective
         else:
@@ -202,7 +240,7 @@ class Advisor(object, metaclass=abc.ABCMeta):
                     if self.acq_type == 'mesmoc':
                         self.constraint_surrogate_type = 'gp_rbf'
                     else:
-                        self.constraint_surrogate_type = 'gp'
+                        self.constraint_surrogate_type = self.default_constraint_surrogate_type()
                 if self.acq_type == 'mesmoc' and self.surrogate_type != 'gp_rbf':
                     self.surrogate_type = 'gp_rbf'
                     self.logger.warning('Surrogate model has changed to Gaussian Process with RBF kernel '
@@ -216,6 +254,12 @@ class Advisor(object, metaclass=abc.ABCMeta):
             if 'ehvi' in self.acq_type and self.ref_point is None:
                 raise ValueError('Must provide reference point to use EHVI method!')
 
+    def default_constraint_surrogate_type(self):
+        # constraints share the multi-output GP of the objectives
+        if self.surrogate_type in ['gp_multi', 'gp_multi_tied']:
+            return self.surrogate_type
+        return 'gp'
+
     def setup_bo_basics(self):
         """
         Prepare the basic BO components.
@@ -223,7 +267,20 @@ class Advisor(object, metaclass=abc.ABCMeta):
         -------
         An optimizer object.
         """
-        if self.num_objs == 1 or self.acq_type == 'parego':
+        share_outputs = self.surrogate_type in ['gp_multi', 'gp_multi_tied'] and self.acq_type != 'parego'
+        num_shared_constraints = self.num_constraints \
+            if share_outputs and self.constraint_surrogate_type == self.surrogate_type else 0
+        if share_outputs:
+            # one GP with a shared kernel factorization for all objectives (and constraints)
+            multi_output_gp = build_surrogate(func_str=self.surrogate_type,
+                                              config_space=self.config_space,
+                                              rng=self.rng,
+                                              n_outputs=self.num_objs + num_shared_constraints)
+            output_models = multi_output_gp.get_output_models()
+            self.surrogate_model = output_models[0] if self.num_objs == 1 else output_models[:self.num_objs]
+            if num_shared_constraints > 0:
+                self.constraint_models = output_models[self.num_objs:]
+        elif self.num_objs == 1 or self.acq_type == 'parego':
             self.surrogate_model = build_surrogate(func_str=self.surrogate_type,
                                                    config_space=self.config_space,
                                                    rng=self.rng,
@@ -235,7 +292,7 @@ class Advisor(object, metaclass=abc.ABCMeta):
                                                     history_hpo_data=self.history_bo_data)
                                     for _ in range(self.num_objs)]
 
-        if self.num_constraints > 0:
+        if self.num_constraints > 0 and num_shared_constraints == 0:
             self.constraint_models = [build_surrogate(func_str=self.constraint_surrogate_type,
                                                       config_space=self.config_space,
                                                       rng=self.rng) for _ in range(self.num_constraints)]
@@ -250,12 +307,18 @@ class Advisor(object, metaclass=abc.ABCMeta):
                                                        model=self.surrogate_model,
                                                        constraint_models=self.constraint_models,
                                                        ref_point=self.ref_point)
+        # the decomposition of the non-dominated space for EHVI is updated incrementally with the observations
+        self.partitioning = None
+        if self.num_objs > 1 and self.acq_type.startswith('ehvi'):
+            self.partitioning = IncrementalNondominatedPartitioning(
+                self.num_objs, max_cells=APPROX_MAX_CELLS if self.num_objs >= 4 else None)
         if self.acq_type == 'usemo':
             self.acq_optimizer_type = 'usemo_optimizer'
         self.optimizer = build_optimizer(func_str=self.acq_optimizer_type,
                                          acq_func=self.acquisition_function,
                                          config_space=self.config_space,
                                          rng=self.rng)
+        self.reset_challenger_cache()
 
     def create_initial_design(self, init_strategy='default'):
         """
@@ -322,6 +385,7 @@ class Advisor(object, metaclass=abc.ABCMeta):
         """
         if history_container is None:
             history_container = self.history_container
+        start_time = time.time()
 
         self.alter_model(history_container)
 
@@ -338,7 +402,7 @@ class Advisor(object, metaclass=abc.ABCMeta):
             self.logger.info('Sample random config. rand_prob=%f.' % self.rand_prob)
             return self.sample_random_configs(1, history_container)[0]
 
-        X = convert_configurations_to_array(history_container.configurations)
+        X = history_container.get_config_array()
         Y = history_container.get_transformed_perfs(transform=None)
         cY = history_container.get_transformed_constraint_perfs(transform='bilog')
 
@@ -347,67 +411,420 @@ class Advisor(object, metaclass=abc.ABCMeta):
                 self.logger.warning('No enough successful initial trials! Sample random configuration.')
                 return self.sample_random_configs(1, history_container)[0]
 
-            # train surrogate model
-            if self.num_objs == 1:
-                self.surrogate_model.train(X, Y)
-            elif self.acq_type == 'parego':
-                weights = self.rng.random_sample(self.num_objs)
-                weights = weights / np.sum(weights)
-                scalarized_obj = get_chebyshev_scalarization(weights, Y)
-                self.surrogate_model.train(X, scalarized_obj(Y))
-            else:  # multi-objectives
-                for i in range(self.num_objs):
-                    self.surrogate_model[i].train(X, Y[:, i])
-
-            # train constraint model
-            for i in range(self.num_constraints):
-                self.constraint_models[i].train(X, cY[:, i])
+            if not return_list and not self.need_refit(history_container):
+                config = self.get_cached_challenger(history_container)
+                if config is not None:
+                    return config
+
+            # train surrogate model and constraint model
+            objective_targets, scalarized_obj = self.get_objective_targets(Y)
+            self.train_surrogates(X, objective_targets, [cY[:, i] for i in range(self.num_constraints)])
 
             # update acquisition function
-            if self.num_objs == 1:
-                incumbent_value = history_container.get_incumbents()[0][1]
-                self.acquisition_function.update(model=self.surrogate_model,
-                                                 constraint_models=self.constraint_models,
-                                                 eta=incumbent_value,
-                                                 num_data=num_config_evaluated)
-            else:  # multi-objectives
-                mo_incumbent_value = history_container.get_mo_incumbent_value()
-                if self.acq_type == 'parego':
-                    self.acquisition_function.update(model=self.surrogate_model,
-                                                     constraint_models=self.constraint_models,
-                                                     eta=scalarized_obj(np.atleast_2d(mo_incumbent_value)),
-                                                     num_data=num_config_evaluated)
-                elif self.acq_type.startswith('ehvi'):
-                    partitioning = NondominatedPartitioning(self.num_objs, Y)
-                    cell_bounds = partitioning.get_hypercell_bounds(ref_point=self.ref_point)
-                    self.acquisition_function.update(model=self.surrogate_model,
-                                                     constraint_models=self.constraint_models,
-                                                     cell_lower_bounds=cell_bounds[0],
-                                                     cell_upper_bounds=cell_bounds[1])
-                else:
-                    self.acquisition_function.update(model=self.surrogate_model,
-                                                     constraint_models=self.constraint_models,
-                                                     constraint_perfs=cY,  # for MESMOC
-                                                     eta=mo_incumbent_value,
-                                                     num_data=num_config_evaluated,
-                                                     X=X, Y=Y)
+            self.update_acquisition_function(history_container, X, Y, cY, scalarized_obj)
 
             # optimize acquisition function
+            self.optimizer.set_budget(time_budget=self.get_optimizer_time_budget(history_container, start_time),
+                                      eval_budget=self.acq_optimizer_eval_budget)
             challengers = self.optimizer.maximize(runhistory=history_container,
                                                   num_points=5000)
+            self._cached_challengers = challengers.challengers
+            self._cached_challenger_pos = 0
+            self._num_config_at_refit = num_config_evaluated
+            self._last_refit_time = time.time()
             if return_list:
                 # Caution: return_list doesn't contain random configs sampled according to rand_prob
                 return challengers.challengers
 
-            for config in challengers.challengers:
-                if config not in history_container.configurations:
-                    return config
+            config = self.get_cached_challenger(history_container)
+            if config is not None:
+                return config
             self.logger.warning('Cannot get non duplicate configuration from BO candidates (len=%d). '
                                 'Sample random config.' % (len(challengers.challengers), ))
             return self.sample_random_configs(1, history_container)[0]
         else:
             raise ValueError('Unknown optimization strategy: %s.' % self.optimization_strategy)
 
+    def get_objective_targets(self, Y):
+        """
+        Get the training targets of the objective surrogates.
+        For ParEGO, the objectives are scalarized with random weights.
+        Parameters
+        ----------
+        Y: np.ndarray
+            Untransformed objective values.
+
+        Returns
+        -------
+        The list of targets and the scalarization function (None if the objectives are not scalarized).
+        """
+        if self.num_objs == 1:
+            return [Y], None
+        elif self.acq_type == 'parego':
+            weights = self.rng.random_sample(self.num_objs)
+            weights = weights / np.sum(weights)
+            scalarized_obj = get_chebyshev_scalarization(weights, Y)
+            return [scalarized_obj(Y)], scalarized_obj
+        else:  # multi-objectives
+            return [Y[:, i] for i in range(self.num_objs)], None
+
+    def update_acquisition_function(self, history_container, X, Y, cY, scalarized_obj=None, fantasies=None):
+        """
+        Update the acquisition function with the trained surrogates.
+        Parameters
+        ----------
+        history_container
+
+        X, Y, cY: np.ndarray
+            Training data of the surrogates. Y is untransformed and cY is bilog-transformed.
+        scalarized_obj: callable, optional
+            Scalarization of the objectives for ParEGO, see get_objective_targets.
+        fantasies: tuple, optional
+            Pending points conditioned into the surrogates, their fantasy objective targets
+            and constraint values, see get_fantasy_suggestions. They count as observations.
+
+        Returns
+        -------
+        None
+        """
+        num_config_evaluated = len(history_container.configurations)
+        fantasy_best = None
+        if fantasies is not None:
+            X_pending, pending_targets, pending_cY = fantasies
+            num_config_evaluated += X_pending.shape[0]
+            feasible = np.all(pending_cY <= 0, axis=1)  # bilog keeps the sign
+            if np.any(feasible):
+                fantasy_best = np.min(pending_targets[feasible], axis=0)
+            X = np.vstack((X, X_pending))
+            if self.num_constraints > 0:
+                cY = np.vstack((cY, pending_cY))
+            if self.num_objs > 1 and scalarized_obj is None:
+                Y = np.vstack((Y, pending_targets))
+
+        if self.num_objs == 1:
+            incumbent_value = history_container.get_incumbents()[0][1]
+            if fantasy_best is not None:
+                incumbent_value = min(incumbent_value, fantasy_best[0])
+            self.acquisition_function.update(model=self.surrogate_model,
+                                             constraint_models=self.constraint_models,
+                                             eta=incumbent_value,
+                                             num_data=num_config_evaluated)
+        else:  # multi-objectives
+            mo_incumbent_value = history_container.get_mo_incumbent_value()
+            if self.acq_type == 'parego':
+                eta = scalarized_obj(np.atleast_2d(mo_incumbent_value))
+                if fantasy_best is not None:
+                    eta = np.minimum(eta, fantasy_best[0])
+                self.acquisition_function.update(model=self.surrogate_model,
+                                                 constraint_models=self.constraint_models,
+                                                 eta=eta,
+                                                 num_data=num_config_evaluated)
+            elif self.acq_type.startswith('ehvi'):
+                # fantasies are only added to a copy, so that the next observations are still inserted incrementally
+                num_observed = Y.shape[0] if fantasies is None else Y.shape[0] - fantasies[0].shape[0]
+                self.partitioning.update(Y[:num_observed])
+                partitioning = self.partitioning
+                if num_observed < Y.shape[0]:
+                    partitioning = copy.deepcopy(self.partitioning)
+                    partitioning.update(Y)
+                cell_bounds = partitioning.get_hypercell_bounds(ref_point=self.ref_point)
+                self.acquisition_function.update(model=self.surrogate_model,
+                                                 constraint_models=self.constraint_models,
+                                                 cell_lower_bounds=cell_bounds[0],
+                                                 cell_upper_bounds=cell_bounds[1])
+            else:
+                if fantasy_best is not None:
+                    mo_incumbent_value = np.minimum(mo_incumbent_value, fantasy_best)
+                self.acquisition_function.update(model=self.surrogate_model,
+                                                 constraint_models=self.constraint_models,
+                                                 constraint_perfs=cY,  # for MESMOC
+                                                 eta=mo_incumbent_value,
+                                                 num_data=num_config_evaluated,
+                                                 X=X, Y=Y)
+
+    def get_fantasy_suggestions(self, batch_size, history_container=None, pending_configs=None,
+                                fantasy_type='constant_liar'):
+        """
+        Generate a batch of configurations by fantasizing the outcomes of pending configurations.
+
+        The surrogates are trained once on the history. Then the pending configurations and every
+        suggested configuration are conditioned into the surrogates with fantasy values instead of
+        being imputed into a copy of the history: the median of the observed values ('constant_liar')
+        or the predicted mean ('kriging_believer'). Gaussian processes are conditioned by rank-one
+        updates with fixed hyperparameters (see GaussianProcess.fantasize), other surrogates are
+        retrained on the extended data. The surrogates are restored afterwards.
+        Parameters
+        ----------
+        batch_size: int
+            Number of configurations to suggest.
+        history_container
+
+        pending_configs: list, optional
+            Configurations under evaluation, e.g. the running configurations of asynchronous batches.
+            They are fantasized before the first suggestion and never suggested.
+        fantasy_type: str
+            'constant_liar' or 'kriging_believer'.
+
+        Returns
+        -------
+        A list of configurations.
+        """
+        if history_container is None:
+            history_container = self.history_container
+        if fantasy_type not in ['constant_liar', 'kriging_believer']:
+            raise ValueError('Unknown fantasy type: %s.' % fantasy_type)
+        start_time = time.time()
+
+        self.alter_model(history_container)
+
+        X = history_container.get_config_array()
+        Y = history_container.get_transformed_perfs(transform=None)
+        cY = history_container.get_transformed_constraint_perfs(transform='bilog')
+
+        objective_targets, scalarized_obj = self.get_objective_targets(Y)
+        constraint_targets = [cY[:, i] for i in range(self.num_constraints)]
+        self.train_surrogates(X, objective_targets, constraint_targets)
+        targets = objective_targets + constraint_targets
+        num_objective_models = len(objective_targets)
+
+        liar = None
+        if fantasy_type == 'constant_liar':
+            objective_liar = np.atleast_1d(np.median(Y, axis=0))
+            if scalarized_obj is not None:
+                objective_liar = scalarized_obj(np.atleast_2d(objective_liar))
+            liar = np.concatenate([objective_liar] + [[np.median(c)] for c in constraint_targets])
+
+        X_pending = np.empty((0, X.shape[1]))
+        pending_targets = np.empty((0, len(targets)))
+        pending_configs = list(pending_configs or [])
+        excluded_index = ConfigurationIndex(pending_configs)
+        batch_configs = list()
+        new_configs = pending_configs
+        acq_updated = False
+        try:
+            while len(batch_configs) < batch_size:
+                if len(new_configs) > 0:
+                    X_new = convert_configurations_to_array(new_configs)
+                    if liar is not None:
+                        new_targets = np.tile(liar, (X_new.shape[0], 1))
+                    else:
+                        new_targets = np.column_stack([model.predict(X_new)[0].reshape(-1)
+                                                       for model in self.get_surrogates()])
+                    X_pending = np.vstack((X_pending, X_new))
+                    pending_targets = np.vstack((pending_targets, new_targets))
+                    self.fantasize_surrogates(X, targets, X_pending, pending_targets, X_new.shape[0])
+                    acq_updated = False
+
+                config = None
+                if self.rng.random() < self.rand_prob:
+                    self.logger.info('Sample random config. rand_prob=%f.' % self.rand_prob)
+                else:
+                    if not acq_updated:
+                        fantasies = None
+                        if X_pending.shape[0] > 0:
+                            fantasies = (X_pending, pending_targets[:, :num_objective_models],
+                                         pending_targets[:, num_objective_models:])
+                        self.update_acquisition_function(history_container, X, Y, cY, scalarized_obj, fantasies)
+                        acq_updated = True
+                    self.optimizer.set_budget(
+                        time_budget=self.get_optimizer_time_budget(history_container, start_time),
+                        eval_budget=self.acq_optimizer_eval_budget)
+                    challengers = self.optimizer.maximize(runhistory=history_container, num_points=5000)
+                    for challenger in challengers.challengers:
+                        if challenger not in excluded_index and challenger not in history_container.config_index:
+                            config = challenger
+                            break
+                    if config is None:
+                        self.logger.warning('Cannot get non duplicate configuration from BO candidates (len=%d). '
+                                            'Sample random config.' % (len(challengers.challengers), ))
+                if config is None:
+                    config = self.sample_random_configs(1, history_container, excluded_configs=excluded_index)[0]
+                batch_configs.append(config)
+                excluded_index.add(config)
+                new_configs = [config] if len(batch_configs) < batch_size else []
+                start_time = time.time()
+        finally:
+            self.clear_fantasies()
+        return batch_configs
+
+    def get_surrogates(self):
+        """
+        Get the objective surrogates followed by the constraint surrogates.
+        """
+        models = self.surrogate_model if isinstance(self.surrogate_model, list) else [self.surrogate_model]
+        return models + (self.constraint_models or [])
+
+    def fantasize_surrogates(self, X, targets, X_pending, pending_targets, num_new):
+        """
+        Condition the surrogates on pending points with fantasy target values.
+        Surrogates that support it (see GaussianProcess.fantasize) are updated with the new pending points,
+        the others are retrained on the training data extended by all pending points.
+        Parameters
+        ----------
+        X: np.ndarray
+            Input data points of the training.
+        targets: list
+            Training targets of each surrogate, see get_surrogates.
+        X_pending: np.ndarray (k, D)
+            All pending points, of which the last num_new ones are new.
+        pending_targets: np.ndarray (k, n_surrogates)
+            Fantasy target values of the pending points.
+        num_new: int
+            Number of new pending points.
+
+        Returns
+        -------
+        None
+        """
+        X_all = np.vstack((X, X_pending))
+        for i, model in enumerate(self.get_surrogates()):
+            if hasattr(model, 'fantasize'):
+                model.fantasize(X_pending[-num_new:], pending_targets[-num_new:, i])
+            else:
+                model.train(X_all, np.concatenate((targets[i], pending_targets[:, i])))
+
+    def clear_fantasies(self):
+        """
+        Remove the fantasies of the surrogates that support it. The other surrogates keep them until the next training.
+        """
+        for model in self.get_surrogates():
+            if hasattr(model, 'clear_fantasies'):
+                model.clear_fantasies()
+
+    def get_surrogate_executor(self):
+        """
+        Get the executor for surrogate training, building one if surrogate_n_jobs > 1.
+        Returns
+        -------
+        An executor, or None to train the surrogates sequentially.
+        """
+        if self.surrogate_executor is None and self.surrogate_n_jobs > 1:
+            self.surrogate_executor = build_surrogate_executor(self.get_surrogates(), self.surrogate_n_jobs)
+            self._owns_surrogate_executor = True
+        return self.surrogate_executor
+
+    def close(self):
+        """
+        Shut down the surrogate executor built by the advisor. A new one is built if the advisor is used again.
+        """
+        if self._owns_surrogate_executor:
+            self.surrogate_executor.shutdown()
+            self.surrogate_executor = None
+            self._owns_surrogate_executor = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def train_surrogates(self, X, objective_targets, constraint_targets):
+        """
+        Train the objective and constraint surrogates, concurrently on the surrogate executor if there is one.
+        Parameters
+        ----------
+        X: np.ndarray
+            Input data points.
+        objective_targets: list
+            Target values of each objective surrogate.
+        constraint_targets: list
+            Target values of each constraint surrogate.
+
+        Returns
+        -------
+        None
+        """
+        is_list = isinstance(self.surrogate_model, list)
+        objective_models = self.surrogate_model if is_list else [self.surrogate_model]
+        models = train_surrogates(objective_models + (self.constraint_models or []), X,
+                                  list(objective_targets) + list(constraint_targets),
+                                  executor=self.get_surrogate_executor())
+        # models trained in other processes are copies
+        if is_list:
+            self.surrogate_model[:] = models[:len(objective_models)]
+        else:
+            self.surrogate_model = models[0]
+        if self.constraint_models is not None:
+            self.constraint_models[:] = models[len(objective_models):]
+
+    def reset_challenger_cache(self):
+        """
+        Drop the challengers of the last maximization, so that the next suggestion refits the surrogates.
+        """
+        self._cached_challengers = None
+        self._cached_challenger_pos = 0
+        self._num_config_at_refit = 0
+        self._last_refit_time = None
+
+    def need_refit(self, history_container):
+        """
+        Whether the surrogates must be refit before the next suggestion (see refit_interval).
+        Parameters
+        ----------
+        history_container
+
+        Returns
+        -------
+        True if the surrogates must be refit, False if the cached challengers can be used.
+        """
+        if self._cached_challengers is None:
+            return True
+        if self.refit_interval is None and (self.refit_time_interval is None or self.refit_strict):
+            return True
+        num_new_configs = len(history_container.configurations) - self._num_config_at_refit
+        if num_new_configs < 0:
+            return True
+        if self.refit_interval is not None and num_new_configs >= self.refit_interval:
+            return True
+        if not self.refit_strict and self.refit_time_interval is not None \
+                and time.time() - self._last_refit_time >= self.refit_time_interval:
+            return True
+        return False
+
+    def get_cached_challenger(self, history_container):
+        """
+        Get the next challenger of the last maximization that is not in the history.
+        Parameters
+        ----------
+        history_container
+
+        Returns
+        -------
+        A configuration, or None if all cached challengers are used up.
+        """
+        challengers = self._cached_challengers
+        if challengers is None:
+            return None
+        while self._cached_challenger_pos < len(challengers):
+            config = challengers[self._cached_challenger_pos]
+            self._cached_challenger_pos += 1
+            if config not in history_container.config_index:
+                return config
+        return None
+
+    def get_optimizer_time_budget(self, history_container, start_time=None):
+        """
+        Get the time budget of the acquisition function maximization.
+        Parameters
+        ----------
+        history_container
+        start_time: float, optional
+            Start time of the suggestion. The time spent since then is subtracted from the scaled budget.
+
+        Returns
+        -------
+        Time budget in seconds, or None if unlimited.
+        """
+        time_budget = self.acq_optimizer_time_budget
+        if self.acq_optimizer_time_ratio is not None:
+            elapsed_times = [t for t in history_container.elapsed_times if t is not None]
+            if len(elapsed_times) > 0:
+                scaled_budget = self.acq_optimizer_time_ratio * np.median(elapsed_times)
+                if start_time is not None:
+                    scaled_budget = max(scaled_budget - (time.time() - start_time), 0.0)
+                time_budget = scaled_budget if time_budget is None else min(time_budget, scaled_budget)
+        return time_budget
+
     def update_observation(self, observation: Observation):
         """
         Update the current observations.
@@ -436,8 +853,8 @@ class Advisor(object, metaclass=abc.ABCMeta):
         """
         if history_container is None:
             history_container = self.history_container
-        if excluded_configs is None:
-            excluded_configs = set()
+        # sampled configs are also added to excluded_index
+        excluded_index = ConfigurationIndex(excluded_configs)
 
         configs = list()
         sample_cnt = 0
@@ -445,8 +862,9 @@ class Advisor(object, metaclass=abc.ABCMeta):
         while len(configs) < num_configs:
             config = self.config_space.sample_configuration()
             sample_cnt += 1
-            if config not in (history_container.configurations + configs) and config not in excluded_configs:
+            if config not in history_container.config_index and config not in excluded_index:
                 configs.append(config)
+                excluded_index.add(config)
                 sample_cnt = 0
                 continue
             if sample_cnt >= max_sample_cnt:
@@ -458,27 +876,41 @@ class Advisor(object, metaclass=abc.ABCMeta):
     def get_history(self):
         return self.history_container
 
-    def save_history(self, dir_path: str = None, file_name: str = None):
+    def save_history(self, dir_path: str = None, file_name: str = None, journal: bool = False,
+                     overwrite: bool = False):
         """
         Save history to a json file.
+
+        If journal is True, new observations are appended to a journal file (see HistoryContainer.save_journal)
+        instead of rewriting the whole history. Recommended when saving after every observation.
+        An existing journal which the history was not loaded from is only replaced if overwrite is True.
         """
         if dir_path is None:
             dir_path = os.path.join(self.output_dir, 'bo_history')
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
         if file_name is None:
-            file_name = 'bo_history_%s.json' % self.task_id
-        self.history_container.save_json(os.path.join(dir_path, file_name))
+            file_name = 'bo_history_%s.%s' % (self.task_id, 'jsonl' if journal else 'json')
+        if journal:
+            self.history_container.save_journal(os.path.join(dir_path, file_name), overwrite=overwrite)
+        else:
+            self.history_container.save_json(os.path.join(dir_path, file_name))
 
-    def load_history_from_json(self, file_name=None):
+    def load_history_from_json(self, file_name=None, journal: bool = False):
         """
         Load history from a json file.
+
+        If journal is True, load history from a journal file saved by save_history(journal=True).
         """
         if file_name is None:
-            file_name = os.path.join(self.output_dir, 'bo_history', 'bo_history_%s.json' % self.task_id)
+            file_name = os.path.join(self.output_dir, 'bo_history',
+                                     'bo_history_%s.%s' % (self.task_id, 'jsonl' if journal else 'json'))
         if not os.path.exists(file_name):
             raise FileNotFoundError('History file not found: %s' % file_name)
-        self.history_container.load_history_from_json(file_name)
+        if journal:
+            self.history_container.load_history_from_journal(file_name)
+        else:
+            self.history_container.load_history_from_json(file_name)
 
     def get_suggestions(self):
         raise NotImplementedError
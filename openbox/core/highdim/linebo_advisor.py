@@ -6,7 +6,6 @@ from ConfigSpace import ConfigurationSpace, Configuration, UniformFloatHyperpara
 
 from openbox.core.base import build_acq_func, build_surrogate, Observation, build_optimizer
 from openbox.surrogate.base.base_model import AbstractModel
-from openbox.utils.config_space import convert_configurations_to_array
 from openbox.utils.history_container import HistoryContainer
 from openbox.utils.util_funcs import check_random_state, get_types
 
@@ -231,7 +230,7 @@ class LineBOAdvisor:
         incumbent_value = self.history_container.get_incumbents()[0][1]
         num_config_evaluated = len(self.history_container.configurations)
 
-        X = convert_configurations_to_array(self.history_container.configurations)
+        X = self.history_container.get_config_array()
         Y = self.history_container.get_transformed_perfs(transform=None)
         cY = self.history_container.get_transformed_constraint_perfs(transform='bilog')
 
@@ -272,7 +271,7 @@ class LineBOAdvisor:
                 if any(np.linalg.norm(cx - i.get_array()) < 1e-6 for i in self.history_container.configurations):
                     continue
 
-                if config not in self.history_container.configurations:
+                if config not in self.history_container.config_index:
                     ret = c
                     break
 
@@ -292,7 +291,7 @@ class LineBOAdvisor:
             ans = None
 
             for i in range(self.subbo_samples):
-                if gs_configs[ranks[i]] not in self.history_container.configurations:
+                if gs_configs[ranks[i]] not in self.history_container.config_index:
                     ans = gs_configs[ranks[i]]
                     break
 
@@ -4,9 +4,8 @@ import numpy as np
 
 from openbox.core.base import build_acq_func, build_optimizer, build_surrogate, Observation
 from openbox.core.generic_advisor import Advisor
-from openbox.utils.config_space.util import convert_configurations_to_array
 from openbox.utils.history_container import MultiStartHistoryContainer
-from openbox.utils.multi_objective import NondominatedPartitioning
+from openbox.utils.multi_objective import IncrementalNondominatedPartitioning, APPROX_MAX_CELLS
 from openbox.utils.trust_region import TurboState
 from openbox.utils.util_funcs import get_types
 
@@ -140,6 +139,11 @@ class MCAdvisor(Advisor):
                                                    constraint_models=self.constraint_models,
                                                    mc_times=self.mc_times, ref_point=self.ref_point)
 
+        self.partitioning = None
+        if self.num_objs > 1 and self.acq_type.startswith('mcehvi'):
+            self.partitioning = IncrementalNondominatedPartitioning(
+                self.num_objs, max_cells=APPROX_MAX_CELLS if self.num_objs >= 4 else None)
+
         self.optimizer = build_optimizer(func_str=self.acq_optimizer_type,
                                          acq_func=self.acquisition_function,
                                          config_space=self.config_space,
@@ -169,7 +173,7 @@ class MCAdvisor(Advisor):
         if self.optimization_strategy == 'random':
             return self.sample_random_configs(1)[0]
 
-        X = convert_configurations_to_array(history_container.configurations)
+        X = history_container.get_config_array()
         Y = history_container.get_transformed_perfs(transform=None)
         cY = history_container.get_transformed_constraint_perfs(transform='bilog')
 
@@ -178,16 +182,12 @@ class MCAdvisor(Advisor):
                 self.logger.warning('No enough successful initial trials! Sample random configuration.')
                 return self.sample_random_configs(1)[0]
 
-            # train surrogate model
+            # train surrogate model and constraint model
             if self.num_objs == 1:
-                self.surrogate_model.train(X, Y)
+                objective_targets = [Y]
             else:  # multi-objectives
-                for i in range(self.num_objs):
-                    self.surrogate_model[i].train(X, Y[:, i])
-
-            # train constraint model
-            for i in range(self.num_constraints):
-                self.constraint_models[i].train(X, cY[:, i])
+                objective_targets = [Y[:, i] for i in range(self.num_objs)]
+            self.train_surrogates(X, objective_targets, [cY[:, i] for i in range(self.num_constraints)])
 
             # update acquisition function
             if self.num_objs == 1:  # MC-EI
@@ -200,8 +200,8 @@ class MCAdvisor(Advisor):
                     self.acquisition_function.update(model=self.surrogate_model,
                                                      constraint_models=self.constraint_models)
                 elif self.acq_type.startswith('mcehvi'):
-                    partitioning = NondominatedPartitioning(self.num_objs, Y)
-                    cell_bounds = partitioning.get_hypercell_bounds(ref_point=self.ref_point)
+                    self.partitioning.update(Y)
+                    cell_bounds = self.partitioning.get_hypercell_bounds(ref_point=self.ref_point)
                     self.acquisition_function.update(model=self.surrogate_model,
                                                      constraint_models=self.constraint_models,
                                                      cell_lower_bounds=cell_bounds[0],
@@ -1,9 +1,9 @@
 # License: MIT
 
-import copy
 import numpy as np
 
 from openbox.utils.config_space.util import convert_configurations_to_array
+from openbox.utils.history_container import ConfigurationIndex
 from openbox.core.advisor import Advisor
 
 
@@ -56,34 +56,28 @@ class MFBatchAdvisor(Advisor):
             return self.sample_random_configs(n_suggestions)
 
         if self.batch_strategy == 'median_imputation':
+            # the batch configs are imputed into the training data only, the history is not copied
             estimated_y = np.median(Y)
-            batch_history_container = copy.deepcopy(self.history_container)
+            incumbent_value = min(self.history_container.get_incumbents()[0][1], estimated_y)
+            batch_config_index = ConfigurationIndex()
             for i in range(n_suggestions):
                 self.surrogate_model.train(X, Y, snapshot=(i == 0))
-                incumbent_value = batch_history_container.get_incumbents()[0][1]
                 self.acquisition_function.update(model=self.surrogate_model, eta=incumbent_value,
-                                                 num_data=len(batch_history_container.data))
+                                                 num_data=len(self.history_container.data) + i)
 
                 challengers = self.optimizer.maximize(
-                    runhistory=batch_history_container,
+                    runhistory=self.history_container,
                     num_points=5000
                 )
 
-                is_repeated_config = True
-                repeated_time = 0
-                curr_batch_config = None
-
-                while is_repeated_config:
-                    try:
-                        curr_batch_config = challengers.challengers[repeated_time]
-                        batch_history_container.add(curr_batch_config, estimated_y)
-                    except ValueError:
-                        is_repeated_config = True
-                        repeated_time += 1
-                    else:
-                        is_repeated_config = False
+                curr_batch_config = challengers.challengers[0]
+                for config in challengers.challengers:
+                    if config not in batch_config_index and config not in self.history_container.data:
+                        curr_batch_config = config
+                        break
 
                 batch_configs_list.append(curr_batch_config)
+                batch_config_index.add(curr_batch_config)
                 X = np.append(X, convert_configurations_to_array([curr_batch_config]), axis=0)
                 Y = np.append(Y, estimated_y)
 
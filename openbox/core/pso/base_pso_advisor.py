@@ -10,6 +10,7 @@ from openbox.utils.logging_utils import get_logger
 from openbox.utils.history_container import HistoryContainer, MOHistoryContainer
 from openbox.utils.constants import MAXINT, SUCCESS
 from openbox.core.base import Observation
+from openbox.utils.multi_objective.pareto import pareto_layers, pareto_frontier
 
 from ConfigSpace import ConfigurationSpace, Configuration
 
@@ -174,44 +175,17 @@ def pareto_best(population: List[Individual],
         return remain[:count]
 
     res = []
-    while count > 0:
-        front = pareto_frontier(remain)
-        assert len(front) > 0
+    for front in pareto_layers(remain):
+        if count <= 0:
+            break
         if selection_strategy == 'random':
             random.shuffle(front)
-        if count >= len(front):
-            res.extend(front)
-            remain = [x for x in remain if x not in front]
-            count -= len(front)
-        else:
-            res.extend(front[:count])
-            count = 0
-
-    return res
-
-
-def pareto_layers(population: List[Individual]) -> List[List[Individual]]:
-    remain = [x for x in population]
-
-    res = []
-    while remain:
-        front = pareto_frontier(remain)
-        assert len(front) > 0
-        res.append(front)
-        remain = [x for x in remain if x not in front]
+        res.extend(front[:count])
+        count -= len(front)
 
     return res
 
 
-# Naive Implementation
-def pareto_frontier(population: List[Individual]) -> List[Individual]:
-    if isinstance(population[0].perf, float):
-        return [x for x in population if
-                not [y for y in population if y.perf < x.perf]]
-    return [x for x in population if
-            not [y for y in population if not [i for i in range(len(x.perf)) if y.perf[i] >= x.perf[i]]]]
-
-
 def constraint_check(constraint, positive_numbers = False) -> bool:
     if constraint is None:
         return True
@@ -1,10 +1,9 @@
 # License: MIT
 
-import copy
 import numpy as np
 
-from openbox.utils.config_space.util import convert_configurations_to_array
 from openbox.utils.constants import MAXINT, SUCCESS
+from openbox.utils.history_container import ConfigurationIndex
 from openbox.core.generic_advisor import Advisor
 from openbox.core.base import Observation
 
@@ -54,14 +53,32 @@ class SyncBatchAdvisor(Advisor):
         if self.batch_strategy is None:
             self.batch_strategy = 'default'
 
-        assert self.batch_strategy in ['default', 'median_imputation', 'local_penalization', 'reoptimization']
+        assert self.batch_strategy in ['default', 'median_imputation', 'kriging_believer',
+                                       'local_penalization', 'reoptimization', 'qei', 'qnei', 'thompson_sampling']
 
         if self.num_objs > 1 or self.num_constraints > 0:
-            # local_penalization only supports single objective with no constraint
-            assert self.batch_strategy in ['default', 'median_imputation', 'reoptimization']
+            # local_penalization, qei, qnei and thompson_sampling only support single objective with no constraint
+            assert self.batch_strategy in ['default', 'median_imputation', 'kriging_believer', 'reoptimization']
 
         if self.batch_strategy == 'local_penalization':
             self.acq_type = 'lpei'
+        elif self.batch_strategy in ['qei', 'qnei']:
+            # the joint acquisition is estimated with posterior function samples
+            self.acq_type = self.batch_strategy
+            self.acq_optimizer_type = 'batchmc'
+            # only these surrogates provide posterior function samples
+            if self.surrogate_type not in ['gp', 'gp_incremental', 'gp_rbf', 'gp_sparse', 'gp_multi', 'gp_multi_tied']:
+                self.surrogate_type = 'gp'
+                self.logger.warning('Surrogate model has changed to Gaussian Process '
+                                    'since %s batch strategy is used.' % self.batch_strategy)
+        elif self.batch_strategy == 'thompson_sampling':
+            self.acq_type = 'ts'
+            self.acq_optimizer_type = 'batchmc'
+            if self.surrogate_type not in ['gp', 'gp_incremental', 'gp_rbf', 'gp_sparse', 'gp_multi', 'gp_multi_tied',
+                                           'prf']:
+                self.surrogate_type = 'gp'
+                self.logger.warning('Surrogate model has changed to Gaussian Process '
+                                    'since thompson_sampling batch strategy is used.')
 
     def get_suggestions(self, batch_size=None, history_container=None):
         if batch_size is None:
@@ -90,29 +107,17 @@ class SyncBatchAdvisor(Advisor):
             self.logger.warning('No enough successful initial trials! Sample random configurations.')
             return self.sample_random_configs(batch_size, history_container)
 
-        X = convert_configurations_to_array(history_container.configurations)
+        X = history_container.get_config_array()
         Y = history_container.get_transformed_perfs(transform=None)
         # cY = history_container.get_transformed_constraint_perfs(transform='bilog')
 
         batch_configs_list = list()
 
-        if self.batch_strategy == 'median_imputation':
-            # set bilog_transform=False to get real cY for estimating median
-            cY = history_container.get_transformed_constraint_perfs(transform=None)
-
-            estimated_y = np.median(Y, axis=0).reshape(-1).tolist()
-            estimated_c = np.median(cY, axis=0).tolist() if self.num_constraints > 0 else None
-            batch_history_container = copy.deepcopy(history_container)
-
-            for batch_i in range(batch_size):
-                # use super class get_suggestion
-                curr_batch_config = super().get_suggestion(batch_history_container)
-
-                # imputation
-                observation = Observation(config=curr_batch_config, objs=estimated_y, constraints=estimated_c,
-                                          trial_state=SUCCESS, elapsed_time=None)
-                batch_history_container.update_observation(observation)
-                batch_configs_list.append(curr_batch_config)
+        if self.batch_strategy in ['median_imputation', 'kriging_believer']:
+            # fantasize the batch configs with the median (constant liar) or the predicted mean
+            fantasy_type = 'constant_liar' if self.batch_strategy == 'median_imputation' else 'kriging_believer'
+            batch_configs_list = self.get_fantasy_suggestions(batch_size, history_container,
+                                                              fantasy_type=fantasy_type)
 
         elif self.batch_strategy == 'local_penalization':
             # local_penalization only supports single objective with no constraint
@@ -136,7 +141,44 @@ class SyncBatchAdvisor(Advisor):
                     )
                     cur_config = challengers.challengers[0]
                 batch_configs_list.append(cur_config)
+        elif self.batch_strategy in ['qei', 'qnei']:
+            # optimize the joint acquisition of the whole batch at once
+            self.alter_model(history_container)
+            num_random = sum(self.rng.random() < self.rand_prob for _ in range(batch_size))
+            if num_random > 0:
+                self.logger.info('Sample %d random configs. rand_prob=%f.' % (num_random, self.rand_prob))
+            if num_random < batch_size:
+                self.train_surrogates(X, [Y], [])
+                incumbent_value = history_container.get_incumbents()[0][1]
+                self.acquisition_function.update(model=self.surrogate_model, eta=incumbent_value,
+                                                 num_data=num_config_evaluated, X_baseline=X)
+                self.optimizer.set_budget(time_budget=self.get_optimizer_time_budget(history_container),
+                                          eval_budget=self.acq_optimizer_eval_budget)
+                batch_configs_list = self.optimizer.maximize_batch(runhistory=history_container,
+                                                                   q=batch_size - num_random,
+                                                                   num_points=5000)
+            batch_configs_list.extend(self.sample_random_configs(batch_size - len(batch_configs_list),
+                                                                 history_container,
+                                                                 excluded_configs=batch_configs_list))
+        elif self.batch_strategy == 'thompson_sampling':
+            # every posterior function sample proposes its minimizer
+            self.alter_model(history_container)
+            num_random = sum(self.rng.random() < self.rand_prob for _ in range(batch_size))
+            if num_random > 0:
+                self.logger.info('Sample %d random configs. rand_prob=%f.' % (num_random, self.rand_prob))
+            if num_random < batch_size:
+                self.train_surrogates(X, [Y], [])
+                self.acquisition_function.update(model=self.surrogate_model, mc_times=batch_size - num_random)
+                self.optimizer.set_budget(time_budget=self.get_optimizer_time_budget(history_container),
+                                          eval_budget=self.acq_optimizer_eval_budget)
+                batch_configs_list = self.optimizer.maximize_thompson(runhistory=history_container,
+                                                                      q=batch_size - num_random,
+                                                                      num_points=5000)
+            batch_configs_list.extend(self.sample_random_configs(batch_size - len(batch_configs_list),
+                                                                 history_container,
+                                                                 excluded_configs=batch_configs_list))
         elif self.batch_strategy == 'reoptimization':
+            batch_config_index = ConfigurationIndex()
             surrogate_trained = False
             for i in range(batch_size):
                 if self.rng.random() < self.rand_prob:
@@ -156,7 +198,7 @@ class SyncBatchAdvisor(Advisor):
                         candidates = challengers.challengers
                     cur_config = None
                     for config in candidates:
-                        if config not in batch_configs_list and config not in history_container.configurations:
+                        if config not in batch_config_index and config not in history_container.config_index:
                             cur_config = config
                             break
                     if cur_config is None:
@@ -165,9 +207,11 @@ class SyncBatchAdvisor(Advisor):
                         cur_config = self.sample_random_configs(1, history_container,
                                                                 excluded_configs=batch_configs_list)[0]
                 batch_configs_list.append(cur_config)
+                batch_config_index.add(cur_config)
         elif self.batch_strategy == 'default':
             # select first N candidates
             candidates = super().get_suggestion(history_container, return_list=True)
+            batch_config_index = ConfigurationIndex()
             idx = 0
             while len(batch_configs_list) < batch_size:
                 if idx >= len(candidates):
@@ -185,11 +229,12 @@ class SyncBatchAdvisor(Advisor):
                     while idx < len(candidates):
                         conf = candidates[idx]
                         idx += 1
-                        if conf not in batch_configs_list and conf not in history_container.configurations:
+                        if conf not in batch_config_index and conf not in history_container.config_index:
                             cur_config = conf
                             break
                 if cur_config is not None:
                     batch_configs_list.append(cur_config)
+                    batch_config_index.add(cur_config)
 
         else:
             raise ValueError('Invalid sampling strategy - %s.' % self.batch_strategy)
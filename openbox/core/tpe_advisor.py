@@ -10,9 +10,8 @@ import scipy.stats as sps
 import statsmodels.api as sm
 
 from openbox.utils.util_funcs import check_random_state
-from openbox.utils.history_container import HistoryContainer
+from openbox.utils.history_container import HistoryContainer, ConfigurationIndex
 from openbox.core.base import Observation
-from openbox.utils.config_space.util import convert_configurations_to_array
 
 
 class TPE_Advisor:
@@ -212,7 +211,7 @@ class TPE_Advisor:
                 num_config_successful, self.min_points_in_model + 1))
             return
 
-        train_configs = convert_configurations_to_array(history_container.configurations)
+        train_configs = history_container.get_config_array()
         train_losses = history_container.get_transformed_perfs(transform=None)
 
         n_good = max(self.min_points_in_model, (self.top_n_percent * train_configs.shape[0]) // 100)
@@ -271,13 +270,15 @@ class TPE_Advisor:
             history_container = self.history_container
 
         configs = list()
+        sampled_index = ConfigurationIndex()
         sample_cnt = 0
         max_sample_cnt = 1000
         while len(configs) < num_configs:
             config = self.config_space.sample_configuration()
             sample_cnt += 1
-            if config not in (history_container.configurations + configs):
+            if config not in history_container.config_index and config not in sampled_index:
                 configs.append(config)
+                sampled_index.add(config)
                 sample_cnt = 0
                 continue
             if sample_cnt >= max_sample_cnt:
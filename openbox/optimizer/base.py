@@ -47,6 +47,11 @@ class BOBase(object, metaclass=abc.ABCMeta):
     def iterate(self):
         raise NotImplementedError()
 
+    def close(self):
+        # release the resources of the advisor (e.g., the pool of the surrogate training)
+        if hasattr(self.config_advisor, 'close'):
+            self.config_advisor.close()
+
     def get_history(self) -> HistoryContainer:
         assert self.config_advisor is not None
         return self.config_advisor.history_container
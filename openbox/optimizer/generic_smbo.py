@@ -204,14 +204,17 @@ class SMBO(BOBase):
             raise ValueError('Invalid advisor type!')
 
     def run(self):
-        for _ in tqdm(range(self.iteration_id, self.max_iterations)):
-            if self.budget_left < 0:
-                self.logger.info('Time %f elapsed!' % self.runtime_limit)
-                break
-            start_time = time.time()
-            self.iterate(budget_left=self.budget_left)
-            runtime = time.time() - start_time
-            self.budget_left -= runtime
+        try:
+            for _ in tqdm(range(self.iteration_id, self.max_iterations)):
+                if self.budget_left < 0:
+                    self.logger.info('Time %f elapsed!' % self.runtime_limit)
+                    break
+                start_time = time.time()
+                self.iterate(budget_left=self.budget_left)
+                runtime = time.time() - start_time
+                self.budget_left -= runtime
+        finally:
+            self.close()
         return self.get_history()
 
     def iterate(self, budget_left=None):
@@ -223,7 +226,7 @@ class SMBO(BOBase):
         _time_limit_per_trial = math.ceil(min(self.time_limit_per_trial, _budget_left))
 
         # only evaluate non duplicate configuration
-        if config not in self.config_advisor.history_container.configurations:
+        if config not in self.config_advisor.history_container.config_index:
             start_time = time.time()
             try:
                 # evaluate configuration on objective_function within time_limit_per_trial
@@ -262,7 +265,7 @@ class SMBO(BOBase):
         else:
             self.logger.info('This configuration has been evaluated! Skip it: %s' % config)
             history = self.get_history()
-            config_idx = history.configurations.index(config)
+            config_idx = history.config_index.index(config)
             trial_state = history.trial_states[config_idx]
             objs = history.perfs[config_idx]
             constraints = history.constraint_perfs[config_idx] if self.num_constraints > 0 else None
@@ -230,8 +230,11 @@ class pSMBO(BOBase):
                 batch_id += 1
 
     def run(self):
-        if self.parallel_strategy == 'async':
-            self.async_run()
-        else:
-            self.sync_run()
+        try:
+            if self.parallel_strategy == 'async':
+                self.async_run()
+            else:
+                self.sync_run()
+        finally:
+            self.close()
         return self.get_history()
@@ -45,6 +45,13 @@ class BaseGP(AbstractModel):
     def _get_gp(self) -> GaussianProcessRegressor:
         raise NotImplementedError()
 
+    def __getstate__(self):
+        # Executors can be neither pickled (e.g. to run on a process pool) nor deep-copied
+        state = self.__dict__.copy()
+        if state.get('executor') is not None:
+            state['executor'] = None
+        return state
+
     def _normalize_y(self, y: np.ndarray) -> np.ndarray:
         """Normalize data to zero mean unit standard deviation.
 
@@ -40,6 +40,11 @@ class AbstractModel(object):
         If set, contains a list with feature types (cat,const) of input vector
     """
 
+    # How independent models are trained concurrently (see openbox.core.base.train_surrogates):
+    # 'threads' if training mostly runs in native code that releases the GIL, 'processes' if it holds
+    # the GIL (the model is pickled to and from the worker), None if it can only be trained in the caller.
+    train_backend = 'processes'
+
     def __init__(self,
                  types: np.ndarray,
                  bounds: typing.List[typing.Tuple[float, float]],
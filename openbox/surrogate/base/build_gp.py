@@ -4,13 +4,16 @@
 import numpy as np
 from openbox.surrogate.base.gp import GaussianProcess
 from openbox.surrogate.base.gp_mcmc import GaussianProcessMCMC
+from openbox.surrogate.base.gp_sparse import SparseGaussianProcess
+from openbox.surrogate.base.gp_multi_output import MultiOutputGaussianProcess
 from openbox.surrogate.base.gp_base_prior import HorseshoePrior, LognormalPrior
 from openbox.surrogate.base.gp_kernels import ConstantKernel, Matern, HammingKernel, WhiteKernel, RBF
 
 
-def create_gp_model(model_type, config_space, types, bounds, rng):
+def create_gp_model(model_type, config_space, types, bounds, rng, n_outputs=1):
     """
         Construct the Gaussian process surrogate that is capable of dealing with categorical hyperparameters.
+        n_outputs is the number of outputs of the multi-output GPs ('gp_multi' and 'gp_multi_tied').
     """
     cov_amp = ConstantKernel(
         2.0,
@@ -70,7 +73,7 @@ def create_gp_model(model_type, config_space, types, bounds, rng):
             normalize_y=True,
             seed=rng.randint(low=0, high=10000),
         )
-    elif model_type == 'gp':
+    elif model_type in ['gp', 'gp_incremental']:
         model = GaussianProcess(
             configspace=config_space,
             types=types,
@@ -78,6 +81,27 @@ def create_gp_model(model_type, config_space, types, bounds, rng):
             kernel=kernel,
             normalize_y=True,
             seed=rng.randint(low=0, high=10000),
+            incremental=(model_type == 'gp_incremental'),
+        )
+    elif model_type == 'gp_sparse':
+        model = SparseGaussianProcess(
+            configspace=config_space,
+            types=types,
+            bounds=bounds,
+            kernel=kernel,
+            normalize_y=True,
+            seed=rng.randint(low=0, high=10000),
+        )
+    elif model_type in ['gp_multi', 'gp_multi_tied']:
+        model = MultiOutputGaussianProcess(
+            configspace=config_space,
+            types=types,
+            bounds=bounds,
+            kernel=kernel,
+            n_outputs=n_outputs,
+            shared_hypers='all' if model_type == 'gp_multi_tied' else 'lengthscales',
+            normalize_y=True,
+            seed=rng.randint(low=0, high=10000),
         )
     elif model_type == 'gp_rbf':
         rbf_kernel = RBF(
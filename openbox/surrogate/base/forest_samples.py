@@ -0,0 +1,34 @@
+# License: MIT
+
+import typing
+
+import numpy as np
+
+
+class TreeFunctionSamples(object):
+    """
+    Posterior function samples of a random forest.
+
+    Every sample is the prediction of one tree of the forest, drawn uniformly
+    with replacement, so F functions are evaluated on N points by a single
+    pass of the points through the trees.
+
+    Parameters
+    ----------
+    predict_per_tree : callable
+        Returns the predictions of all trees at the N points, shape (n_trees, N).
+    tree_ids : np.ndarray (F,)
+        Tree of every function sample.
+    """
+
+    def __init__(self, predict_per_tree: typing.Callable[[np.ndarray], np.ndarray], tree_ids: np.ndarray):
+        self.predict_per_tree = predict_per_tree
+        self.tree_ids = tree_ids
+
+    @property
+    def n_funcs(self) -> int:
+        return self.tree_ids.shape[0]
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        """Returns the values of the F functions at the N points X, shape (N, F)."""
+        return self.predict_per_tree(X)[self.tree_ids].T
@@ -1,15 +1,21 @@
 # License: 3-clause BSD
 # Copyright (c) 2016-2018, Ml4AAD Group (http://www.ml4aad.org/)
 
+from concurrent.futures import Executor
+import copy
 import logging
 import typing
 
 import numpy as np
 from scipy import optimize
+import sklearn.gaussian_process.kernels
+from scipy.linalg import cholesky, cho_solve, solve_triangular
 
 from ConfigSpace import ConfigurationSpace
 from openbox.surrogate.base.base_gp import BaseGP
 from openbox.surrogate.base.gp_base_prior import Prior
+from openbox.surrogate.base.gp_pathwise import split_stationary_kernel, split_sampling_kernel, \
+    RandomFourierFeatures, PathwiseFunctionSamples
 from openbox.utils.constants import VERY_SMALL_NUMBER
 
 from skopt.learning.gaussian_process.kernels import Kernel
@@ -60,8 +66,36 @@ class GaussianProcess(BaseGP):
     pca_components : float
         Number of components to keep when using PCA to reduce dimensionality of instance features. Requires to
         set n_feats (> pca_dims).
+    incremental : bool
+        If True, observations appended since the last training are added to the existing Cholesky factor with a
+        rank-k update and the hyperparameters are kept fixed, so that most training calls cost O(N^2).
+    reoptimize_interval : int
+        Minimum number of new observations after which the full multi-restart hyperparameter optimization is
+        re-run in incremental mode.
+    reoptimize_growth : float
+        In incremental mode, the full optimization is also delayed until the number of observations has grown by
+        this fraction since the last full optimization, so that its amortized cost stays low for large N.
+    ll_drift_threshold : float
+        Maximum drop of the per-observation log marginal likelihood (compared to the last optimization) tolerated
+        in incremental mode. Larger drops trigger a single optimization run warm-started from the current
+        hyperparameters.
+    executor : concurrent.futures.Executor, optional
+        If given, the restarts of the hyperparameter optimization are submitted to this thread or process pool.
+        Start points are sampled before submission and results are reduced in submission order, so the result
+        does not depend on the executor.
+    abandon_after : int, optional
+        If given, every restart first runs at most this many L-BFGS-B iterations. Restarts whose negative log
+        likelihood then trails the best one by more than ``abandon_threshold`` are dropped, and the others are
+        continued until convergence.
+    abandon_threshold : float
+        Tolerated gap (in nats) to the best restart for early abandoning.
     """
 
+    # Number of random Fourier features of the functions drawn by draw_function_samples()
+    n_fourier_features = 1024
+    # sample_functions() draws exact joint samples for at most this many test points
+    max_exact_sample_size = 200
+
     def __init__(
             self,
             configspace: ConfigurationSpace,
@@ -73,7 +107,14 @@ class GaussianProcess(BaseGP):
             n_opt_restarts: int = 10,
             instance_features: typing.Optional[np.ndarray] = None,
             pca_components: typing.Optional[int] = None,
-            seed: int = 42
+            seed: int = 42,
+            incremental: bool = False,
+            reoptimize_interval: int = 10,
+            reoptimize_growth: float = 0.1,
+            ll_drift_threshold: float = 0.1,
+            executor: typing.Optional[Executor] = None,
+            abandon_after: typing.Optional[int] = None,
+            abandon_threshold: float = 10.0,
     ):
         super().__init__(
             configspace=configspace,
@@ -88,10 +129,22 @@ class GaussianProcess(BaseGP):
         self.alpha = alpha  # Fix RBF kernel error
         self.normalize_y = normalize_y
         self.n_opt_restarts = n_opt_restarts
+        self.incremental = incremental
+        self.reoptimize_interval = reoptimize_interval
+        self.reoptimize_growth = reoptimize_growth
+        self.ll_drift_threshold = ll_drift_threshold
+        self.executor = executor
+        self.abandon_after = abandon_after
+        self.abandon_threshold = abandon_threshold
 
         self.hypers = np.empty((0,))
         self.is_trained = False
         self._n_ll_evals = 0
+        # number of observations and per-observation log likelihood at the last hyperparameter optimization
+        self._n_last_optimize = 0
+        self._ll_last_optimize = -np.inf
+        # fitted state before the first fantasy, see fantasize()
+        self._fantasy_state = None
 
         self._set_has_conditions()
 
@@ -112,7 +165,11 @@ class GaussianProcess(BaseGP):
         do_optimize: boolean
             If set to true the hyperparameters are optimized otherwise
             the default hyperparameters of the kernel are used.
+            In incremental mode, the optimization is only re-run on schedule
+            or when the log likelihood drifts (see ``reoptimize_interval``,
+            ``reoptimize_growth`` and ``ll_drift_threshold``).
         """
+        self.clear_fantasies()
 
         X = self._impute_inactive(X)
         if self.normalize_y:
@@ -124,6 +181,26 @@ class GaussianProcess(BaseGP):
         if self.n_objectives_ == 1:
             y = y.flatten()
 
+        if self.incremental and do_optimize and self._update_incrementally(X, y):
+            n_restarts = None
+            n_next_optimize = max(self._n_last_optimize + self.reoptimize_interval,
+                                  self._n_last_optimize * (1 + self.reoptimize_growth))
+            if X.shape[0] < n_next_optimize:
+                drift = self._ll_last_optimize - self._mean_log_likelihood()
+                if drift <= self.ll_drift_threshold:
+                    return self
+                # Refine the current hyperparameters with a single warm-started run
+                logger.debug('Log likelihood drifted by %f. Re-optimize GP hyperparameters.' % drift)
+                n_restarts = 0
+            self._all_priors = self._get_all_priors(add_bound_priors=False)
+            self.hypers = self._optimize(n_restarts=n_restarts)
+            self.gp.kernel.theta = self.hypers
+            self.gp.fit(X, y)
+            self._ll_last_optimize = self._mean_log_likelihood()
+            if n_restarts is None:
+                self._n_last_optimize = X.shape[0]
+            return self
+
         n_tries = 10
         for i in range(n_tries):
             try:
@@ -144,12 +221,131 @@ class GaussianProcess(BaseGP):
             self.hypers = self._optimize()
             self.gp.kernel.theta = self.hypers
             self.gp.fit(X, y)
+            self._n_last_optimize = X.shape[0]
+            self._ll_last_optimize = self._mean_log_likelihood()
         else:
             self.hypers = self.gp.kernel.theta
 
         self.is_trained = True
         return self
 
+    def _update_incrementally(self, X: np.ndarray, y: np.ndarray) -> bool:
+        """
+        Appends the new observations to the fitted GP without changing the
+        hyperparameters. The Cholesky factor L and the inverse covariance
+        are extended by a rank-k block update in O(N^2 k) instead of being
+        recomputed in O(N^3).
+
+        Parameters
+        ----------
+        X: np.ndarray (N, D)
+            Input data points. The points used in the last training must be
+            the first rows of X.
+        y: np.ndarray (N,)
+            The corresponding (normalized) target values. All targets are
+            used, so earlier targets may have changed.
+
+        Returns
+        -------
+        bool
+            Whether the update succeeded. If False, the GP is unchanged and
+            should be trained from scratch.
+        """
+        gp = self.gp
+        if not self.is_trained or not hasattr(gp, 'L_') or not np.isscalar(gp.alpha):
+            return False
+        X_old = gp.X_train_
+        n_old = X_old.shape[0]
+        if X.shape[0] <= n_old or X.shape[1] != X_old.shape[1] or y.ndim != gp.y_train_.ndim \
+                or not np.array_equal(X[:n_old], X_old):
+            return False
+
+        X_new = X[n_old:]
+        k_cross = gp.kernel_(X_old, X_new)
+        k_new = gp.kernel_(X_new)
+        k_new[np.diag_indices_from(k_new)] += gp.alpha
+        # L = [[L_old, 0], [B^T, L_schur]] with B = L_old^-1 k_cross
+        B = solve_triangular(gp.L_, k_cross, lower=True, check_finite=False)
+        try:
+            L_schur = cholesky(k_new - B.T @ B, lower=True, check_finite=False)
+        except np.linalg.LinAlgError:
+            return False
+
+        n_new = X_new.shape[0]
+        L = np.zeros((n_old + n_new, n_old + n_new))
+        L[:n_old, :n_old] = gp.L_
+        L[n_old:, :n_old] = B.T
+        L[n_old:, n_old:] = L_schur
+
+        # Block inverse with the Schur complement S = k_new - k_cross^T K_old^-1 k_cross
+        K_inv_old = gp.K_inv_
+        C = K_inv_old @ k_cross
+        S_inv = cho_solve((L_schur, True), np.eye(n_new), check_finite=False)
+        CS = C @ S_inv
+        K_inv = np.empty_like(L)
+        K_inv[:n_old, :n_old] = K_inv_old + CS @ C.T
+        K_inv[:n_old, n_old:] = -CS
+        K_inv[n_old:, :n_old] = -CS.T
+        K_inv[n_old:, n_old:] = S_inv
+
+        gp.X_train_ = np.copy(X)
+        gp.y_train_ = np.copy(y)
+        gp.L_ = L
+        gp.K_inv_ = K_inv
+        gp.alpha_ = cho_solve((L, True), gp.y_train_, check_finite=False)
+        log_likelihood = -0.5 * np.einsum('i...,i...->...', gp.y_train_, gp.alpha_) \
+            - np.log(np.diag(L)).sum() - 0.5 * L.shape[0] * np.log(2 * np.pi)
+        gp.log_marginal_likelihood_value_ = np.sum(log_likelihood)
+        self.is_trained = True
+        return True
+
+    def fantasize(self, X: np.ndarray, y: np.ndarray) -> 'GaussianProcess':
+        """
+        Conditions the posterior on pending points with fantasy target values,
+        e.g. the predicted mean (kriging believer) or a constant (constant liar).
+        The hyperparameters and the target normalization are kept, so the
+        Cholesky factor is extended by a rank-k update in O(N^2 k).
+
+        The fantasies are removed by clear_fantasies() or the next training.
+
+        Parameters
+        ----------
+        X: np.ndarray (k, D)
+            Pending points.
+        y: np.ndarray (k,)
+            Fantasy target values of the pending points.
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        gp = self.gp
+        if self._fantasy_state is None:
+            self._fantasy_state = (gp.X_train_, gp.y_train_, gp.L_, gp.K_inv_, gp.alpha_,
+                                   gp.log_marginal_likelihood_value_)
+        X = self._impute_inactive(X)
+        y = np.asarray(y, dtype=np.float64).reshape(-1)
+        if self.normalize_y:
+            y = (y - self.mean_y_) / self.std_y_
+        X_all = np.vstack((gp.X_train_, X))
+        y_all = np.concatenate((gp.y_train_, y))
+        if not self._update_incrementally(X_all, y_all):
+            # e.g. a pending point duplicates a training point of a noiseless GP
+            gp.kernel.theta = self.hypers
+            gp.fit(X_all, y_all)
+        return self
+
+    def clear_fantasies(self) -> None:
+        """Restores the posterior of the last training, see fantasize()."""
+        if self._fantasy_state is None:
+            return
+        gp = self.gp
+        gp.X_train_, gp.y_train_, gp.L_, gp.K_inv_, gp.alpha_, gp.log_marginal_likelihood_value_ = \
+            self._fantasy_state
+        self._fantasy_state = None
+
+    def _mean_log_likelihood(self) -> float:
+        return self.gp.log_marginal_likelihood_value_ / self.gp.X_train_.shape[0]
+
     def _get_gp(self, alpha=0) -> GaussianProcessRegressor:
         return GaussianProcessRegressor(
             kernel=self.kernel,
@@ -179,39 +375,32 @@ class GaussianProcess(BaseGP):
             lnlikelihood + prior
         """
         self._n_ll_evals += 1
+        return _negative_log_likelihood(theta, self.gp, self._all_priors)
 
-        try:
-            lml, grad = self.gp.log_marginal_likelihood(theta, eval_gradient=True)
-        except np.linalg.LinAlgError:
-            return 1e25, np.zeros(theta.shape)
-
-        for dim, priors in enumerate(self._all_priors):
-            for prior in priors:
-                lml += prior.lnprob(theta[dim])
-                grad[dim] += prior.gradient(theta[dim])
-
-        # We add a minus here because scipy is minimizing
-        if not np.isfinite(lml).all() or not np.all(np.isfinite(grad)):
-            return 1e25, np.zeros(theta.shape)
-        else:
-            return -lml, -grad
-
-    def _optimize(self) -> np.ndarray:
+    def _optimize(self, n_restarts: typing.Optional[int] = None) -> np.ndarray:
         """
         Optimizes the marginal log likelihood and returns the best found
         hyperparameter configuration theta.
 
+        Parameters
+        ----------
+        n_restarts : int, optional
+            Number of random restarts in addition to the run started from the
+            current hyperparameters. Defaults to ``n_opt_restarts``.
+
         Returns
         -------
         theta : np.ndarray(H)
             Hyperparameter vector that maximizes the marginal log likelihood
         """
 
+        if n_restarts is None:
+            n_restarts = self.n_opt_restarts
         log_bounds = [(b[0], b[1]) for b in self.gp.kernel.bounds]
 
         # Start optimization from the previous hyperparameter configuration
         p0 = [self.gp.kernel.theta]
-        if self.n_opt_restarts > 0:
+        if n_restarts > 0:
             dim_samples = []
 
             prior = None  # type: typing.Optional[typing.Union[typing.List[Prior], Prior]]
@@ -229,24 +418,55 @@ class GaussianProcess(BaseGP):
                         sample = self.rng.uniform(
                             low=hp_bound[0],
                             high=hp_bound[1],
-                            size=(self.n_opt_restarts,),
+                            size=(n_restarts,),
                         )
                     except OverflowError:
                         raise ValueError('OverflowError while sampling from (%f, %f)' % (hp_bound[0], hp_bound[1]))
                     dim_samples.append(sample.flatten())
                 else:
-                    dim_samples.append(prior.sample_from_prior(self.n_opt_restarts).flatten())
+                    dim_samples.append(prior.sample_from_prior(n_restarts).flatten())
             p0 += list(np.vstack(dim_samples).transpose())
 
+        if self.abandon_after is None:
+            results = self._run_restarts(p0, log_bounds)
+        else:
+            results = self._run_restarts(p0, log_bounds, maxiter=self.abandon_after)
+            f_best = min(f_opt for _, f_opt, _ in results)
+            unfinished = [i for i, (_, f_opt, converged) in enumerate(results)
+                          if not converged and f_opt <= f_best + self.abandon_threshold]
+            logger.debug('Continue %d of %d GP hyperparameter optimization restarts.' % (len(unfinished), len(p0)))
+            continued = self._run_restarts([results[i][0] for i in unfinished], log_bounds)
+            for i, result in zip(unfinished, continued):
+                results[i] = result
+
         theta_star = None
         f_opt_star = np.inf
-        for i, start_point in enumerate(p0):
-            theta, f_opt, _ = optimize.fmin_l_bfgs_b(self._nll, start_point, bounds=log_bounds)
+        for theta, f_opt, _ in results:
             if f_opt < f_opt_star:
                 f_opt_star = f_opt
                 theta_star = theta
         return theta_star
 
+    def _run_restarts(
+            self,
+            start_points: typing.List[np.ndarray],
+            bounds: typing.List[typing.Tuple[float, float]],
+            maxiter: int = 15000,
+    ) -> typing.List[typing.Tuple[np.ndarray, float, bool]]:
+        """
+        Runs L-BFGS-B from each start point, sequentially or on the executor.
+        Returns (theta, negative log likelihood, converged) in the order of the start points.
+        """
+        if self.executor is None:
+            results = [_minimize_nll(start_point, self.gp, self._all_priors, bounds, maxiter)
+                       for start_point in start_points]
+        else:
+            futures = [self.executor.submit(_minimize_nll, start_point, self.gp, self._all_priors, bounds, maxiter)
+                       for start_point in start_points]
+            results = [future.result() for future in futures]
+        self._n_ll_evals += sum(n_evals for *_, n_evals in results)
+        return [(theta, f_opt, converged) for theta, f_opt, converged, _ in results]
+
     def _predict(self, X_test: np.ndarray,
                  cov_return_type: typing.Optional[str] = 'diagonal_cov') \
             -> typing.Tuple[np.ndarray, typing.Optional[np.ndarray]]:
@@ -304,6 +524,67 @@ class GaussianProcess(BaseGP):
 
         return mu, var
 
+    def supports_gradient(self) -> bool:
+        """Whether predict_with_gradient() is available for the trained model."""
+        if not self.is_trained or (self.instance_features is not None and len(self.instance_features) > 0):
+            return False
+        split = split_stationary_kernel(self._posterior_kernel())
+        return split is not None and _supports_input_gradient(split[1])
+
+    def predict_with_gradient(self, X: np.ndarray) \
+            -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predicts means and variances like predict_marginalized_over_instances()
+        together with their gradients with respect to X.
+        Requires supports_gradient().
+
+        Parameters
+        ----------
+        X: np.ndarray (N, D)
+            Input test points
+
+        Returns
+        ----------
+        means : np.ndarray (N, 1)
+        vars : np.ndarray (N, 1)
+        mean gradients : np.ndarray (N, D)
+        variance gradients : np.ndarray (N, D)
+        """
+        if not self.supports_gradient():
+            raise NotImplementedError('Gradients are not supported for kernel %s.' % self._posterior_kernel())
+
+        mu, var, mu_grad, var_grad = self._predict_with_gradient(self._impute_inactive(X))
+        clipped = var < VERY_SMALL_NUMBER
+        var = np.clip(var, VERY_SMALL_NUMBER, np.inf)
+        if self.normalize_y:
+            mu, var = self._untransform_y(mu, var)
+            mu_grad = mu_grad * self.std_y_
+            var_grad = var_grad * self.std_y_ ** 2
+        clipped |= var < self.var_threshold
+        var = np.where(clipped, np.maximum(var, self.var_threshold), var)
+        var_grad[clipped] = 0
+        return mu.reshape(-1, 1), var.reshape(-1, 1), mu_grad, var_grad
+
+    def _posterior_kernel(self) -> Kernel:
+        return self.gp.kernel_
+
+    def _predict_with_gradient(self, X: np.ndarray) \
+            -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Normalized posterior mean and variance (N,) and their gradients (N, D) at imputed points X."""
+        amplitude, kernel, noise = split_stationary_kernel(self.gp.kernel_)
+        K_trans, K_trans_grad = _stationary_kernel_with_gradient(kernel, X, self.gp.X_train_)
+        K_trans *= amplitude
+        K_trans_grad *= amplitude
+
+        alpha = self.gp.alpha_.reshape(-1)
+        mu = K_trans @ alpha
+        mu_grad = np.einsum('inj,n->ij', K_trans_grad, alpha)
+        # var = k(x, x) - k(x, X) K^-1 k(X, x), where k(x, x) does not depend on x
+        V = cho_solve((self.gp.L_, True), K_trans.T, check_finite=False)
+        var = amplitude + noise - np.einsum('in,ni->i', K_trans, V)
+        var_grad = -2 * np.einsum('inj,ni->ij', K_trans_grad, V)
+        return mu, var, mu_grad, var_grad
+
     def sample_functions(self, X_test: np.ndarray, n_funcs: int = 1) -> np.ndarray:
         """
         Samples F function values from the current posterior at the N
@@ -318,13 +599,22 @@ class GaussianProcess(BaseGP):
 
         Returns
         ----------
-        function_samples: np.array(F, N)
+        function_samples: np.array(N, F)
             The F function values drawn at the N test points.
+
+        Exact joint samples cost O(N^3). For more than ``max_exact_sample_size``
+        test points, the values of F functions drawn with draw_function_samples()
+        are returned instead if the kernel supports it.
         """
 
         if not self.is_trained:
             raise Exception('Model has to be trained first!')
 
+        if X_test.shape[0] > self.max_exact_sample_size:
+            function_samples = self.draw_function_samples(n_funcs)
+            if function_samples is not None:
+                return function_samples(X_test)
+
         X_test = self._impute_inactive(X_test)
         funcs = self.gp.sample_y(X_test, n_samples=n_funcs, random_state=self.rng)
 
@@ -335,3 +625,132 @@ class GaussianProcess(BaseGP):
             return funcs[None, :]
         else:
             return funcs
+
+    def draw_function_samples(self, n_funcs: int = 1) -> typing.Optional[PathwiseFunctionSamples]:
+        """
+        Draws F functions from the current posterior of the noise-free objective.
+        The functions are evaluated on any number of points at linear cost,
+        see PathwiseFunctionSamples.
+
+        Parameters
+        ----------
+        n_funcs: int
+            Number of functions F.
+
+        Returns
+        ----------
+        PathwiseFunctionSamples or None
+            Callable mapping X_test (N, D) to function values (N, F),
+            or None if the kernel is not supported.
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        split = split_sampling_kernel(self.gp.kernel_)
+        if split is None:
+            return None
+        amplitude, kernel, noise = split
+
+        X_train = self.gp.X_train_
+        features = RandomFourierFeatures(kernel, amplitude, X_train.shape[1], self.n_fourier_features, self.rng)
+        weights = self.rng.standard_normal((self.n_fourier_features, n_funcs))
+        # Condition the prior samples on the (noisy) training targets
+        prior_train = features(X_train) @ weights \
+            + np.sqrt(noise + self.alpha) * self.rng.standard_normal((X_train.shape[0], n_funcs))
+        update_weights = cho_solve((self.gp.L_, True), self.gp.y_train_.reshape(-1, 1) - prior_train,
+                                   check_finite=False)
+        return PathwiseFunctionSamples(
+            features, weights, kernel, amplitude, X_train, update_weights,
+            input_transform=self._impute_inactive,
+            output_transform=self._untransform_y if self.normalize_y else None,
+        )
+
+
+def _supports_input_gradient(kernel: Kernel) -> bool:
+    # Matern is a subclass of RBF in scikit-learn
+    return not isinstance(kernel, sklearn.gaussian_process.kernels.Matern) or kernel.nu in (0.5, 1.5, 2.5, np.inf)
+
+
+def _stationary_kernel_with_gradient(kernel: Kernel, X: np.ndarray, Y: np.ndarray) \
+        -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns k(X, Y) (N, M) of a Matern or RBF kernel and its gradient with respect to X (N, M, D).
+    The gradient is zero in the dimensions the kernel does not operate on.
+    """
+    operate_on = getattr(kernel, 'operate_on', None)
+    dims = np.arange(X.shape[1]) if operate_on is None else np.asarray(operate_on)
+    length_scale = np.broadcast_to(np.asarray(kernel.length_scale, dtype=np.float64), (len(dims),))
+
+    # (x - y) / l^2 per dimension and the scaled distance r
+    diff = (X[:, None, dims] - Y[None, :, dims]) / length_scale
+    r = np.sqrt(np.sum(diff ** 2, axis=-1))
+    diff /= length_scale
+
+    nu = getattr(kernel, 'nu', np.inf)
+    # K and dK/dr / r, so that dK/dx = dK/dr / r * (x - y) / l^2
+    if nu == 0.5:
+        K = np.exp(-r)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dK = np.where(r > 0, -K / r, 0.0)
+    elif nu == 1.5:
+        tmp = np.exp(-np.sqrt(3) * r)
+        K = (1. + np.sqrt(3) * r) * tmp
+        dK = -3 * tmp
+    elif nu == 2.5:
+        tmp = np.exp(-np.sqrt(5) * r)
+        K = (1. + np.sqrt(5) * r + 5. / 3. * r ** 2) * tmp
+        dK = -5. / 3. * (1. + np.sqrt(5) * r) * tmp
+    elif np.isinf(nu):
+        K = np.exp(-0.5 * r ** 2)
+        dK = -K
+    else:
+        raise ValueError(nu)
+
+    K_grad = np.zeros(K.shape + (X.shape[1],))
+    K_grad[:, :, dims] = dK[:, :, None] * diff
+    return K, K_grad
+
+
+def _copy_with_own_kernel(gp: GaussianProcessRegressor) -> GaussianProcessRegressor:
+    # The kernels of gp_kernels change their theta in place in clone_with_theta(), so concurrent
+    # likelihood evaluations must not share the fitted kernel. The training data are shared.
+    gp = copy.copy(gp)
+    gp.kernel_ = copy.deepcopy(gp.kernel_)
+    return gp
+
+
+def _negative_log_likelihood(
+        theta: np.ndarray,
+        gp: GaussianProcessRegressor,
+        all_priors: typing.List[typing.List[Prior]],
+) -> typing.Tuple[float, np.ndarray]:
+    try:
+        lml, grad = gp.log_marginal_likelihood(theta, eval_gradient=True)
+    except np.linalg.LinAlgError:
+        return 1e25, np.zeros(theta.shape)
+
+    for dim, priors in enumerate(all_priors):
+        for prior in priors:
+            lml += prior.lnprob(theta[dim])
+            grad[dim] += prior.gradient(theta[dim])
+
+    # We add a minus here because scipy is minimizing
+    if not np.isfinite(lml).all() or not np.all(np.isfinite(grad)):
+        return 1e25, np.zeros(theta.shape)
+    else:
+        return -lml, -grad
+
+
+def _minimize_nll(
+        start_point: np.ndarray,
+        gp: GaussianProcessRegressor,
+        all_priors: typing.List[typing.List[Prior]],
+        bounds: typing.List[typing.Tuple[float, float]],
+        maxiter: int,
+) -> typing.Tuple[np.ndarray, float, bool, int]:
+    # Module-level function so that restarts can be submitted to a process pool
+    gp = _copy_with_own_kernel(gp)
+    theta, f_opt, info = optimize.fmin_l_bfgs_b(
+        _negative_log_likelihood, start_point, args=(gp, all_priors), bounds=bounds, maxiter=maxiter,
+    )
+    return theta, f_opt, info['warnflag'] == 0, info['funcalls']
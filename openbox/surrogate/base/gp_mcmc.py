@@ -1,6 +1,7 @@
 # License: 3-clause BSD
 # Copyright (c) 2016-2018, Ml4AAD Group (http://www.ml4aad.org/)
 
+from concurrent.futures import Executor
 from copy import deepcopy
 import logging
 import typing
@@ -8,11 +9,13 @@ import warnings
 
 import emcee
 import numpy as np
+from scipy.linalg import cholesky, cho_solve, solve_triangular
 
 from ConfigSpace import ConfigurationSpace
 from openbox.surrogate.base.base_gp import BaseGP
-from openbox.surrogate.base.gp import GaussianProcess
+from openbox.surrogate.base.gp import _copy_with_own_kernel
 from openbox.surrogate.base.gp_base_prior import Prior
+from openbox.utils.constants import VERY_SMALL_NUMBER
 
 from skopt.learning.gaussian_process.kernels import Kernel
 from skopt.learning.gaussian_process import GaussianProcessRegressor
@@ -36,7 +39,8 @@ class GaussianProcessMCMC(BaseGP):
             average_samples: bool = False,
             instance_features: typing.Optional[np.ndarray] = None,
             pca_components: typing.Optional[int] = None,
-            seed: int = 42
+            seed: int = 42,
+            executor: typing.Optional[Executor] = None,
     ):
         """
         Gaussian process surrogate.
@@ -86,6 +90,10 @@ class GaussianProcessMCMC(BaseGP):
             Number of components to keep when using PCA to reduce
             dimensionality of instance features. Requires to
             set n_feats (> pca_dims).
+        executor : concurrent.futures.Executor, optional
+            If given, the likelihoods of the emcee walkers are evaluated and
+            the per-sample Cholesky factors are computed concurrently on this
+            thread or process pool. The results do not depend on the executor.
         """
         super().__init__(
             configspace=configspace,
@@ -101,10 +109,16 @@ class GaussianProcessMCMC(BaseGP):
         self.chain_length = chain_length
         self.burned = False
         self.burnin_steps = burnin_steps
-        self.models = []  # type: typing.List[GaussianProcess]
+        # One fitted kernel per hyperparameter sample. The factorizations of all samples are stacked
+        # (L_inv_: [M, N, N], alpha_: [M, N]) so that predictions are batched over the samples.
+        self.kernels = []  # type: typing.List[Kernel]
+        self.X_train_ = None
+        self.L_inv_ = None
+        self.alpha_ = None
         self.normalize_y = normalize_y
         self.mcmc_sampler = mcmc_sampler
         self.average_samples = average_samples
+        self.executor = executor
 
         self.is_trained = False
 
@@ -135,8 +149,7 @@ class GaussianProcessMCMC(BaseGP):
             # Scikit-learn uses a different "normalization" than we use in SMAC3. Scikit-learn normalizes the data to
             # have zero mean, while we normalize it to have zero mean unit variance. To make sure the scikit-learn GP
             # behaves the same when we use it directly or indirectly (through the gaussian_process.py file), we
-            # normalize the data here. Then, after the individual GPs are fit, we inject the statistics into them so
-            # they unnormalize the data at prediction time.
+            # normalize the data here and unnormalize the predictions of the individual samples at prediction time.
             y = self._normalize_y(y)
 
         self.gp = self._get_gp()
@@ -151,7 +164,8 @@ class GaussianProcessMCMC(BaseGP):
             if self.mcmc_sampler == 'emcee':
                 sampler = emcee.EnsembleSampler(self.n_mcmc_walkers,
                                                 len(self.kernel.theta),
-                                                self._ll)
+                                                self._ll,
+                                                pool=self.executor)
                 sampler.random_state = self.rng.get_state()
                 # Do a burn-in in the first iteration
                 if not self.burned:
@@ -231,7 +245,8 @@ class GaussianProcessMCMC(BaseGP):
             self.hypers = self.gp.kernel.theta
             self.hypers = [self.hypers]
 
-        self.models = []
+        # Factorize the covariance matrix of each hyperparameter sample
+        kernels = []
         for sample in self.hypers:
 
             if (sample < -50).any():
@@ -239,48 +254,44 @@ class GaussianProcessMCMC(BaseGP):
             if (sample > 50).any():
                 sample[sample > 50] = 50
 
-            # Instantiate a GP for each hyperparameter configuration
             kernel = deepcopy(self.kernel)
             kernel.theta = sample
-            model = GaussianProcess(
-                configspace=self.configspace,
-                types=self.types,
-                bounds=self.bounds,
-                kernel=kernel,
-                normalize_y=False,
-                seed=self.rng.randint(low=0, high=10000),
-            )
-            try:
-                model._train(X, y, do_optimize=False)
-                self.models.append(model)
-            except np.linalg.LinAlgError:
-                pass
+            kernels.append(kernel)
+
+        if self.executor is None:
+            factors = [_factorize(kernel, X, y) for kernel in kernels]
+        else:
+            factors = list(self.executor.map(_factorize, kernels, [X] * len(kernels), [y] * len(kernels)))
+        self.kernels = [kernel for kernel, factor in zip(kernels, factors) if factor is not None]
+        factors = [factor for factor in factors if factor is not None]
 
-        if len(self.models) == 0:
+        if len(factors) == 0:
             kernel = deepcopy(self.kernel)
             kernel.theta = self.p0
-            model = GaussianProcess(
-                configspace=self.configspace,
-                types=self.types,
-                bounds=self.bounds,
-                kernel=kernel,
-                normalize_y=False,
-                seed=self.rng.randint(low=0, high=10000),
-            )
-            model._train(X, y, do_optimize=False)
-            self.models.append(model)
-
-        if self.normalize_y:
-            # Inject the normalization statistics into the individual models. Setting normalize_y to True makes the
-            # individual GPs unnormalize the data at predict time.
-            for model in self.models:
-                model.normalize_y = True
-                model.mean_y_ = self.mean_y_
-                model.std_y_ = self.std_y_
+            n_tries = 10
+            for i in range(n_tries):
+                factor = _factorize(kernel, X, y)
+                if factor is not None:
+                    break
+                if i == n_tries - 1:
+                    raise np.linalg.LinAlgError('Fail to fit GP after %d tries!' % n_tries)
+                # Assume that the last entry of theta is the noise
+                theta = np.exp(kernel.theta)
+                theta[-1] += 1
+                kernel.theta = np.log(theta)
+            self.kernels = [kernel]
+            factors = [factor]
+
+        self.X_train_ = X
+        self.L_inv_ = np.stack([L_inv for L_inv, _ in factors])
+        self.alpha_ = np.stack([alpha for _, alpha in factors])
 
         self.is_trained = True
         return self
 
+    # Maximum number of entries of the stacked cross-covariance matrices in _predict
+    max_stacked_size = 2 ** 22
+
     def _get_gp(self) -> GaussianProcessRegressor:
         return GaussianProcessRegressor(
             kernel=self.kernel,
@@ -316,8 +327,9 @@ class GaussianProcessMCMC(BaseGP):
         if (theta > 50).any():
             theta[theta > 50] = 50
 
+        gp = self.gp if self.executor is None else _copy_with_own_kernel(self.gp)
         try:
-            lml = self.gp.log_marginal_likelihood(theta)
+            lml = gp.log_marginal_likelihood(theta)
         except ValueError:
             return -np.inf
 
@@ -415,13 +427,24 @@ class GaussianProcessMCMC(BaseGP):
 
         X_test = self._impute_inactive(X_test)
 
-        mu = np.zeros([len(self.models), X_test.shape[0]])
-        var = np.zeros([len(self.models), X_test.shape[0]])
-        for i, model in enumerate(self.models):
-            mu_tmp, var_tmp = model.predict(X_test)
-            assert var_tmp is not None  # please mypy
-            mu[i] = mu_tmp.flatten()
-            var[i] = var_tmp.flatten()
+        n_samples, n_train = self.alpha_.shape
+        mu = np.zeros([n_samples, X_test.shape[0]])
+        var = np.zeros([n_samples, X_test.shape[0]])
+        # The cross-covariances of all samples are stacked, so limit their size by chunking the test points
+        chunk_size = max(1, self.max_stacked_size // (n_samples * n_train))
+        for start in range(0, X_test.shape[0], chunk_size):
+            X_chunk = X_test[start:start + chunk_size]
+            # Kernel hyperparameters differ by sample, so the kernels are evaluated one by one
+            K_trans = np.stack([kernel(X_chunk, self.X_train_) for kernel in self.kernels])
+            K_diag = np.stack([kernel.diag(X_chunk) for kernel in self.kernels])
+            mu[:, start:start + chunk_size] = np.einsum('mtn,mn->mt', K_trans, self.alpha_)
+            # var_m = k(x, x) - |L_m^-1 k_m(X, x)|^2 with one batched matrix product for all samples
+            V = np.matmul(self.L_inv_, K_trans.transpose((0, 2, 1)))
+            var[:, start:start + chunk_size] = K_diag - np.einsum('mnt,mnt->mt', V, V)
+
+        var = np.clip(var, VERY_SMALL_NUMBER, np.inf)
+        if self.normalize_y:
+            mu, var = self._untransform_y(mu, var)
 
         m = mu.mean(axis=0)
 
@@ -438,3 +461,23 @@ class GaussianProcessMCMC(BaseGP):
             v[np.where((v < np.finfo(v.dtype).eps) & (v > -np.finfo(v.dtype).eps))] = 0
 
         return m, v
+
+
+def _factorize(
+        kernel: Kernel,
+        X: np.ndarray,
+        y: np.ndarray,
+) -> typing.Optional[typing.Tuple[np.ndarray, np.ndarray]]:
+    """
+    Returns (L^-1, K^-1 y) for the covariance K = L L^T of kernel on X,
+    or None if K is not positive definite.
+    Module-level function so that samples can be factorized on a process pool.
+    """
+    K = kernel(X)
+    try:
+        L = cholesky(K, lower=True, check_finite=False)
+    except np.linalg.LinAlgError:
+        return None
+    alpha = cho_solve((L, True), y, check_finite=False)
+    L_inv = solve_triangular(L, np.eye(L.shape[0]), lower=True, check_finite=False)
+    return L_inv, alpha
@@ -0,0 +1,554 @@
+# License: MIT
+
+import copy
+import logging
+import typing
+
+import numpy as np
+from scipy import optimize
+from scipy.linalg import cholesky, cho_solve, eigh
+import sklearn.gaussian_process.kernels as sk_kernels
+
+from ConfigSpace import ConfigurationSpace
+from openbox.surrogate.base.base_model import AbstractModel
+from openbox.surrogate.base.base_gp import BaseGP
+from openbox.surrogate.base.gp import _stationary_kernel_with_gradient, _supports_input_gradient
+from openbox.surrogate.base.gp_pathwise import split_sampling_kernel, RandomFourierFeatures, \
+    PathwiseFunctionSamples
+from openbox.utils.constants import VERY_SMALL_NUMBER
+
+from skopt.learning.gaussian_process.kernels import Kernel
+
+logger = logging.getLogger(__name__)
+
+
+def split_output_kernel(kernel: Kernel) \
+        -> typing.Tuple[typing.Optional[Kernel], Kernel, typing.Optional[Kernel]]:
+    """
+    Splits a kernel of the form ``[ConstantKernel *] k [+ WhiteKernel]`` into its amplitude kernel,
+    the kernel k and its noise kernel. The amplitude and noise kernels are None if missing.
+    """
+    noise_kernel = None
+    if isinstance(kernel, sk_kernels.Sum):
+        if isinstance(kernel.k2, sk_kernels.WhiteKernel):
+            kernel, noise_kernel = kernel.k1, kernel.k2
+        elif isinstance(kernel.k1, sk_kernels.WhiteKernel):
+            kernel, noise_kernel = kernel.k2, kernel.k1
+        else:
+            raise ValueError('Kernel %s has no WhiteKernel summand.' % kernel)
+
+    amplitude_kernel = None
+    if isinstance(kernel, sk_kernels.Product):
+        if isinstance(kernel.k1, sk_kernels.ConstantKernel):
+            amplitude_kernel, kernel = kernel.k1, kernel.k2
+        elif isinstance(kernel.k2, sk_kernels.ConstantKernel):
+            amplitude_kernel, kernel = kernel.k2, kernel.k1
+    return amplitude_kernel, kernel, noise_kernel
+
+
+def _kernel_priors(kernel: Kernel) -> typing.List[typing.Optional[typing.Any]]:
+    """Returns the prior (or None) of every tunable hyperparameter in the order of kernel.theta."""
+    priors = []
+    to_visit = [kernel]
+    while len(to_visit) > 0:
+        current = to_visit.pop(0)
+        if isinstance(current, sk_kernels.KernelOperator):
+            to_visit[:0] = [current.k1, current.k2]
+            continue
+        for hp in current.hyperparameters:
+            if not hp.fixed:
+                priors += [getattr(current, 'prior', None)] * hp.n_elements
+    return priors
+
+
+def _is_tunable(kernel: typing.Optional[Kernel]) -> bool:
+    return kernel is not None and len(kernel.theta) > 0
+
+
+class MultiOutputGaussianProcess(BaseGP):
+    """
+    Gaussian process surrogate for several outputs (objectives and constraints) observed on the same inputs.
+
+    All outputs share the kernel k and its length-scales, so the kernel matrix K, its gradient and the
+    cross-kernel with the test points are computed once for all outputs. Output i has the covariance
+    a_i * K + n_i * I. With ``shared_hypers='all'``, the amplitude a and the noise n are tied, too.
+
+    Predictions use one eigendecomposition K = Q diag(lambda) Q^T of the training kernel, from which
+    (a_i * K + n_i * I)^-1 = Q diag(1 / (a_i * lambda + n_i)) Q^T for every output. Thus a prediction
+    costs one cross-kernel and one projection onto Q, plus O(N * N_test) per output.
+
+    Use ``get_output_models()`` to get one single-output surrogate per output.
+
+    Parameters
+    ----------
+    kernel : Kernel
+        Kernel of the form ``[ConstantKernel *] k [+ WhiteKernel]``, as built by create_gp_model.
+    n_outputs : int
+        Number of outputs.
+    shared_hypers : str
+        'lengthscales' for per-output amplitudes and noise levels, 'all' to tie them.
+    alpha : float
+        Value added to the diagonal of the kernel matrix.
+    normalize_y : bool
+        Whether every output is normalized to zero mean and unit variance.
+    n_opt_restarts : int
+        Number of random restarts of the hyperparameter optimization.
+    """
+
+    # Number of random Fourier features of the functions drawn by draw_function_samples()
+    n_fourier_features = 1024
+    # sample_functions() draws exact joint samples for at most this many test points
+    max_exact_sample_size = 200
+
+    def __init__(
+            self,
+            configspace: ConfigurationSpace,
+            types: typing.List[int],
+            bounds: typing.List[typing.Tuple[float, float]],
+            kernel: Kernel,
+            n_outputs: int,
+            shared_hypers: str = 'lengthscales',
+            alpha: float = 0,
+            normalize_y: bool = True,
+            n_opt_restarts: int = 10,
+            instance_features: typing.Optional[np.ndarray] = None,
+            pca_components: typing.Optional[int] = None,
+            seed: int = 42,
+    ):
+        super().__init__(
+            configspace=configspace,
+            types=types,
+            bounds=bounds,
+            seed=seed,
+            kernel=kernel,
+            instance_features=instance_features,
+            pca_components=pca_components,
+        )
+        if shared_hypers not in ('lengthscales', 'all'):
+            raise ValueError('Unknown shared_hypers: %s.' % shared_hypers)
+        self.n_outputs = n_outputs
+        self.shared_hypers = shared_hypers
+        self.alpha = alpha
+        self.normalize_y = normalize_y
+        self.n_opt_restarts = n_opt_restarts
+
+        self._set_has_conditions()
+        amplitude_kernel, base_kernel, noise_kernel = split_output_kernel(kernel)
+        self.base_kernel = copy.deepcopy(base_kernel)
+        self._amplitude_kernel = amplitude_kernel if _is_tunable(amplitude_kernel) else None
+        self._noise_kernel = noise_kernel if _is_tunable(noise_kernel) else None
+        self._n_groups = 1 if shared_hypers == 'all' else n_outputs
+        # fixed values if the amplitude or the noise level is not tuned
+        self._amplitude = 1.0 if amplitude_kernel is None else float(amplitude_kernel.constant_value)
+        self._noise = 0.0 if noise_kernel is None else float(noise_kernel.noise_level)
+
+        self.hypers = self._initial_theta()
+        self.is_trained = False
+        self._pending_targets = dict()
+        self._output_models = None
+        self._prediction_cache = dict()
+
+    def _get_gp(self):
+        # the outputs are fitted without a scikit-learn regressor
+        return None
+
+    def _initial_theta(self) -> np.ndarray:
+        theta = [self.base_kernel.theta]
+        if self._amplitude_kernel is not None:
+            theta.append(np.full(self._n_groups, np.log(self._amplitude)))
+        if self._noise_kernel is not None:
+            theta.append(np.full(self._n_groups, np.log(self._noise)))
+        return np.concatenate(theta)
+
+    def _theta_bounds(self) -> typing.List[typing.Tuple[float, float]]:
+        bounds = [tuple(b) for b in self.base_kernel.bounds]
+        if self._amplitude_kernel is not None:
+            bounds += [tuple(self._amplitude_kernel.bounds[0])] * self._n_groups
+        if self._noise_kernel is not None:
+            bounds += [tuple(self._noise_kernel.bounds[0])] * self._n_groups
+        return bounds
+
+    def _theta_priors(self) -> typing.List[typing.Optional[typing.Any]]:
+        priors = _kernel_priors(self.base_kernel)
+        if self._amplitude_kernel is not None:
+            priors += [self._amplitude_kernel.prior] * self._n_groups
+        if self._noise_kernel is not None:
+            priors += [self._noise_kernel.prior] * self._n_groups
+        return priors
+
+    def _unpack(self, theta: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the kernel theta and the amplitudes and noise levels of the groups."""
+        n_base = len(self.base_kernel.theta)
+        base_theta, theta = theta[:n_base], theta[n_base:]
+        if self._amplitude_kernel is not None:
+            amplitudes, theta = np.exp(theta[:self._n_groups]), theta[self._n_groups:]
+        else:
+            amplitudes = np.full(self._n_groups, self._amplitude)
+        if self._noise_kernel is not None:
+            noises = np.exp(theta[:self._n_groups])
+        else:
+            noises = np.full(self._n_groups, self._noise)
+        return base_theta, amplitudes, noises
+
+    def _groups(self) -> typing.List[np.ndarray]:
+        if self._n_groups == 1:
+            return [np.arange(self.n_outputs)]
+        return [np.array([i]) for i in range(self.n_outputs)]
+
+    def get_output_models(self) -> typing.List['GaussianProcessOutput']:
+        """Returns one single-output surrogate per output, which share this model."""
+        if self._output_models is None:
+            self._output_models = [GaussianProcessOutput(self, i) for i in range(self.n_outputs)]
+        return self._output_models
+
+    def set_output_target(self, index: int, X: np.ndarray, y: np.ndarray) -> None:
+        """
+        Sets the targets of one output. The model is trained as soon as the targets of all outputs are set.
+        """
+        self._pending_targets[index] = (X, np.asarray(y, dtype=np.float64).reshape(-1))
+        if len(self._pending_targets) < self.n_outputs:
+            return
+        X = self._pending_targets[0][0]
+        if any(not np.array_equal(X_i, X) for X_i, _ in self._pending_targets.values()):
+            self._pending_targets = dict()
+            raise ValueError('All outputs of a MultiOutputGaussianProcess must be trained on the same inputs.')
+        Y = np.column_stack([self._pending_targets[i][1] for i in range(self.n_outputs)])
+        self._pending_targets = dict()
+        self.train(X, Y)
+
+    def _train(self, X: np.ndarray, Y: np.ndarray, do_optimize: bool = True) -> 'MultiOutputGaussianProcess':
+        """
+        Optimizes the hyperparameters by maximizing the sum of the marginal log likelihoods
+        of all outputs and factorizes the kernel matrix.
+
+        Parameters
+        ----------
+        X: np.ndarray (N, D)
+            Input data points.
+        Y: np.ndarray (N, n_outputs)
+            The corresponding target values.
+        do_optimize: boolean
+            If set to true the hyperparameters are optimized otherwise
+            the current hyperparameters are used.
+        """
+        X = self._impute_inactive(X)
+        Y = np.asarray(Y, dtype=np.float64).reshape(X.shape[0], -1)
+        if Y.shape[1] != self.n_outputs:
+            raise ValueError('Expected %d outputs, got %d!' % (self.n_outputs, Y.shape[1]))
+        if self.normalize_y:
+            self.mean_y_ = np.mean(Y, axis=0)
+            self.std_y_ = np.std(Y, axis=0)
+            self.std_y_[self.std_y_ == 0] = 1
+            Y = (Y - self.mean_y_) / self.std_y_
+        self.X_train_ = X
+        self.Y_train_ = Y
+
+        if do_optimize:
+            self.hypers = self._optimize()
+        self._factorize()
+        self.is_trained = True
+        return self
+
+    def _nll(self, theta: np.ndarray) -> typing.Tuple[float, np.ndarray]:
+        """
+        Returns the negative sum of the marginal log likelihoods of all outputs (+ the priors)
+        and its gradient with respect to theta (on a log scale).
+        """
+        base_theta, amplitudes, noises = self._unpack(theta)
+        kernel = self.base_kernel
+        kernel.theta = base_theta
+        X, Y = self.X_train_, self.Y_train_
+        n = X.shape[0]
+        K, K_gradient = kernel(X, eval_gradient=True)
+
+        nll = 0.0
+        # gradient of the negative log likelihood with respect to K, weighted by the amplitudes
+        W = np.zeros_like(K)
+        amplitude_grad = np.zeros(self._n_groups)
+        noise_grad = np.zeros(self._n_groups)
+        try:
+            for g, outputs in enumerate(self._groups()):
+                C = amplitudes[g] * K
+                C[np.diag_indices_from(C)] += noises[g] + self.alpha
+                L = cholesky(C, lower=True, check_finite=False)
+                alpha = cho_solve((L, True), Y[:, outputs], check_finite=False)
+                C_inv = cho_solve((L, True), np.eye(n), check_finite=False)
+                nll += 0.5 * np.sum(Y[:, outputs] * alpha) \
+                    + len(outputs) * (np.log(np.diag(L)).sum() + 0.5 * n * np.log(2 * np.pi))
+                # d nll / d C = 0.5 * (C^-1 - alpha alpha^T) summed over the outputs
+                G = 0.5 * (len(outputs) * C_inv - alpha @ alpha.T)
+                W += amplitudes[g] * G
+                amplitude_grad[g] = amplitudes[g] * np.sum(G * K)
+                noise_grad[g] = noises[g] * np.trace(G)
+        except np.linalg.LinAlgError:
+            return 1e25, np.zeros(theta.shape)
+
+        grad = [np.einsum('ij,ijk->k', W, K_gradient)]
+        if self._amplitude_kernel is not None:
+            grad.append(amplitude_grad)
+        if self._noise_kernel is not None:
+            grad.append(noise_grad)
+        grad = np.concatenate(grad)
+
+        for dim, prior in enumerate(self._theta_priors()):
+            if prior is not None:
+                nll -= prior.lnprob(theta[dim])
+                grad[dim] -= prior.gradient(theta[dim])
+
+        if not np.isfinite(nll) or not np.all(np.isfinite(grad)):
+            return 1e25, np.zeros(theta.shape)
+        return nll, grad
+
+    def _optimize(self) -> np.ndarray:
+        """
+        Minimizes the negative log likelihood from the current hyperparameters
+        and from n_opt_restarts samples of the priors (or of the bounds).
+        """
+        bounds = self._theta_bounds()
+        p0 = [np.clip(self.hypers, [b[0] for b in bounds], [b[1] for b in bounds])]
+        if self.n_opt_restarts > 0:
+            dim_samples = []
+            for dim, prior in enumerate(self._theta_priors()):
+                if prior is None:
+                    dim_samples.append(self.rng.uniform(bounds[dim][0], bounds[dim][1], size=self.n_opt_restarts))
+                else:
+                    dim_samples.append(prior.sample_from_prior(self.n_opt_restarts).flatten())
+            p0 += list(np.vstack(dim_samples).transpose())
+
+        theta_star, f_opt_star = p0[0], np.inf
+        for start_point in p0:
+            try:
+                res = optimize.minimize(self._nll, start_point, jac=True, method='L-BFGS-B', bounds=bounds)
+            except np.linalg.LinAlgError:
+                continue
+            if res.fun < f_opt_star:
+                theta_star, f_opt_star = res.x, res.fun
+        return theta_star
+
+    def _factorize(self) -> None:
+        base_theta, amplitudes, noises = self._unpack(self.hypers)
+        self.base_kernel.theta = base_theta
+        group_of_output = np.zeros(self.n_outputs, dtype=int)
+        for g, outputs in enumerate(self._groups()):
+            group_of_output[outputs] = g
+        self.amplitudes_ = amplitudes[group_of_output]
+        self.noises_ = noises[group_of_output] + self.alpha
+
+        K = self.base_kernel(self.X_train_)
+        eigenvalues, self.Q_ = eigh(K, check_finite=False)
+        eigenvalues = np.clip(eigenvalues, 0, np.inf)
+        # (N, n_outputs): eigenvalues of (a_i * K + n_i * I)^-1
+        self.D_ = 1 / np.maximum(np.outer(eigenvalues, self.amplitudes_) + self.noises_, VERY_SMALL_NUMBER)
+        # alpha_i = (a_i * K + n_i * I)^-1 y_i
+        self.alpha_ = self.Q_ @ (self.D_ * (self.Q_.T @ self.Y_train_))
+        self._prediction_cache = dict()
+
+    def _predict(self, X_test: np.ndarray, cov_return_type: typing.Optional[str] = 'diagonal_cov') \
+            -> typing.Tuple[np.ndarray, typing.Optional[np.ndarray]]:
+        """
+        Returns the predictive means and variances (N, n_outputs) of all outputs at the test points.
+        Only 'diagonal_cov' and None are supported as cov_return_type.
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+        X_test = self._impute_inactive(X_test)
+        K_trans = self.base_kernel(X_test, self.X_train_)
+        mu = K_trans @ self.alpha_ * self.amplitudes_
+        var = None
+        if cov_return_type is not None:
+            B = self.Q_.T @ K_trans.T
+            var = np.outer(self.base_kernel.diag(X_test), self.amplitudes_) + self.noises_ - self.alpha \
+                - (B ** 2).T @ self.D_ * self.amplitudes_ ** 2
+            var = np.clip(var, VERY_SMALL_NUMBER, np.inf)
+        if self.normalize_y:
+            mu = mu * self.std_y_ + self.mean_y_
+            if var is not None:
+                var = var * self.std_y_ ** 2
+        return mu, var
+
+    def predict_outputs(self, X: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Like predict(), but the result for the last X is cached, so that the output models
+        predicting on the same points share one computation.
+        """
+        cached = self._prediction_cache.get('predict')
+        if cached is not None and cached[0].shape == X.shape and np.array_equal(cached[0], X):
+            return cached[1]
+        result = self.predict(X)
+        self._prediction_cache['predict'] = (X.copy(), result)
+        return result
+
+    def supports_gradient(self) -> bool:
+        """Whether predict_outputs_with_gradient() is available for the trained model."""
+        if not self.is_trained or (self.instance_features is not None and len(self.instance_features) > 0):
+            return False
+        kernel = self.base_kernel
+        return isinstance(kernel, sk_kernels.RBF) and not getattr(kernel, 'has_conditions', False) \
+            and _supports_input_gradient(kernel)
+
+    def predict_outputs_with_gradient(self, X: np.ndarray) \
+            -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predicts means and variances (N, n_outputs) of all outputs together with their gradients
+        with respect to X (N, n_outputs, D). The result for the last X is cached.
+        Requires supports_gradient().
+        """
+        if not self.supports_gradient():
+            raise NotImplementedError('Gradients are not supported for kernel %s.' % self.base_kernel)
+        cached = self._prediction_cache.get('gradient')
+        if cached is not None and cached[0].shape == X.shape and np.array_equal(cached[0], X):
+            return cached[1]
+
+        X_test = self._impute_inactive(X)
+        K_trans, K_trans_grad = _stationary_kernel_with_gradient(self.base_kernel, X_test, self.X_train_)
+        a = self.amplitudes_
+        mu = K_trans @ self.alpha_ * a
+        mu_grad = np.einsum('inj,nm->imj', K_trans_grad, self.alpha_) * a[None, :, None]
+        # var_i = a_i * k(x, x) + n_i - a_i^2 * sum_k D_ki * B_k^2 with B = Q^T k(X, x)
+        B = self.Q_.T @ K_trans.T
+        B_grad = np.einsum('inj,nk->ikj', K_trans_grad, self.Q_)
+        var = np.outer(self.base_kernel.diag(X_test), a) + self.noises_ - self.alpha - (B ** 2).T @ self.D_ * a ** 2
+        var_grad = -2 * np.einsum('ki,ikj,km->imj', B, B_grad, self.D_) * (a ** 2)[None, :, None]
+
+        clipped = var < VERY_SMALL_NUMBER
+        var = np.clip(var, VERY_SMALL_NUMBER, np.inf)
+        if self.normalize_y:
+            mu = mu * self.std_y_ + self.mean_y_
+            var = var * self.std_y_ ** 2
+            mu_grad = mu_grad * self.std_y_[None, :, None]
+            var_grad = var_grad * (self.std_y_ ** 2)[None, :, None]
+        clipped |= var < self.var_threshold
+        var = np.where(clipped, np.maximum(var, self.var_threshold), var)
+        var_grad[clipped] = 0
+        result = (mu, var, mu_grad, var_grad)
+        self._prediction_cache['gradient'] = (X.copy(), result)
+        return result
+
+    def sample_functions(self, X_test: np.ndarray, n_funcs: int = 1, output: int = 0) -> np.ndarray:
+        """
+        Samples F function values of one output from the current posterior at the N test points.
+
+        Exact joint samples cost O(N^3). For more than ``max_exact_sample_size``
+        test points, the values of F functions drawn with draw_function_samples()
+        are returned instead if the kernel supports it.
+
+        Returns
+        ----------
+        function_samples: np.array(N, F)
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        if X_test.shape[0] > self.max_exact_sample_size:
+            function_samples = self.draw_function_samples(n_funcs, output=output)
+            if function_samples is not None:
+                return function_samples(X_test)
+
+        X_test = self._impute_inactive(X_test)
+        a = self.amplitudes_[output]
+        K_trans = self.base_kernel(X_test, self.X_train_)
+        mu = a * K_trans @ self.alpha_[:, output]
+        B = self.Q_.T @ K_trans.T
+        cov = a * self.base_kernel(X_test) - a ** 2 * (B.T * self.D_[:, output]) @ B
+        cov[np.diag_indices_from(cov)] += self.noises_[output] - self.alpha
+        funcs = self.rng.multivariate_normal(mu, cov, size=n_funcs).T
+        if self.normalize_y:
+            funcs = funcs * self.std_y_[output] + self.mean_y_[output]
+        return funcs
+
+    def draw_function_samples(self, n_funcs: int = 1, output: int = 0) -> typing.Optional[PathwiseFunctionSamples]:
+        """
+        Draws F functions of one output from the current posterior of the noise-free objective.
+        See GaussianProcess.draw_function_samples().
+
+        Returns
+        ----------
+        PathwiseFunctionSamples or None
+            Callable mapping X_test (N, D) to function values (N, F),
+            or None if the kernel is not supported.
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        split = split_sampling_kernel(self.base_kernel)
+        if split is None:
+            return None
+        _, kernel, _ = split
+        amplitude, noise = self.amplitudes_[output], self.noises_[output]
+
+        X_train = self.X_train_
+        features = RandomFourierFeatures(kernel, amplitude, X_train.shape[1], self.n_fourier_features, self.rng)
+        weights = self.rng.standard_normal((self.n_fourier_features, n_funcs))
+        # Condition the prior samples on the (noisy) training targets with
+        # (a_i * K + n_i * I)^-1 = Q diag(D_i) Q^T
+        prior_train = features(X_train) @ weights \
+            + np.sqrt(noise) * self.rng.standard_normal((X_train.shape[0], n_funcs))
+        residuals = self.Y_train_[:, output:output + 1] - prior_train
+        update_weights = self.Q_ @ (self.D_[:, output:output + 1] * (self.Q_.T @ residuals))
+        output_transform = None
+        if self.normalize_y:
+            std_y, mean_y = self.std_y_[output], self.mean_y_[output]
+
+            def output_transform(funcs):
+                return funcs * std_y + mean_y
+        return PathwiseFunctionSamples(
+            features, weights, kernel, amplitude, X_train, update_weights,
+            input_transform=self._impute_inactive,
+            output_transform=output_transform,
+        )
+
+
+class GaussianProcessOutput(AbstractModel):
+    """
+    One output of a MultiOutputGaussianProcess, usable wherever a single-output surrogate is expected.
+
+    Training an output only sets its targets; the shared model is trained once the targets of all
+    outputs are set. Predictions of the outputs on the same points share one computation.
+    """
+
+    # the shared model must be trained in the process that predicts
+    train_backend = None
+
+    def __init__(self, multi_output_gp: MultiOutputGaussianProcess, index: int):
+        super().__init__(
+            types=multi_output_gp._initial_types,
+            bounds=multi_output_gp.bounds,
+            instance_features=multi_output_gp.instance_features,
+            pca_components=multi_output_gp.pca_components,
+        )
+        self.multi_output_gp = multi_output_gp
+        self.index = index
+
+    @property
+    def is_trained(self) -> bool:
+        return self.multi_output_gp.is_trained
+
+    @property
+    def kernel(self) -> Kernel:
+        return self.multi_output_gp.base_kernel
+
+    def _train(self, X: np.ndarray, y: np.ndarray) -> 'GaussianProcessOutput':
+        self.multi_output_gp.set_output_target(self.index, X, y)
+        return self
+
+    def _predict(self, X: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        mu, var = self.multi_output_gp.predict_outputs(X)
+        return mu[:, self.index].copy(), var[:, self.index].copy()
+
+    def supports_gradient(self) -> bool:
+        return self.multi_output_gp.supports_gradient()
+
+    def predict_with_gradient(self, X: np.ndarray) \
+            -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """See GaussianProcess.predict_with_gradient()."""
+        mu, var, mu_grad, var_grad = self.multi_output_gp.predict_outputs_with_gradient(X)
+        i = self.index
+        return mu[:, i:i + 1].copy(), var[:, i:i + 1].copy(), mu_grad[:, i].copy(), var_grad[:, i].copy()
+
+    def sample_functions(self, X_test: np.ndarray, n_funcs: int = 1) -> np.ndarray:
+        """See GaussianProcess.sample_functions()."""
+        return self.multi_output_gp.sample_functions(X_test, n_funcs, output=self.index)
+
+    def draw_function_samples(self, n_funcs: int = 1) -> typing.Optional[PathwiseFunctionSamples]:
+        """See GaussianProcess.draw_function_samples()."""
+        return self.multi_output_gp.draw_function_samples(n_funcs, output=self.index)
@@ -0,0 +1,235 @@
+# License: MIT
+
+import typing
+
+import numpy as np
+import sklearn.gaussian_process.kernels as sk_kernels
+
+from skopt.learning.gaussian_process.kernels import Kernel, HammingKernel
+
+
+def split_stationary_kernel(kernel: Kernel) \
+        -> typing.Optional[typing.Tuple[float, Kernel, float]]:
+    """
+    Splits a kernel of the form ``[ConstantKernel *] (Matern | RBF) [+ WhiteKernel]``
+    into its amplitude, its stationary part and its noise level.
+
+    Returns None if the kernel has another structure or has conditions, in which
+    case no random Fourier features can be drawn for it.
+    """
+    split = _split_amplitude_and_noise(kernel)
+    if split is None or not _is_stationary(split[1]):
+        return None
+    return split
+
+
+def split_sampling_kernel(kernel: Kernel) \
+        -> typing.Optional[typing.Tuple[float, Kernel, float]]:
+    """
+    Like split_stationary_kernel(), but the correlation part may also be a HammingKernel
+    or the product of a Matern or RBF kernel and a HammingKernel, as built for spaces
+    with categorical hyperparameters. RandomFourierFeatures supports all of them.
+
+    Returns None if the kernel has another structure or has conditions.
+    """
+    split = _split_amplitude_and_noise(kernel)
+    if split is None or _split_product_kernel(split[1]) is None:
+        return None
+    return split
+
+
+def _split_amplitude_and_noise(kernel: Kernel) \
+        -> typing.Optional[typing.Tuple[float, Kernel, float]]:
+    noise = 0.0
+    if isinstance(kernel, sk_kernels.Sum):
+        if isinstance(kernel.k2, sk_kernels.WhiteKernel):
+            kernel, noise = kernel.k1, kernel.k2.noise_level
+        elif isinstance(kernel.k1, sk_kernels.WhiteKernel):
+            kernel, noise = kernel.k2, kernel.k1.noise_level
+        else:
+            return None
+
+    amplitude = 1.0
+    if isinstance(kernel, sk_kernels.Product):
+        if isinstance(kernel.k1, sk_kernels.ConstantKernel):
+            amplitude, kernel = kernel.k1.constant_value, kernel.k2
+        elif isinstance(kernel.k2, sk_kernels.ConstantKernel):
+            amplitude, kernel = kernel.k2.constant_value, kernel.k1
+    return amplitude, kernel, noise
+
+
+def _is_stationary(kernel: Kernel) -> bool:
+    # Matern is a subclass of RBF in scikit-learn
+    return isinstance(kernel, sk_kernels.RBF) and not getattr(kernel, 'has_conditions', False)
+
+
+def _is_hamming(kernel: Kernel) -> bool:
+    return isinstance(kernel, HammingKernel) and not getattr(kernel, 'has_conditions', False)
+
+
+def _split_product_kernel(kernel: Kernel) \
+        -> typing.Optional[typing.Tuple[typing.Optional[Kernel], typing.Optional[Kernel]]]:
+    """Returns the stationary and the Hamming part of a correlation kernel (either may be None),
+    or None if the kernel is not supported."""
+    if _is_stationary(kernel):
+        return kernel, None
+    if _is_hamming(kernel):
+        return None, kernel
+    if isinstance(kernel, sk_kernels.Product) and not getattr(kernel, 'has_conditions', False):
+        if _is_stationary(kernel.k1) and _is_hamming(kernel.k2):
+            return kernel.k1, kernel.k2
+        if _is_hamming(kernel.k1) and _is_stationary(kernel.k2):
+            return kernel.k2, kernel.k1
+    return None
+
+
+class RandomFourierFeatures(object):
+    """
+    Random Fourier features phi(x) with phi(x)^T phi(x') ~ amplitude * k(x, x')
+    for a Matern or RBF kernel k.
+
+    Rahimi, A. and Recht, B.
+    Random Features for Large-Scale Kernel Machines
+    In: NIPS 2007
+
+    For a HammingKernel k(x, x') = prod_d r_d ^ [x_d != x'_d] with r_d = exp(-1 / (2 l_d^2)),
+    every feature is the product over the categorical dimensions of
+    sqrt(r_d) z_d + sqrt(1 - r_d) z_d(x_d), with independent standard normal z_d and z_d(c)
+    for every category c, whose expected products are exactly k. The features of the product
+    of a stationary and a Hamming kernel are the products of the features of both kernels.
+
+    Parameters
+    ----------
+    kernel : Matern or RBF kernel, HammingKernel or their product
+        The correlation kernel (see split_sampling_kernel). Its ``operate_on`` dimensions are respected.
+    amplitude : float
+        Amplitude (signal variance) of the kernel.
+    n_dims : int
+        Number of input dimensions.
+    n_features : int
+        Number of random features.
+    rng : np.random.RandomState
+        Random number generator.
+    """
+
+    def __init__(self, kernel: Kernel, amplitude: float, n_dims: int, n_features: int,
+                 rng: np.random.RandomState):
+        stationary_kernel, hamming_kernel = _split_product_kernel(kernel)
+        self.n_features = n_features
+
+        self.dims = None
+        if stationary_kernel is not None:
+            self.dims = self._get_dims(stationary_kernel, n_dims)
+            length_scale = np.broadcast_to(np.asarray(stationary_kernel.length_scale, dtype=np.float64),
+                                           (len(self.dims),))
+
+            # The spectral density of the RBF kernel is Gaussian, the one of the Matern kernel
+            # is a multivariate t-distribution with 2 * nu degrees of freedom
+            omega = rng.standard_normal((len(self.dims), n_features))
+            nu = getattr(stationary_kernel, 'nu', np.inf)
+            if np.isfinite(nu):
+                omega *= np.sqrt(nu / rng.gamma(shape=nu, scale=1.0, size=n_features))
+            self.omega = omega / length_scale[:, None]
+            self.offset = rng.uniform(0, 2 * np.pi, size=n_features)
+        self.scale = np.sqrt((2.0 if stationary_kernel is not None else 1.0) * amplitude / n_features)
+
+        self.cat_dims = None
+        if hamming_kernel is not None:
+            self.cat_dims = self._get_dims(hamming_kernel, n_dims)
+            length_scale = np.broadcast_to(np.asarray(hamming_kernel.length_scale, dtype=np.float64),
+                                           (len(self.cat_dims),))
+            correlation = np.exp(-1 / (2 * length_scale ** 2))
+            self.cat_shared = np.sqrt(correlation)[:, None] * rng.standard_normal((len(self.cat_dims), n_features))
+            self.cat_scale = np.sqrt(1 - correlation)
+            # the weights z_d(c) of a category are drawn when the category is first seen
+            self.cat_rng = np.random.RandomState(rng.randint(2 ** 31 - 1))
+            self.cat_weights = [dict() for _ in self.cat_dims]
+
+    @staticmethod
+    def _get_dims(kernel: Kernel, n_dims: int) -> np.ndarray:
+        operate_on = getattr(kernel, 'operate_on', None)
+        return np.arange(n_dims) if operate_on is None else np.asarray(operate_on)
+
+    def _categorical_features(self, X: np.ndarray) -> np.ndarray:
+        features = np.ones((X.shape[0], self.n_features))
+        for i, dim in enumerate(self.cat_dims):
+            categories, inverse = np.unique(X[:, dim], return_inverse=True)
+            weights = self.cat_weights[i]
+            for category in categories.tolist():
+                if category not in weights:
+                    weights[category] = self.cat_rng.standard_normal(self.n_features)
+            category_weights = np.array([weights[category] for category in categories.tolist()])
+            features *= self.cat_shared[i] + self.cat_scale[i] * category_weights[inverse.reshape(-1)]
+        return features
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        """Returns the features of X, shape (N, n_features)."""
+        features = np.full((X.shape[0], self.n_features), self.scale)
+        if self.dims is not None:
+            features *= np.cos(X[:, self.dims] @ self.omega + self.offset)
+        if self.cat_dims is not None:
+            features *= self._categorical_features(X)
+        return features
+
+
+class PathwiseFunctionSamples(object):
+    """
+    Posterior function samples as cheap parametric functions.
+
+    Every sample is the sum of a prior sample given by random Fourier features
+    and a kernel-weighted update term (Matheron's rule):
+
+        f(x) = phi(x)^T w + amplitude * k(x, X_ref) v
+
+    so that F functions are evaluated on N points in O(N (n_features + n_ref) F).
+
+    Wilson, J. and Borovitskiy, V. and Terenin, A. and Mostowsky, P. and Deisenroth, M.
+    Efficiently Sampling Functions from Gaussian Process Posteriors
+    In: ICML 2020
+
+    Parameters
+    ----------
+    features : RandomFourierFeatures
+        Features of the prior samples.
+    weights : np.ndarray (n_features, F)
+        Weights of the prior samples.
+    kernel : Matern or RBF kernel, HammingKernel or their product
+        Correlation kernel of the update term.
+    amplitude : float
+        Amplitude of the kernel.
+    X_ref : np.ndarray (n_ref, D)
+        Points of the update term (training or inducing points).
+    update_weights : np.ndarray (n_ref, F)
+        Weights v of the update term.
+    input_transform : callable, optional
+        Applied to the input points, e.g. to impute inactive hyperparameters.
+    output_transform : callable, optional
+        Applied to the function values, e.g. to undo the normalization of the targets.
+    """
+
+    def __init__(self, features: RandomFourierFeatures, weights: np.ndarray, kernel: Kernel, amplitude: float,
+                 X_ref: np.ndarray, update_weights: np.ndarray,
+                 input_transform: typing.Optional[typing.Callable[[np.ndarray], np.ndarray]] = None,
+                 output_transform: typing.Optional[typing.Callable[[np.ndarray], np.ndarray]] = None):
+        self.features = features
+        self.weights = weights
+        self.kernel = kernel
+        self.amplitude = amplitude
+        self.X_ref = X_ref
+        self.update_weights = update_weights
+        self.input_transform = input_transform
+        self.output_transform = output_transform
+
+    @property
+    def n_funcs(self) -> int:
+        return self.weights.shape[1]
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        """Returns the values of the F functions at the N points X, shape (N, F)."""
+        if self.input_transform is not None:
+            X = self.input_transform(X)
+        funcs = self.features(X) @ self.weights \
+            + self.amplitude * (self.kernel(X, self.X_ref) @ self.update_weights)
+        if self.output_transform is not None:
+            funcs = self.output_transform(funcs)
+        return funcs
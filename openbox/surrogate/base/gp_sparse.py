@@ -0,0 +1,342 @@
+# License: MIT
+
+import typing
+
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+import sklearn.gaussian_process.kernels
+
+from ConfigSpace import ConfigurationSpace
+from openbox.surrogate.base.gp import GaussianProcess, _stationary_kernel_with_gradient
+from openbox.surrogate.base.gp_pathwise import split_stationary_kernel, split_sampling_kernel, \
+    RandomFourierFeatures, PathwiseFunctionSamples
+from openbox.utils.constants import VERY_SMALL_NUMBER
+
+from skopt.learning.gaussian_process.kernels import Kernel
+
+
+class SparseGaussianProcess(GaussianProcess):
+    """
+    Inducing-point Gaussian process surrogate for large numbers of observations.
+
+    The posterior is the variational sparse approximation of Titsias (2009)
+    with m inducing points chosen among the training inputs, which costs
+    O(N m^2) instead of O(N^3). Kernel hyperparameters are obtained by
+    optimizing the exact marginal log likelihood on the inducing points only.
+    If N <= m, the model is equivalent to the exact Gaussian process.
+
+    Titsias, M.
+    Variational Learning of Inducing Variables in Sparse Gaussian Processes
+    In: AISTATS 2009
+
+    Parameters
+    ----------
+    n_inducing : int
+        Maximum number of inducing points m. Half of them are the observations
+        with the best (lowest) targets, the others are selected by greedy
+        farthest-point sampling to cover the search space.
+    jitter : float
+        Relative jitter added to the diagonal of the inducing point covariance.
+    min_noise : float
+        Lower bound of the noise variance (on normalized targets) used in the
+        sparse posterior for numerical stability.
+
+    The other parameters are the same as in GaussianProcess.
+    """
+
+    def __init__(
+            self,
+            configspace: ConfigurationSpace,
+            types: typing.List[int],
+            bounds: typing.List[typing.Tuple[float, float]],
+            kernel: Kernel,
+            alpha=0,
+            normalize_y: bool = True,
+            n_opt_restarts: int = 10,
+            n_inducing: int = 200,
+            jitter: float = 1e-6,
+            min_noise: float = 1e-6,
+            instance_features: typing.Optional[np.ndarray] = None,
+            pca_components: typing.Optional[int] = None,
+            seed: int = 42,
+    ):
+        super().__init__(
+            configspace=configspace,
+            types=types,
+            bounds=bounds,
+            kernel=kernel,
+            alpha=alpha,
+            normalize_y=normalize_y,
+            n_opt_restarts=n_opt_restarts,
+            instance_features=instance_features,
+            pca_components=pca_components,
+            seed=seed,
+        )
+        self.n_inducing = n_inducing
+        self.jitter = jitter
+        self.min_noise = min_noise
+
+    def _train(self, X: np.ndarray, y: np.ndarray, do_optimize: bool = True) -> 'SparseGaussianProcess':
+        """
+        Selects the inducing points, estimates the GP hyperparameters on them
+        and computes the sparse posterior on all data points.
+
+        Parameters
+        ----------
+        X: np.ndarray (N, D)
+            Input data points.
+        y: np.ndarray (N,)
+            The corresponding target values.
+        do_optimize: boolean
+            If set to true the hyperparameters are optimized otherwise
+            the default hyperparameters of the kernel are used.
+        """
+        y = np.asarray(y, dtype=np.float64).flatten()
+        X_imputed = self._impute_inactive(X)
+        inducing_idx = self._select_inducing_points(X_imputed, y)
+
+        # Hyperparameters from the exact GP on the inducing points
+        super()._train(X[inducing_idx], y[inducing_idx], do_optimize=do_optimize)
+
+        if self.normalize_y:
+            y = self._normalize_y(y)
+        self.n_objectives_ = 1
+        self._fit_sparse_posterior(X_imputed[inducing_idx], X_imputed, y)
+        return self
+
+    def _select_inducing_points(self, X: np.ndarray, y: np.ndarray) -> np.ndarray:
+        n = X.shape[0]
+        if n <= self.n_inducing:
+            return np.arange(n)
+
+        n_best = self.n_inducing // 2
+        order = np.argsort(y, kind='stable')
+        selected = list(order[:n_best])
+
+        # Greedy farthest-point sampling for the remaining inducing points
+        min_dist = np.full(n, np.inf)
+        for idx in selected:
+            min_dist = np.minimum(min_dist, np.sum((X - X[idx]) ** 2, axis=1))
+        for _ in range(self.n_inducing - n_best):
+            idx = int(np.argmax(min_dist))
+            selected.append(idx)
+            min_dist = np.minimum(min_dist, np.sum((X - X[idx]) ** 2, axis=1))
+        return np.sort(np.asarray(selected))
+
+    def _split_kernel(self) -> typing.Tuple[Kernel, float]:
+        """Returns the noise-free part of the fitted kernel and the noise variance."""
+        kernel = self.gp.kernel_
+        noise = 0.0
+        if isinstance(kernel, sklearn.gaussian_process.kernels.Sum):
+            if isinstance(kernel.k2, sklearn.gaussian_process.kernels.WhiteKernel):
+                kernel, noise = kernel.k1, kernel.k2.noise_level
+            elif isinstance(kernel.k1, sklearn.gaussian_process.kernels.WhiteKernel):
+                kernel, noise = kernel.k2, kernel.k1.noise_level
+        return kernel, noise + self.alpha
+
+    def _fit_sparse_posterior(self, Z: np.ndarray, X: np.ndarray, y: np.ndarray) -> None:
+        kernel, noise = self._split_kernel()
+        noise = max(noise, self.min_noise)
+        sigma = np.sqrt(noise)
+
+        K_uu = kernel(Z, Z)
+        L_uu = self._stable_cholesky(K_uu)
+        # A = L_uu^-1 K_uf / sigma, B = I + A A^T: O(N m^2)
+        A = solve_triangular(L_uu, kernel(Z, X), lower=True, check_finite=False) / sigma
+        B = np.eye(Z.shape[0]) + A @ A.T
+        L_B = self._stable_cholesky(B)
+        c = solve_triangular(L_B, A @ y, lower=True, check_finite=False) / sigma
+
+        self.Z_ = Z
+        self.X_fit_ = X
+        self.y_fit_ = y
+        self.kernel_ = kernel
+        self.noise_ = noise
+        self.L_uu_ = L_uu
+        self.L_B_ = L_B
+        self.c_ = c
+
+    def fantasize(self, X: np.ndarray, y: np.ndarray) -> 'SparseGaussianProcess':
+        """
+        Conditions the sparse posterior on pending points with fantasy target values,
+        see GaussianProcess.fantasize(). The hyperparameters and the target normalization
+        are kept. The pending points are added to the data and to the inducing points,
+        so that the posterior at a pending point follows its fantasy value, and the
+        sparse posterior is recomputed in O(N m^2).
+
+        The fantasies are removed by clear_fantasies() or the next training.
+
+        Parameters
+        ----------
+        X: np.ndarray (k, D)
+            Pending points.
+        y: np.ndarray (k,)
+            Fantasy target values of the pending points.
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        if self._fantasy_state is None:
+            self._fantasy_state = (self.Z_, self.X_fit_, self.y_fit_, self.L_uu_, self.L_B_, self.c_)
+        X = self._impute_inactive(X)
+        y = np.asarray(y, dtype=np.float64).reshape(-1)
+        if self.normalize_y:
+            y = (y - self.mean_y_) / self.std_y_
+        self._fit_sparse_posterior(np.vstack((self.Z_, X)), np.vstack((self.X_fit_, X)),
+                                   np.concatenate((self.y_fit_, y)))
+        return self
+
+    def clear_fantasies(self) -> None:
+        """Restores the sparse posterior of the last training, see fantasize()."""
+        if self._fantasy_state is None:
+            return
+        self.Z_, self.X_fit_, self.y_fit_, self.L_uu_, self.L_B_, self.c_ = self._fantasy_state
+        self._fantasy_state = None
+
+    def _stable_cholesky(self, K: np.ndarray) -> np.ndarray:
+        jitter = self.jitter * max(np.mean(np.diag(K)), VERY_SMALL_NUMBER)
+        for _ in range(5):
+            try:
+                return cholesky(K + jitter * np.eye(K.shape[0]), lower=True, check_finite=False)
+            except np.linalg.LinAlgError:
+                jitter *= 10
+        return cholesky(K + jitter * np.eye(K.shape[0]), lower=True, check_finite=False)
+
+    def _posterior(self, X_test: np.ndarray, full_cov: bool = False) \
+            -> typing.Tuple[np.ndarray, np.ndarray]:
+        X_test = self._impute_inactive(X_test)
+        tmp1 = solve_triangular(self.L_uu_, self.kernel_(self.Z_, X_test), lower=True, check_finite=False)
+        tmp2 = solve_triangular(self.L_B_, tmp1, lower=True, check_finite=False)
+        mu = tmp2.T @ self.c_
+        # Include the noise variance like the exact GP, whose kernel contains the white noise term
+        if full_cov:
+            cov = self.kernel_(X_test) - tmp1.T @ tmp1 + tmp2.T @ tmp2
+            cov[np.diag_indices_from(cov)] += self.noise_
+            return mu, cov
+        var = self.kernel_.diag(X_test) - np.sum(tmp1 ** 2, axis=0) + np.sum(tmp2 ** 2, axis=0) + self.noise_
+        return mu, var
+
+    def _posterior_kernel(self) -> Kernel:
+        return self.kernel_
+
+    def _predict_with_gradient(self, X: np.ndarray) \
+            -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        amplitude, kernel, _ = split_stationary_kernel(self.kernel_)
+        K_trans, K_trans_grad = _stationary_kernel_with_gradient(kernel, X, self.Z_)
+        K_trans *= amplitude
+        K_trans_grad *= amplitude
+
+        tmp1 = solve_triangular(self.L_uu_, K_trans.T, lower=True, check_finite=False)
+        tmp2 = solve_triangular(self.L_B_, tmp1, lower=True, check_finite=False)
+        mu = tmp2.T @ self.c_
+        var = amplitude - np.sum(tmp1 ** 2, axis=0) + np.sum(tmp2 ** 2, axis=0) + self.noise_
+
+        # d mu = dK L_uu^-T L_B^-T c, d var = -2 dK L_uu^-T (tmp1 - L_B^-T tmp2)
+        a = solve_triangular(self.L_uu_,
+                             solve_triangular(self.L_B_, self.c_, lower=True, trans='T', check_finite=False),
+                             lower=True, trans='T', check_finite=False)
+        W = solve_triangular(self.L_uu_,
+                             tmp1 - solve_triangular(self.L_B_, tmp2, lower=True, trans='T', check_finite=False),
+                             lower=True, trans='T', check_finite=False)
+        mu_grad = np.einsum('imj,m->ij', K_trans_grad, a)
+        var_grad = -2 * np.einsum('imj,mi->ij', K_trans_grad, W)
+        return mu, var, mu_grad, var_grad
+
+    def _predict(self, X_test: np.ndarray,
+                 cov_return_type: typing.Optional[str] = 'diagonal_cov') \
+            -> typing.Tuple[np.ndarray, typing.Optional[np.ndarray]]:
+        r"""
+        Returns the predictive mean and variance of the objective function at
+        the given test points.
+
+        Parameters
+        ----------
+        X_test: np.ndarray (N, D)
+            Input test points
+        cov_return_type: typing.Optional[str]
+            Specifies what to return along with the mean. Refer ``predict()`` for more information.
+
+        Returns
+        ----------
+        np.array(N,)
+            predictive mean
+        np.array(N,) or np.array(N, N) or None
+            predictive variance or standard deviation
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        mu, var = self._posterior(X_test, full_cov=(cov_return_type == 'full_cov'))
+        if cov_return_type is None:
+            if self.normalize_y:
+                mu = self._untransform_y(mu)
+            return mu, None
+
+        var = np.clip(var, VERY_SMALL_NUMBER, np.inf)
+        if self.normalize_y:
+            mu, var = self._untransform_y(mu, var)
+        if cov_return_type == 'diagonal_std':
+            var = np.sqrt(var)
+        return mu, var
+
+    def sample_functions(self, X_test: np.ndarray, n_funcs: int = 1) -> np.ndarray:
+        """
+        Samples F function values from the current posterior at the N
+        specified test points.
+
+        Parameters
+        ----------
+        X_test: np.ndarray (N, D)
+            Input test points
+        n_funcs: int
+            Number of function values that are drawn at each test point.
+
+        Returns
+        ----------
+        function_samples: np.array(N, F)
+            The F function values drawn at the N test points
+            (same layout as GaussianProcess.sample_functions).
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        if X_test.shape[0] > self.max_exact_sample_size:
+            function_samples = self.draw_function_samples(n_funcs)
+            if function_samples is not None:
+                return function_samples(X_test)
+
+        mu, cov = self._posterior(X_test, full_cov=True)
+        funcs = self.rng.multivariate_normal(mu, cov, n_funcs).T
+        if self.normalize_y:
+            funcs = self._untransform_y(funcs)
+        return funcs
+
+    def draw_function_samples(self, n_funcs: int = 1) -> typing.Optional[PathwiseFunctionSamples]:
+        """
+        Draws F functions from the current sparse posterior of the noise-free
+        objective, with the update term on the inducing points.
+        See GaussianProcess.draw_function_samples.
+        """
+        if not self.is_trained:
+            raise Exception('Model has to be trained first!')
+
+        split = split_sampling_kernel(self.kernel_)
+        if split is None:
+            return None
+        amplitude, kernel, _ = split
+
+        features = RandomFourierFeatures(kernel, amplitude, self.Z_.shape[1], self.n_fourier_features, self.rng)
+        weights = self.rng.standard_normal((self.n_fourier_features, n_funcs))
+        # Whitened inducing values u' = L_uu^-1 u ~ N(L_B^-T c, B^-1), then
+        # f = prior + k(., Z) K_uu^-1 (u - prior(Z)) = prior + k(., Z) L_uu^-T (u' - L_uu^-1 prior(Z))
+        u_white = solve_triangular(
+            self.L_B_, self.c_.reshape(-1, 1) + self.rng.standard_normal((self.Z_.shape[0], n_funcs)),
+            lower=True, trans='T', check_finite=False)
+        prior_white = solve_triangular(self.L_uu_, features(self.Z_) @ weights, lower=True, check_finite=False)
+        update_weights = solve_triangular(self.L_uu_, u_white - prior_white, lower=True, trans='T',
+                                          check_finite=False)
+        return PathwiseFunctionSamples(
+            features, weights, kernel, amplitude, self.Z_, update_weights,
+            input_transform=self._impute_inactive,
+            output_transform=self._untransform_y if self.normalize_y else None,
+        )
@@ -5,9 +5,11 @@ import logging
 import typing
 
 import numpy as np
+from scipy.special import logsumexp
 from pyrfr import regression
 
 from openbox.surrogate.base.base_model import  AbstractModel
+from openbox.surrogate.base.forest_samples import TreeFunctionSamples
 from openbox.utils.constants import N_TREES
 
 
@@ -32,6 +34,11 @@ class RandomForestWithInstances(AbstractModel):
     logger : logging.logger
     """
 
+    # Below this number of rows, _predict calls pyrfr row by row instead of the batched tree traversal
+    min_batch_predict_size = 128
+    # pyrfr holds the GIL and its objects cannot be pickled
+    train_backend = None
+
     def __init__(self, types: np.ndarray,
                  bounds: typing.List[typing.Tuple[float, float]],
                  log_y: bool=False,
@@ -103,12 +110,16 @@ class RandomForestWithInstances(AbstractModel):
 
         self.n_points_per_tree = n_points_per_tree
         self.rf = None  # type: regression.binary_rss_forest
+        # flattened tree structure for batched prediction, built lazily after training
+        self._forest_arrays = None  # type: typing.Optional[typing.Dict[str, np.ndarray]]
 
         # This list well be read out by save_iteration() in the solver
         self.hypers = [num_trees, max_num_nodes, do_bootstrapping,
                        n_points_per_tree, ratio_features, min_samples_split,
                        min_samples_leaf, max_depth, eps_purity, seed]
         self.seed = seed
+        # draws the trees of function samples, see draw_function_samples()
+        self._sample_rng = np.random.RandomState(seed)
 
         self.logger = logging.getLogger(self.__module__ + "." +
                                         self.__class__.__name__)
@@ -139,6 +150,7 @@ class RandomForestWithInstances(AbstractModel):
         self.rf.options = self.rf_opts
         data = self._init_data_container(self.X, self.y)
         self.rf.fit(data, rng=self.rng)
+        self._forest_arrays = None
         return self
 
     def _init_data_container(self, X: np.ndarray, y: np.ndarray):
@@ -166,10 +178,116 @@ class RandomForestWithInstances(AbstractModel):
             else:
                 data.set_bounds_of_feature(i, mn, mx)
 
-        for row_X, row_y in zip(X, y):
+        # Python lists are converted by SWIG much faster than numpy rows
+        for row_X, row_y in zip(np.asarray(X, dtype=np.float64).tolist(), np.asarray(y, dtype=np.float64).tolist()):
             data.add_data_point(row_X, row_y)
         return data
 
+    def _get_forest_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """Exports the trees of the fitted forest to flat numpy arrays.
+        Cost is linear in the number of nodes and paid once per training.
+        """
+        if self._forest_arrays is None:
+            self._forest_arrays = self._export_trees(self.rf.get_all_trees())
+        return self._forest_arrays
+
+    def _export_trees(self, trees) -> typing.Dict[str, np.ndarray]:
+        """Exports pyrfr trees to flat numpy arrays.
+
+        All nodes of all trees are stored in one node array. For leaves, the
+        statistics needed by the different predict methods are precomputed.
+        """
+        n_nodes = sum(tree.number_of_nodes() for tree in trees)
+        roots = np.zeros(len(trees), dtype=np.int64)
+        is_leaf = np.zeros(n_nodes, dtype=bool)
+        feature = np.zeros(n_nodes, dtype=np.int64)
+        threshold = np.full(n_nodes, np.nan)
+        children = np.zeros((n_nodes, 2), dtype=np.int64)
+        cat_splits = dict()
+        leaf_values, leaf_weights, leaf_sizes = [], [], []
+
+        offset = 0
+        for tree_id, tree in enumerate(trees):
+            roots[tree_id] = offset
+            for i in range(tree.number_of_nodes()):
+                node = tree.get_node(i)
+                idx = offset + i
+                if node.is_a_leaf():
+                    is_leaf[idx] = True
+                    values = node.responses()
+                    leaf_values.extend(values)
+                    leaf_weights.extend(node.weights())
+                    leaf_sizes.append(len(values))
+                else:
+                    feature[idx] = node.get_feature_index()
+                    threshold[idx] = node.get_num_split_value()
+                    children[idx] = offset + node.get_child_index(0), offset + node.get_child_index(1)
+                    if np.isnan(threshold[idx]):
+                        cat_splits[idx] = node.get_cat_split()
+            offset += tree.number_of_nodes()
+
+        # leaf statistics with one reduction over the concatenated leaf values
+        leaf_values = np.asarray(leaf_values, dtype=np.float64)
+        leaf_weights = np.asarray(leaf_weights, dtype=np.float64)
+        leaf_sizes = np.asarray(leaf_sizes, dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(leaf_sizes)[:-1]))
+        segment_max = np.maximum.reduceat(leaf_values, starts)
+        leaf_n_values = np.zeros(n_nodes)
+        leaf_n_values[is_leaf] = leaf_sizes
+        leaf_sum = np.zeros(n_nodes)
+        leaf_sum[is_leaf] = np.add.reduceat(leaf_values, starts)
+        # mean weighted by bootstrap counts, as in pyrfr's predict_mean_var
+        leaf_mean = np.zeros(n_nodes)
+        leaf_weight = np.zeros(n_nodes)
+        leaf_weight[is_leaf] = np.add.reduceat(leaf_weights, starts)
+        leaf_mean[is_leaf] = np.add.reduceat(leaf_values * leaf_weights, starts) / leaf_weight[is_leaf]
+        # log(sum(exp(values))) for log_y
+        leaf_logsumexp = np.zeros(n_nodes)
+        leaf_logsumexp[is_leaf] = segment_max + np.log(
+            np.add.reduceat(np.exp(leaf_values - np.repeat(segment_max, leaf_sizes)), starts))
+
+        # categorical splits: categories in the split set go to the left child
+        n_categories = int(max([np.max(self.types)] + [max(c) + 1 for c in cat_splits.values() if len(c) > 0]))
+        is_cat = np.zeros(n_nodes, dtype=bool)
+        cat_left = np.zeros((n_nodes, max(n_categories, 1)), dtype=bool)
+        for idx, cat_split in cat_splits.items():
+            is_cat[idx] = True
+            cat_left[idx, np.asarray(cat_split, dtype=np.int64)] = True
+
+        return dict(
+            roots=roots, is_leaf=is_leaf, feature=feature, threshold=threshold, children=children,
+            is_cat=is_cat, cat_left=cat_left, leaf_mean=leaf_mean, leaf_weight=leaf_weight,
+            leaf_n_values=leaf_n_values, leaf_sum=leaf_sum, leaf_logsumexp=leaf_logsumexp,
+        )
+
+    def _find_leaves(self, X: np.ndarray,
+                     arrays: typing.Optional[typing.Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """Returns the leaf of every tree for every row of X, shape [n_trees, n_samples].
+
+        All rows are routed through all trees together, one numpy step per tree level.
+        """
+        if arrays is None:
+            arrays = self._get_forest_arrays()
+        X = np.asarray(X, dtype=np.float64)
+        n_trees, n_samples = len(arrays['roots']), X.shape[0]
+        nodes = np.repeat(arrays['roots'], n_samples)
+        rows = np.tile(np.arange(n_samples), n_trees)
+        n_categories = arrays['cat_left'].shape[1]
+
+        active = np.flatnonzero(~arrays['is_leaf'][nodes])
+        while active.size > 0:
+            node = nodes[active]
+            values = X[rows[active], arrays['feature'][node]]
+            # same as pyrfr: continuous values that are not greater than the threshold (incl. NaN) go left
+            go_left = ~(values > arrays['threshold'][node])
+            is_cat = arrays['is_cat'][node]
+            if is_cat.any():
+                categories = np.clip(np.nan_to_num(values[is_cat]), 0, n_categories - 1).astype(np.int64)
+                go_left[is_cat] = arrays['cat_left'][node[is_cat], categories]
+            nodes[active] = arrays['children'][node, (~go_left).astype(np.int64)]
+            active = active[~arrays['is_leaf'][nodes[active]]]
+        return nodes.reshape((n_trees, n_samples))
+
     def _predict(self, X: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
         """Predict means and variances for given X.
 
@@ -191,26 +309,58 @@ class RandomForestWithInstances(AbstractModel):
         if X.shape[1] != self.types.shape[0]:
             raise ValueError('Rows in X should have %d entries but have %d!' % (self.types.shape[0], X.shape[1]))
 
-        means, vars_ = [], []
-        for row_X in X:
-            if self.log_y:
-                preds_per_tree = self.rf.all_leaf_values(row_X)
-                means_per_tree = []
-                for preds in preds_per_tree:
-                    # within one tree, we want to use the
-                    # arithmetic mean and not the geometric mean
-                    means_per_tree.append(np.log(np.mean(np.exp(preds))))
-                mean = np.mean(means_per_tree)
-                var = np.var(means_per_tree) # variance over trees as uncertainty estimate
-            else:
+        if not self.log_y and X.shape[0] < self.min_batch_predict_size:
+            # few rows: pyrfr's per-row prediction is cheaper than routing a batch through the trees
+            means, vars_ = [], []
+            for row_X in np.asarray(X, dtype=np.float64).tolist():
                 mean, var = self.rf.predict_mean_var(row_X)
-            means.append(mean)
-            vars_.append(var)
-        means = np.array(means)
-        vars_ = np.array(vars_)
+                means.append(mean)
+                vars_.append(var)
+            return np.array(means).reshape((-1, 1)), np.array(vars_).reshape((-1, 1))
+
+        means_per_tree = self._predict_per_tree(X)
+        if self.log_y:
+            means = np.mean(means_per_tree, axis=0)
+            vars_ = np.var(means_per_tree, axis=0)  # variance over trees as uncertainty estimate
+        else:
+            # same statistics as pyrfr's predict_mean_var: unbiased variance of the tree means
+            means = np.mean(means_per_tree, axis=0)
+            if means_per_tree.shape[0] > 1:
+                vars_ = np.var(means_per_tree, axis=0, ddof=1)
+            else:
+                vars_ = np.zeros_like(means)
 
         return means.reshape((-1, 1)), vars_.reshape((-1, 1))
 
+    def _predict_per_tree(self, X: np.ndarray) -> np.ndarray:
+        """Returns the prediction of every tree for every row of X, shape [n_trees, n_samples]."""
+        arrays = self._get_forest_arrays()
+        leaves = self._find_leaves(X, arrays)
+        if self.log_y:
+            # within one tree, we want to use the
+            # arithmetic mean and not the geometric mean
+            return arrays['leaf_logsumexp'][leaves] - np.log(arrays['leaf_n_values'][leaves])
+        return arrays['leaf_mean'][leaves]
+
+    def draw_function_samples(self, n_funcs: int = 1) -> TreeFunctionSamples:
+        """
+        Draws F posterior functions, each of which is a tree of the forest.
+        The functions are valid until the next training.
+
+        Parameters
+        ----------
+        n_funcs: int
+            Number of functions F.
+
+        Returns
+        ----------
+        TreeFunctionSamples
+            Callable which maps X (N, D) to the function values (N, F).
+        """
+        arrays = self._get_forest_arrays()
+        tree_ids = self._sample_rng.randint(len(arrays['roots']), size=n_funcs)
+        return TreeFunctionSamples(self._predict_per_tree, tree_ids)
+
     def predict_marginalized_over_instances(self, X: np.ndarray):
         """Predict mean and variance marginalized over all instances.
 
@@ -253,36 +403,24 @@ class RandomForestWithInstances(AbstractModel):
                              (self.bounds.shape[0],
                               X.shape[1]))
 
-        mean = np.zeros(X.shape[0])
-        var = np.zeros(X.shape[0])
-        for i, x in enumerate(X):
-
-            # marginalize over instances
-            # 1. get all leaf values for each tree
-            preds_trees = [[] for i in range(self.rf_opts.num_trees)]
-
-            for feat in self.instance_features:
-                x_ = np.concatenate([x, feat])
-                preds_per_tree = self.rf.all_leaf_values(x_)
-                for tree_id, preds in enumerate(preds_per_tree):
-                    preds_trees[tree_id] += preds
-
-            # 2. average in each tree
-            for tree_id in range(self.rf_opts.num_trees):
-                if self.log_y:
-                    preds_trees[tree_id] = \
-                        np.log(np.mean(np.exp(preds_trees[tree_id])))
-                else:
-                    preds_trees[tree_id] = np.mean(preds_trees[tree_id])
-
-            # 3. compute statistics across trees
-            mean_x = np.mean(preds_trees)
-            var_x = np.var(preds_trees)
-            if var_x < self.var_threshold:
-                var_x = self.var_threshold
+        # marginalize over instances
+        # 1. get the leaves of each tree for all (configuration, instance) pairs
+        n_instances = len(self.instance_features)
+        X_ = np.hstack((np.repeat(X, n_instances, axis=0), np.tile(self.instance_features, (X.shape[0], 1))))
+        arrays = self._get_forest_arrays()
+        leaves = self._find_leaves(X_).reshape((-1, X.shape[0], n_instances))
+
+        # 2. average all leaf values of all instances in each tree
+        n_values = arrays['leaf_n_values'][leaves].sum(axis=2)
+        if self.log_y:
+            preds_trees = logsumexp(arrays['leaf_logsumexp'][leaves], axis=2) - np.log(n_values)
+        else:
+            preds_trees = arrays['leaf_sum'][leaves].sum(axis=2) / n_values
 
-            var[i] = var_x
-            mean[i] = mean_x
+        # 3. compute statistics across trees
+        mean = np.mean(preds_trees, axis=0)
+        var = np.var(preds_trees, axis=0)
+        var[var < self.var_threshold] = self.var_threshold
 
         if len(mean.shape) == 1:
             mean = mean.reshape((-1, 1))
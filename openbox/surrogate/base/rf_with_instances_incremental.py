@@ -0,0 +1,149 @@
+# License: MIT
+
+import typing
+
+import numpy as np
+from pyrfr import regression
+
+from openbox.surrogate.base.rf_with_instances import RandomForestWithInstances
+
+
+class IncrementalRandomForestWithInstances(RandomForestWithInstances):
+    """Probabilistic random forest that is updated incrementally between full refits.
+
+    Every tree is a separate single-tree pyrfr forest. When training data are
+    appended to the data of the last training, only ``num_regrow_trees`` trees
+    (in rotating order) are regrown on all data. The new observations are
+    added to the leaf statistics of the other trees, like pyrfr's
+    pseudo_update. All trees are refit every ``refit_interval`` new
+    observations, or whenever earlier targets have changed, to bound the
+    drift of the tree structures.
+
+    Predictions are made from the exported tree arrays of the parent class.
+
+    Parameters
+    ----------
+    num_regrow_trees : int
+        Number of trees regrown from scratch per incremental update.
+    refit_interval : int
+        Number of new observations after which all trees are refit.
+
+    The other parameters are the same as in RandomForestWithInstances.
+    """
+
+    # predictions always come from the exported trees
+    min_batch_predict_size = 0
+
+    def __init__(self, types: np.ndarray,
+                 bounds: typing.List[typing.Tuple[float, float]],
+                 num_regrow_trees: int = 1,
+                 refit_interval: int = 50,
+                 **kwargs):
+        super().__init__(types, bounds, **kwargs)
+        self.num_trees = self.rf_opts.num_trees
+        self.rf_opts.num_trees = 1  # each tree is fitted as its own forest
+        self.num_regrow_trees = num_regrow_trees
+        self.refit_interval = refit_interval
+
+        self.X = None
+        self.y = None
+        self._tree_arrays = []  # type: typing.List[typing.Dict[str, np.ndarray]]
+        self._next_regrow_tree = 0
+        self._n_last_refit = 0
+
+    def _train(self, X: np.ndarray, y: np.ndarray):
+        """Trains the random forest on X and y, incrementally if possible.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_features (config + instance features)]
+            Input data points.
+        Y : np.ndarray [n_samples, ]
+            The corresponding target values.
+
+        Returns
+        -------
+        self
+        """
+        y = y.flatten()
+        if self._can_update(X, y):
+            self._update(X, y)
+        else:
+            self._refit(X, y)
+        self.X = X
+        self.y = y
+        self._forest_arrays = _stack_tree_arrays(self._tree_arrays)
+        return self
+
+    def _can_update(self, X: np.ndarray, y: np.ndarray) -> bool:
+        if self.X is None or len(self._tree_arrays) != self.num_trees:
+            return False
+        n_old = self.X.shape[0]
+        return n_old < X.shape[0] < self._n_last_refit + self.refit_interval \
+            and X.shape[1] == self.X.shape[1] \
+            and np.array_equal(X[:n_old], self.X) and np.array_equal(y[:n_old], self.y)
+
+    def _fit_tree(self, data) -> typing.Dict[str, np.ndarray]:
+        forest = regression.binary_rss_forest()
+        forest.options = self.rf_opts
+        forest.fit(data, rng=self.rng)
+        return self._export_trees(forest.get_all_trees())
+
+    def _set_num_data_points_per_tree(self, n: int) -> None:
+        if self.n_points_per_tree <= 0:
+            self.rf_opts.num_data_points_per_tree = n
+        else:
+            self.rf_opts.num_data_points_per_tree = self.n_points_per_tree
+
+    def _refit(self, X: np.ndarray, y: np.ndarray) -> None:
+        self._set_num_data_points_per_tree(X.shape[0])
+        data = self._init_data_container(X, y)
+        self._tree_arrays = [self._fit_tree(data) for _ in range(self.num_trees)]
+        self._next_regrow_tree = 0
+        self._n_last_refit = X.shape[0]
+
+    def _update(self, X: np.ndarray, y: np.ndarray) -> None:
+        n_old = self.X.shape[0]
+        X_new, y_new = X[n_old:], y[n_old:]
+
+        regrow_trees = set((self._next_regrow_tree + i) % self.num_trees
+                           for i in range(min(self.num_regrow_trees, self.num_trees)))
+        self._next_regrow_tree = (self._next_regrow_tree + len(regrow_trees)) % self.num_trees
+        if len(regrow_trees) > 0:
+            self._set_num_data_points_per_tree(X.shape[0])
+            data = self._init_data_container(X, y)
+            for tree_id in sorted(regrow_trees):
+                self._tree_arrays[tree_id] = self._fit_tree(data)
+
+        for tree_id, arrays in enumerate(self._tree_arrays):
+            if tree_id in regrow_trees:
+                continue
+            leaves = self._find_leaves(X_new, arrays)[0]
+            for leaf, value in zip(leaves, y_new):
+                weight = arrays['leaf_weight'][leaf]
+                arrays['leaf_mean'][leaf] = (arrays['leaf_mean'][leaf] * weight + value) / (weight + 1)
+                arrays['leaf_weight'][leaf] = weight + 1
+                arrays['leaf_n_values'][leaf] += 1
+                arrays['leaf_sum'][leaf] += value
+                arrays['leaf_logsumexp'][leaf] = np.logaddexp(arrays['leaf_logsumexp'][leaf], value)
+
+
+def _stack_tree_arrays(tree_arrays: typing.List[typing.Dict[str, np.ndarray]]) -> typing.Dict[str, np.ndarray]:
+    """Concatenates the arrays of single trees (see RandomForestWithInstances._export_trees)."""
+    sizes = [len(arrays['is_leaf']) for arrays in tree_arrays]
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+    n_categories = max(arrays['cat_left'].shape[1] for arrays in tree_arrays)
+
+    stacked = dict(roots=offsets)
+    for key in tree_arrays[0]:
+        if key == 'roots':
+            continue
+        elif key == 'children':
+            stacked[key] = np.concatenate([arrays[key] + offset for arrays, offset in zip(tree_arrays, offsets)])
+        elif key == 'cat_left':
+            stacked[key] = np.concatenate([
+                np.pad(arrays[key], ((0, 0), (0, n_categories - arrays[key].shape[1])))
+                for arrays in tree_arrays])
+        else:
+            stacked[key] = np.concatenate([arrays[key] for arrays in tree_arrays])
+    return stacked
@@ -5,7 +5,6 @@ import typing
 
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
-import threading
 from joblib import Parallel, delayed
 from sklearn.utils.fixes import _joblib_parallel_args
 from sklearn.utils.validation import check_is_fitted
@@ -17,19 +16,20 @@ except ModuleNotFoundError:
     old_sk_version = False
 
 from openbox.surrogate.base.base_model import AbstractModel
+from openbox.surrogate.base.forest_samples import TreeFunctionSamples
 from openbox.utils.constants import N_TREES
 
 
-def _collect_prediction(predict, X, out, lock):
+def _collect_prediction(predict, X, out, i):
     """
     This is a utility function for joblib's Parallel.
 
     It can't go locally in ForestClassifier or ForestRegressor, because joblib
     complains that it cannot pickle it when placed there.
+
+    Each tree writes its own row of the preallocated output, so no lock is needed.
     """
-    prediction = predict(X, check_input=False)
-    with lock:
-        out.append(prediction)
+    out[i] = predict(X, check_input=False)
 
 
 class skRandomForestWithInstances(AbstractModel):
@@ -51,6 +51,9 @@ class skRandomForestWithInstances(AbstractModel):
     logger : logging.logger
     """
 
+    # scikit-learn builds the trees without the GIL
+    train_backend = 'threads'
+
     def __init__(self, types: np.ndarray,
                  bounds: typing.List[typing.Tuple[float, float]],
                  log_y: bool=False,
@@ -189,6 +192,13 @@ class skRandomForestWithInstances(AbstractModel):
         return self
 
     def predict_mean_var(self, X: np.ndarray):
+        all_y_preds = self._predict_per_tree(X)
+        m = np.mean(all_y_preds, axis=0)
+        v = np.var(all_y_preds, axis=0)
+        return m, v
+
+    def _predict_per_tree(self, X: np.ndarray) -> np.ndarray:
+        """Returns the prediction of every tree for every row of X, shape [n_trees, n_samples]."""
         if old_sk_version:
             check_is_fitted(self.rf, 'estimators_')
         else:
@@ -202,19 +212,36 @@ class skRandomForestWithInstances(AbstractModel):
         n_jobs, _, _ = _partition_estimators(self.rf.n_estimators, self.rf.n_jobs)
 
         # collect the output of every estimator
-        all_y_preds = list()
+        all_y_preds = np.empty((len(self.rf.estimators_), X.shape[0]), dtype=np.float64)
 
-        # Parallel loop
-        lock = threading.Lock()
-        Parallel(n_jobs=n_jobs, verbose=self.rf.verbose,
-                 **_joblib_parallel_args(require="sharedmem"))(
-            delayed(_collect_prediction)(e.predict, X, all_y_preds, lock)
-            for e in self.rf.estimators_)
-        all_y_preds = np.asarray(all_y_preds, dtype=np.float64)
+        if n_jobs == 1:
+            for i, e in enumerate(self.rf.estimators_):
+                _collect_prediction(e.predict, X, all_y_preds, i)
+        else:
+            # Parallel loop
+            Parallel(n_jobs=n_jobs, verbose=self.rf.verbose,
+                     **_joblib_parallel_args(require="sharedmem"))(
+                delayed(_collect_prediction)(e.predict, X, all_y_preds, i)
+                for i, e in enumerate(self.rf.estimators_))
+        return all_y_preds
+
+    def draw_function_samples(self, n_funcs: int = 1) -> TreeFunctionSamples:
+        """
+        Draws F posterior functions, each of which is a tree of the forest.
+        The functions are valid until the next training.
 
-        m = np.mean(all_y_preds, axis=0)
-        v = np.var(all_y_preds, axis=0)
-        return m, v
+        Parameters
+        ----------
+        n_funcs: int
+            Number of functions F.
+
+        Returns
+        ----------
+        TreeFunctionSamples
+            Callable which maps X (N, D) to the function values (N, F).
+        """
+        tree_ids = self.rng.randint(len(self.rf.estimators_), size=n_funcs)
+        return TreeFunctionSamples(self._predict_per_tree, tree_ids)
 
     def _predict(self, X: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
         """Predict means and variances for given X.
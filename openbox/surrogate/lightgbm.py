@@ -12,6 +12,7 @@ logger = logging.getLogger(__name__)
 
 
 class LightGBM(AbstractModel):
+    train_backend = 'threads'
 
     def __init__(
             self,
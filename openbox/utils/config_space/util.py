@@ -1,9 +1,15 @@
 # License: 3-clause BSD
 # Copyright (c) 2016-2018, Ml4AAD Group (http://www.ml4aad.org/)
 
-from typing import List
+from collections.abc import Sequence
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
+from ConfigSpace.conditions import AbstractConjunction, AndConjunction, EqualsCondition, GreaterThanCondition, \
+    InCondition, LessThanCondition, NotEqualsCondition, OrConjunction
+from ConfigSpace.forbidden import ForbiddenAndConjunction, ForbiddenEqualsClause, ForbiddenInClause
+from ConfigSpace.hyperparameters import CategoricalHyperparameter, Constant, NumericalHyperparameter, \
+    OrdinalHyperparameter, UniformFloatHyperparameter, UniformIntegerHyperparameter
 
 from openbox.utils.config_space import Configuration, ConfigurationSpace
 
@@ -24,6 +30,8 @@ def convert_configurations_to_array(configs: List[Configuration]) -> np.ndarray:
         Array with configuration hyperparameters. Inactive values are imputed
         with their default value.
     """
+    if isinstance(configs, LazyConfigurationList):
+        return configs.get_array()
     configs_array = np.array([config.get_array() for config in configs],
                              dtype=np.float64)
     configuration_space = configs[0].configuration_space
@@ -58,3 +66,309 @@ def impute_default_values(
         configs_array[nonfinite_mask, idx] = default
 
     return configs_array
+
+
+def get_config_key(config: Configuration) -> bytes:
+    """Get a canonical hashable key of a configuration from its encoded vector.
+
+    Hashing the vector is much cheaper than hashing or comparing Configuration objects,
+    and equal configurations always share the same key.
+
+    Parameters
+    ----------
+    config : Configuration
+        Configuration object.
+
+    Returns
+    -------
+    bytes
+        Key of the configuration. Inactive hyperparameters are encoded as -1.
+    """
+    return get_vector_key(config.get_array())
+
+
+def get_vector_key(vector: np.ndarray) -> bytes:
+    """Get the key of an encoded configuration vector, see get_config_key.
+
+    Parameters
+    ----------
+    vector : np.ndarray
+        Encoded configuration. Inactive hyperparameters are NaN.
+
+    Returns
+    -------
+    bytes
+        Key of the configuration.
+    """
+    vector = np.array(vector, dtype=np.float64)
+    vector[~np.isfinite(vector)] = -1
+    vector += 0.0  # normalize -0.0
+    return vector.tobytes()
+
+
+class LazyConfigurationList(Sequence):
+    """A list of configurations stored as encoded vectors.
+
+    Configuration objects are only built (and cached) when an item is accessed,
+    so that acquisition maximizers can rank thousands of candidates without
+    materializing the ones which are never looked at.
+
+    Parameters
+    ----------
+    configuration_space : ConfigurationSpace
+
+    vectors : np.ndarray
+        Array of configurations in the encoded vector space. Inactive
+        hyperparameters are NaN.
+    origins : str or list of str, optional
+        Origin of the configurations.
+    """
+
+    def __init__(
+            self,
+            configuration_space: ConfigurationSpace,
+            vectors: np.ndarray,
+            origins: Union[str, List[str], None] = None,
+    ):
+        self.configuration_space = configuration_space
+        self.vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, len(configuration_space.get_hyperparameters()))
+        if origins is None or isinstance(origins, str):
+            origins = [origins] * self.vectors.shape[0]
+        self.origins = list(origins)
+        self._configs = [None] * self.vectors.shape[0]  # type: List[Optional[Configuration]]
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        config = self._configs[index]
+        if config is None:
+            config = Configuration(self.configuration_space, vector=self.vectors[index], origin=self.origins[index])
+            self._configs[index] = config
+        return config
+
+    def get_array(self) -> np.ndarray:
+        """Returns the vectors with inactive hyperparameters imputed by their default."""
+        return impute_default_values(self.configuration_space, self.vectors.copy())
+
+
+def sample_configuration_array(
+        configuration_space: ConfigurationSpace,
+        size: int,
+        rng: np.random.RandomState,
+) -> np.ndarray:
+    """Sample configurations directly in the encoded vector space.
+
+    Every hyperparameter is sampled for all configurations at once. Conditions
+    and forbidden clauses are then checked on the whole batch, and forbidden
+    configurations are resampled.
+
+    Parameters
+    ----------
+    configuration_space : ConfigurationSpace
+
+    size : int
+        Number of configurations.
+    rng : np.random.RandomState
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (size, n_hyperparameters). Inactive hyperparameters are NaN.
+    """
+    hps = configuration_space.get_hyperparameters()
+    samples = []
+    n_samples, n_rounds = 0, 0
+    while n_samples < size:
+        if n_rounds == 100:
+            raise ValueError('Cannot sample %d valid configurations. '
+                             'Most sampled configurations are forbidden.' % size)
+        n_rounds += 1
+        n = size - n_samples
+        vectors = np.empty((n, len(hps)), dtype=np.float64)
+        for hp in hps:
+            idx = configuration_space.get_idx_by_hyperparameter_name(hp.name)
+            if isinstance(hp, OrdinalHyperparameter):
+                vectors[:, idx] = rng.randint(hp.num_elements, size=n)
+            else:
+                vectors[:, idx] = hp._sample(rng, n)
+        vectors = correct_configuration_array(configuration_space, vectors, impute_activated=False)
+        vectors = vectors[~is_forbidden_array(configuration_space, vectors)]
+        samples.append(vectors)
+        n_samples += vectors.shape[0]
+    return np.concatenate(samples)
+
+
+def get_one_exchange_neighbourhood_array(
+        configuration_space: ConfigurationSpace,
+        vectors: np.ndarray,
+        rng: np.random.RandomState,
+        num_neighbors: int = 4,
+        stdev: float = 0.2,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """One-exchange neighborhoods of several configurations in the encoded vector space.
+
+    Like ConfigSpace's get_one_exchange_neighbourhood, a neighbor differs from its
+    configuration in the value of exactly one active hyperparameter:
+    ``num_neighbors`` Gaussian moves (with standard deviation ``stdev``) for every
+    float, at most ``num_neighbors`` values for every integer, all other values for
+    every categorical and the adjacent values for every ordinal hyperparameter.
+    Children which become active are set to their default, and forbidden neighbors
+    are dropped.
+
+    Parameters
+    ----------
+    configuration_space : ConfigurationSpace
+
+    vectors : np.ndarray
+        Array of shape (n_configs, n_hyperparameters). Inactive hyperparameters are NaN.
+    rng : np.random.RandomState
+
+    num_neighbors : int
+        Number of neighbors per numerical hyperparameter.
+    stdev : float
+        Standard deviation of the moves of numerical hyperparameters.
+
+    Returns
+    -------
+    neighbors : np.ndarray
+        Array of shape (n_neighbors, n_hyperparameters).
+    owners : np.ndarray
+        Index of the configuration of every neighbor. The neighbors of one
+        configuration are contiguous and in random order.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, len(configuration_space.get_hyperparameters()))
+    all_owners, all_values, all_columns = [], [], []
+    for hp in configuration_space.get_hyperparameters():
+        idx = configuration_space.get_idx_by_hyperparameter_name(hp.name)
+        active = np.nonzero(np.isfinite(vectors[:, idx]))[0]
+        if len(active) == 0 or isinstance(hp, Constant):
+            continue
+        current = vectors[active, idx]
+
+        if isinstance(hp, CategoricalHyperparameter):
+            choices = np.arange(hp.num_choices, dtype=np.float64)
+            values = np.broadcast_to(choices, (len(active), hp.num_choices))
+            mask = values != current[:, None]
+        elif isinstance(hp, OrdinalHyperparameter):
+            values = current[:, None] + np.array([-1.0, 1.0])
+            mask = (values >= 0) & (values < hp.num_elements)
+        elif isinstance(hp, UniformFloatHyperparameter):
+            # truncated normal moves by rejection, like UniformFloatHyperparameter.get_neighbors
+            values = rng.normal(current[:, None], stdev, size=(len(active), num_neighbors))
+            invalid = (values < 0) | (values > 1)
+            while np.any(invalid):
+                values[invalid] = rng.normal(np.broadcast_to(current[:, None], values.shape)[invalid], stdev)
+                invalid = (values < 0) | (values > 1)
+            mask = np.ones_like(values, dtype=bool)
+        else:
+            # integer and normal hyperparameters: few walkers, use ConfigSpace per configuration
+            n_hp_neighbors = hp.get_num_neighbors(hp._transform(current[0]))
+            if isinstance(hp, NumericalHyperparameter):
+                n_hp_neighbors = min(num_neighbors, n_hp_neighbors)
+            if n_hp_neighbors == 0:
+                continue
+            kwargs = dict(std=stdev) if isinstance(hp, UniformIntegerHyperparameter) else dict()
+            neighbors = [np.unique(hp.get_neighbors(value, rng, number=n_hp_neighbors, **kwargs))
+                         for value in current]
+            width = max(len(n) for n in neighbors)
+            values = np.zeros((len(active), width))
+            mask = np.zeros((len(active), width), dtype=bool)
+            for i, n in enumerate(neighbors):
+                n = n[n != current[i]]
+                values[i, :len(n)] = n
+                mask[i, :len(n)] = True
+
+        rows, cols = np.nonzero(mask)
+        all_owners.append(active[rows])
+        all_values.append(values[rows, cols])
+        all_columns.append(np.full(len(rows), idx))
+
+    if len(all_owners) == 0:
+        return np.empty((0, vectors.shape[1])), np.empty(0, dtype=np.int64)
+    owners = np.concatenate(all_owners)
+    columns = np.concatenate(all_columns)
+    neighbors = vectors[owners]
+    neighbors[np.arange(len(owners)), columns] = np.concatenate(all_values)
+    neighbors = correct_configuration_array(configuration_space, neighbors, impute_activated=True)
+
+    valid = ~is_forbidden_array(configuration_space, neighbors)
+    neighbors, owners = neighbors[valid], owners[valid]
+    # random order within every neighborhood
+    order = rng.permutation(len(owners))
+    order = order[np.argsort(owners[order], kind='stable')]
+    return neighbors[order], owners[order]
+
+
+def correct_configuration_array(
+        configuration_space: ConfigurationSpace,
+        vectors: np.ndarray,
+        impute_activated: bool = True,
+) -> np.ndarray:
+    """Set the activity of all conditional hyperparameters according to their conditions.
+
+    Inactive hyperparameters are set to NaN. If ``impute_activated``, hyperparameters
+    which become active are set to their default, else their values are kept.
+    Conditions are evaluated for all configurations at once, in topological order.
+    """
+    for hp in configuration_space.get_hyperparameters():
+        conditions = configuration_space.get_parent_conditions_of(hp.name)
+        if len(conditions) == 0:
+            continue
+        idx = configuration_space.get_idx_by_hyperparameter_name(hp.name)
+        active = np.ones(vectors.shape[0], dtype=bool)
+        for condition in conditions:
+            active &= _evaluate_condition_array(configuration_space, condition, vectors)
+        vectors[~active, idx] = np.nan
+        if impute_activated:
+            activated = active & ~np.isfinite(vectors[:, idx])
+            vectors[activated, idx] = hp.normalized_default_value
+    return vectors
+
+
+def is_forbidden_array(
+        configuration_space: ConfigurationSpace,
+        vectors: np.ndarray,
+) -> np.ndarray:
+    """Returns a boolean mask of the configurations forbidden by any forbidden clause."""
+    forbidden = np.zeros(vectors.shape[0], dtype=bool)
+    for clause in configuration_space.forbidden_clauses:
+        forbidden |= _evaluate_forbidden_array(configuration_space, clause, vectors)
+    return forbidden
+
+
+def _evaluate_condition_array(configuration_space: ConfigurationSpace, condition, vectors: np.ndarray) -> np.ndarray:
+    if isinstance(condition, AbstractConjunction):
+        results = [_evaluate_condition_array(configuration_space, c, vectors) for c in condition.components]
+        if isinstance(condition, AndConjunction):
+            return np.logical_and.reduce(results)
+        elif isinstance(condition, OrConjunction):
+            return np.logical_or.reduce(results)
+    else:
+        values = vectors[:, configuration_space.get_idx_by_hyperparameter_name(condition.parent.name)]
+        parent_active = np.isfinite(values)
+        if isinstance(condition, EqualsCondition):
+            return parent_active & (values == condition.vector_value)
+        elif isinstance(condition, NotEqualsCondition):
+            return parent_active & (values != condition.vector_value)
+        elif isinstance(condition, InCondition):
+            return parent_active & np.isin(values, condition.vector_values)
+        elif isinstance(condition, GreaterThanCondition):
+            return parent_active & (values > condition.vector_value)
+        elif isinstance(condition, LessThanCondition):
+            return parent_active & (values < condition.vector_value)
+    return np.array([condition.evaluate_vector(vector) for vector in vectors], dtype=bool)
+
+
+def _evaluate_forbidden_array(configuration_space: ConfigurationSpace, clause, vectors: np.ndarray) -> np.ndarray:
+    if isinstance(clause, ForbiddenAndConjunction):
+        return np.logical_and.reduce([_evaluate_forbidden_array(configuration_space, c, vectors)
+                                      for c in clause.components])
+    elif isinstance(clause, (ForbiddenEqualsClause, ForbiddenInClause)):
+        values = vectors[:, configuration_space.get_idx_by_hyperparameter_name(clause.hyperparameter.name)]
+        if isinstance(clause, ForbiddenEqualsClause):
+            return values == clause.vector_value
+        return np.isin(values, clause.vector_values)
+    return np.array([clause.is_forbidden_vector(vector, strict=False) for vector in vectors], dtype=bool)
@@ -1,8 +1,10 @@
 # License: MIT
 
+import os
 import sys
 import time
 import json
+import bisect
 import collections
 from typing import List, Union
 import numpy as np
@@ -10,8 +12,9 @@ from ConfigSpace import CategoricalHyperparameter, OrdinalHyperparameter, Consta
 from openbox.utils.constants import MAXINT, SUCCESS
 from openbox.utils.config_space import Configuration, ConfigurationSpace
 from openbox.utils.logging_utils import get_logger
-from openbox.utils.multi_objective import Hypervolume, get_pareto_front
+from openbox.utils.multi_objective import Hypervolume, IncrementalHypervolume, get_pareto_front
 from openbox.utils.config_space.space_utils import get_config_from_dict, get_config_values
+from openbox.utils.config_space.util import impute_default_values, get_config_key, get_vector_key
 from openbox.utils.visualization.plot_convergence import plot_convergence
 from openbox.core.base import Observation
 from openbox.utils.transform import get_transform_function
@@ -20,6 +23,64 @@ Perf = collections.namedtuple(
     'perf', ['cost', 'time', 'status', 'additional_info'])
 
 
+class ConfigurationIndex(object):
+    """
+    Hash index of configurations, keyed by the encoded vector of each configuration (see get_config_key).
+
+    Supports O(1) membership test, position lookup (position of the first insertion) and removal.
+    A configuration may be added multiple times; it stays in the index until removed as many times.
+    """
+
+    def __init__(self, configs=None):
+        self._index = collections.OrderedDict()  # key -> [config, position of first insertion, count]
+        self._size = 0
+        self._num_added = 0
+        if configs is not None:
+            for config in configs:
+                self.add(config)
+
+    def add(self, config: Configuration):
+        key = get_config_key(config)
+        item = self._index.get(key)
+        if item is None:
+            self._index[key] = [config, self._num_added, 1]
+        else:
+            item[2] += 1
+        self._size += 1
+        self._num_added += 1
+
+    def remove(self, config: Configuration):
+        key = get_config_key(config)
+        item = self._index.get(key)
+        if item is None:
+            raise ValueError('Configuration not in index: %s' % config)
+        item[2] -= 1
+        if item[2] == 0:
+            self._index.pop(key)
+        self._size -= 1
+
+    def index(self, config: Configuration):
+        item = self._index.get(get_config_key(config))
+        if item is None:
+            raise ValueError('Configuration not in index: %s' % config)
+        return item[1]
+
+    def __contains__(self, config: Configuration):
+        return get_config_key(config) in self._index
+
+    def contains_vector(self, vector: np.ndarray):
+        """Membership test of an encoded configuration vector (inactive hyperparameters are NaN)."""
+        return get_vector_key(vector) in self._index
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for config, _, count in self._index.values():
+            for _ in range(count):
+                yield config
+
+
 class HistoryContainer(object):
     def __init__(self, task_id, num_constraints=0, config_space=None):
         self.task_id = task_id
@@ -40,6 +101,9 @@ class HistoryContainer(object):
 
         self.update_times = list()  # record all update times
 
+        self.config_index = ConfigurationIndex()  # index of self.configurations
+        self.running_config_index = ConfigurationIndex()  # configurations under evaluation
+
         self.successful_perfs = list()  # perfs of successful trials
         self.failed_index = list()
         self.transform_perf_index = list()
@@ -50,6 +114,127 @@ class HistoryContainer(object):
         self.min_y = None
         self.max_y = MAXINT
 
+        # journal (see save_journal)
+        self._journal_fn = None
+        self._num_journaled = 0
+        self._num_snapshotted = 0
+
+        # Array-backed storage. Buffers are allocated on the first observation and grown geometrically,
+        # so that X/Y/cY can be returned as views instead of being rebuilt from the lists above.
+        self._capacity = 0
+        self._config_array = None  # encoded configurations (inactive hyperparameters imputed)
+        self._perf_array = None  # raw objectives
+        self._transformed_perf_array = None  # objectives with transform_perf_index rows set to max_y
+        self._constraint_array = None  # raw constraints (nan if not provided)
+        self._transformed_constraint_array = None  # constraints with failed rows set to max_c
+        self._trial_state_array = None
+        self._failed_mask = None
+        self._transform_mask = None
+        self._sorted_successful_perfs = None  # sorted perfs of each objective, for incremental percentile
+        self._max_c = None
+
+    def _ensure_capacity(self, config: Configuration, num_new=1):
+        num_data = len(self.perfs)
+        if num_data + num_new <= self._capacity:
+            return
+
+        if self._config_array is None:
+            n_dims = len(config.configuration_space.get_hyperparameters())
+            capacity = max(64, num_new)
+            self._config_array = np.empty((capacity, n_dims), dtype=np.float64)
+            self._perf_array = np.empty((capacity, self.num_objs), dtype=np.float64)
+            self._transformed_perf_array = np.empty((capacity, self.num_objs), dtype=np.float64)
+            self._constraint_array = np.empty((capacity, self.num_constraints), dtype=np.float64)
+            self._transformed_constraint_array = np.empty((capacity, self.num_constraints), dtype=np.float64)
+            self._trial_state_array = np.empty(capacity, dtype=np.int64)
+            self._failed_mask = np.zeros(capacity, dtype=bool)
+            self._transform_mask = np.zeros(capacity, dtype=bool)
+            self._sorted_successful_perfs = [list() for _ in range(self.num_objs)]
+            self._capacity = capacity
+            return
+
+        capacity = max(self._capacity * 2, num_data + num_new)
+
+        def grow(array):
+            new_array = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            new_array[:num_data] = array[:num_data]
+            return new_array
+
+        self._config_array = grow(self._config_array)
+        self._perf_array = grow(self._perf_array)
+        self._transformed_perf_array = grow(self._transformed_perf_array)
+        self._constraint_array = grow(self._constraint_array)
+        self._transformed_constraint_array = grow(self._transformed_constraint_array)
+        self._trial_state_array = grow(self._trial_state_array)
+        self._failed_mask = grow(self._failed_mask)
+        self._transform_mask = grow(self._transform_mask)
+        self._capacity = capacity
+
+    def _append_arrays(self, config: Configuration, objs, constraints, trial_state,
+                       transform_perf: bool, failed: bool):
+        """
+        Append one observation to the array buffers. Must be called before the new perf is appended to self.perfs.
+        """
+        self._ensure_capacity(config)
+        idx = len(self.perfs)
+
+        config_array = np.array([config.get_array()], dtype=np.float64)
+        self._config_array[idx] = impute_default_values(config.configuration_space, config_array)[0]
+        self._perf_array[idx] = objs
+        self._trial_state_array[idx] = trial_state
+        self._failed_mask[idx] = failed
+        self._transform_mask[idx] = transform_perf
+
+        if transform_perf:
+            self._transformed_perf_array[idx] = self.max_y
+        else:
+            self._transformed_perf_array[idx] = objs
+
+        if self.num_constraints > 0:
+            if constraints is None:
+                self._constraint_array[idx] = np.nan
+            else:
+                self._constraint_array[idx] = constraints
+                if self._max_c is None:
+                    self._max_c = np.array(constraints, dtype=np.float64)
+                    max_c_changed = True
+                else:
+                    max_c_changed = np.any(self._constraint_array[idx] > self._max_c)
+                    np.maximum(self._max_c, self._constraint_array[idx], out=self._max_c)
+                if max_c_changed:
+                    self._transformed_constraint_array[:idx][self._failed_mask[:idx]] = self._max_c
+            if failed:
+                self._transformed_constraint_array[idx] = 1.0 if self._max_c is None else self._max_c
+            else:
+                self._transformed_constraint_array[idx] = constraints
+
+    def _update_perf_statistics(self, objs):
+        """
+        Maintain running min/max/percentile of successful perfs without rescanning the history.
+        """
+        n = len(self.successful_perfs)
+        for i, sorted_perfs in enumerate(self._sorted_successful_perfs):
+            bisect.insort(sorted_perfs, objs[i])
+
+        # linear interpolation, same as np.percentile
+        rank = self.scale_perc / 100 * (n - 1)
+        lo = int(np.floor(rank))
+        hi = min(lo + 1, n - 1)
+        frac = rank - lo
+        perc = np.array([s[lo] + (s[hi] - s[lo]) * frac for s in self._sorted_successful_perfs])
+        min_y = [s[0] for s in self._sorted_successful_perfs]
+        max_y = [s[-1] for s in self._sorted_successful_perfs]
+
+        if self.num_objs == 1:
+            self.perc, self.min_y, max_y = perc[0], min_y[0], max_y[0]
+        else:
+            self.perc, self.min_y = perc, min_y
+
+        if max_y != self.max_y:
+            self.max_y = max_y
+            num_data = len(self.perfs)
+            self._transformed_perf_array[:num_data][self._transform_mask[:num_data]] = self.max_y
+
     def update_observation(self, observation: Observation):
         self.update_times.append(time.time() - self.global_start_time)
 
@@ -59,17 +244,9 @@ class HistoryContainer(object):
         trial_state = observation.trial_state
         elapsed_time = observation.elapsed_time
 
-        self.configurations.append(config)
-        if self.num_objs == 1:
-            self.perfs.append(objs[0])
-        else:
-            self.perfs.append(objs)
-        self.constraint_perfs.append(constraints)  # None if no constraint
-        self.trial_states.append(trial_state)
-        self.elapsed_times.append(elapsed_time)
-
         transform_perf = False
         failed = False
+        feasible = True
         if trial_state == SUCCESS and all(perf < MAXINT for perf in objs):
             if self.num_constraints > 0 and constraints is None:
                 self.logger.error('Constraint is None in a SUCCESS trial!')
@@ -77,39 +254,58 @@ class HistoryContainer(object):
                 transform_perf = True
             else:
                 # If infeasible, transform perf to the largest found objective value
-                feasible = True
                 if self.num_constraints > 0 and any(c > 0 for c in constraints):
                     transform_perf = True
                     feasible = False
-
-                if self.num_objs == 1:
-                    self.successful_perfs.append(objs[0])
-                    if feasible:
-                        self.add(config, objs[0])
-                    else:
-                        self.add(config, MAXINT)
-                else:
-                    self.successful_perfs.append(objs)
-                    if feasible:
-                        self.add(config, objs)
-                    else:
-                        self.add(config, [MAXINT] * self.num_objs)
-
-                self.perc = np.percentile(self.successful_perfs, self.scale_perc, axis=0)
-                self.min_y = np.min(self.successful_perfs, axis=0).tolist()
-                self.max_y = np.max(self.successful_perfs, axis=0).tolist()
-
         else:
             # failed trial
             failed = True
             transform_perf = True
 
+        self._append_arrays(config, objs, constraints, trial_state, transform_perf, failed)
+
+        self.configurations.append(config)
+        self.config_index.add(config)
+        if self.num_objs == 1:
+            self.perfs.append(objs[0])
+        else:
+            self.perfs.append(objs)
+        self.constraint_perfs.append(constraints)  # None if no constraint
+        self.trial_states.append(trial_state)
+        self.elapsed_times.append(elapsed_time)
+
+        if not failed:
+            if self.num_objs == 1:
+                self.successful_perfs.append(objs[0])
+                if feasible:
+                    self.add(config, objs[0])
+                else:
+                    self.add(config, MAXINT)
+            else:
+                self.successful_perfs.append(objs)
+                if feasible:
+                    self.add(config, objs)
+                else:
+                    self.add(config, [MAXINT] * self.num_objs)
+
+            self._update_perf_statistics(objs)
+
         cur_idx = len(self.perfs) - 1
         if transform_perf:
             self.transform_perf_index.append(cur_idx)
         if failed:
             self.failed_index.append(cur_idx)
 
+    def update_observations(self, observations: List[Observation]):
+        """
+        Bulk version of update_observation. Buffers are grown once for all observations.
+        """
+        observations = list(observations)
+        if observations:
+            self._ensure_capacity(observations[0].config, num_new=len(observations))
+        for observation in observations:
+            self.update_observation(observation)
+
     def add(self, config: Configuration, perf: Perf):
         if config in self.data:
             self.logger.warning('Repeated configuration detected!')
@@ -128,13 +324,28 @@ class HistoryContainer(object):
             self.incumbent_value = perf
             self.incumbents.append((config, perf))
 
+    def get_config_array(self):
+        """
+        Get encoded configurations of all trials (inactive hyperparameters imputed with default values).
+        Equivalent to convert_configurations_to_array(self.configurations) but returns a read-only view.
+        Rows of the buffer are written once, so the view never changes after later updates.
+        """
+        num_data = len(self.perfs)
+        if self._config_array is None:
+            return np.empty((0, 0), dtype=np.float64)
+        return self._read_only_view(self._config_array[:num_data])
+
     def get_transformed_perfs(self, transform=None):
         # set perf of failed trials to current max
-        transformed_perfs = self.perfs.copy()
-        for i in self.transform_perf_index:
-            transformed_perfs[i] = self.max_y
+        # the buffer is rewritten in place when the max changes, so a copy is returned
+        num_data = len(self.perfs)
+        if self._transformed_perf_array is None:
+            transformed_perfs = np.empty((0, self.num_objs) if self.num_objs > 1 else (0,), dtype=np.float64)
+        elif self.num_objs == 1:
+            transformed_perfs = self._transformed_perf_array[:num_data, 0].copy()
+        else:
+            transformed_perfs = self._transformed_perf_array[:num_data].copy()
 
-        transformed_perfs = np.array(transformed_perfs, dtype=np.float64)
         transformed_perfs = get_transform_function(transform)(transformed_perfs)
         return transformed_perfs
 
@@ -142,16 +353,23 @@ class HistoryContainer(object):
         if self.num_constraints == 0:
             return None
 
-        transformed_constraint_perfs = self.constraint_perfs.copy()
-        success_constraint_perfs = [c for c in transformed_constraint_perfs if c is not None]
-        max_c = np.max(success_constraint_perfs, axis=0) if success_constraint_perfs else [1.0] * self.num_constraints
-        for i in self.failed_index:
-            transformed_constraint_perfs[i] = max_c
+        # set constraint perf of failed trials to current max
+        # the buffer is rewritten in place when the max changes, so a copy is returned
+        num_data = len(self.perfs)
+        if self._transformed_constraint_array is None:
+            transformed_constraint_perfs = np.empty((0, self.num_constraints), dtype=np.float64)
+        else:
+            transformed_constraint_perfs = self._transformed_constraint_array[:num_data].copy()
 
-        transformed_constraint_perfs = np.array(transformed_constraint_perfs, dtype=np.float64)
         transformed_constraint_perfs = get_transform_function(transform)(transformed_constraint_perfs)
         return transformed_constraint_perfs
 
+    @staticmethod
+    def _read_only_view(array: np.ndarray):
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
     def get_perf(self, config: Configuration):
         return self.data[config]
 
@@ -372,6 +590,40 @@ class HistoryContainer(object):
         importance_table = AsciiTable(table_data).table
         return importance_table
 
+    def _get_data_item(self, idx):
+        config = self.configurations[idx]
+        perf = self.perfs[idx]
+        constraint_perf = self.constraint_perfs[idx]
+
+        config_dict = config.get_dictionary()
+        _perf = [float(p) for p in perf] if self.num_objs > 1 else float(perf)
+        _constraint_perf = [float(c) for c in constraint_perf] if self.num_constraints > 0 else constraint_perf
+
+        data_item = dict(
+            index=idx,
+            config=config_dict,
+            perf=_perf,
+            constraint_perf=_constraint_perf,
+            trial_state=self.trial_states[idx],
+            elapsed_time=self.elapsed_times[idx],
+        )
+        return data_item
+
+    def _get_observation(self, data_item, config_space: ConfigurationSpace):
+        config_dict = data_item['config']
+        perf = data_item['perf']
+        constraint_perf = data_item['constraint_perf']
+        trial_state = data_item['trial_state']
+        elapsed_time = data_item['elapsed_time']
+
+        config = get_config_from_dict(config_dict, config_space)
+        objs = perf if self.num_objs > 1 else [perf]
+
+        observation = Observation(
+            config=config, objs=objs, constraints=constraint_perf, trial_state=trial_state,
+            elapsed_time=elapsed_time)
+        return observation
+
     def save_json(self, fn: str = "history_container.json"):
         """
         saves runhistory on disk
@@ -382,23 +634,7 @@ class HistoryContainer(object):
             file name
         """
 
-        data = []
-        for idx, (config, perf, constraint_perf, trial_state, elapsed_time) in enumerate(zip(
-                self.configurations, self.perfs, self.constraint_perfs, self.trial_states, self.elapsed_times,
-        )):
-            config_dict = config.get_dictionary()
-            _perf = [float(p) for p in perf] if self.num_objs > 1 else float(perf)
-            _constraint_perf = [float(c) for c in constraint_perf] if self.num_constraints > 0 else constraint_perf
-
-            data_item = dict(
-                index=idx,
-                config=config_dict,
-                perf=_perf,
-                constraint_perf=_constraint_perf,
-                trial_state=trial_state,
-                elapsed_time=elapsed_time,
-            )
-            data.append(data_item)
+        data = [self._get_data_item(idx) for idx in range(len(self.configurations))]
 
         with open(fn, 'w') as fp:
             json.dump({'data': data}, fp, indent=2)
@@ -429,22 +665,136 @@ class HistoryContainer(object):
             )
             return
 
-        for data_item in all_data['data']:
-            config_dict = data_item['config']
-            perf = data_item['perf']
-            constraint_perf = data_item['constraint_perf']
-            trial_state = data_item['trial_state']
-            elapsed_time = data_item['elapsed_time']
+        self.update_observations(self._get_observation(data_item, config_space) for data_item in all_data['data'])
 
-            config = get_config_from_dict(config_dict, config_space)
-            objs = perf if self.num_objs > 1 else [perf]
+        self.logger.info('Load history from %s. len = %d.' % (fn, len(all_data['data'])))
 
-            observation = Observation(
-                config=config, objs=objs, constraints=constraint_perf, trial_state=trial_state,
-                elapsed_time=elapsed_time)
-            self.update_observation(observation)
+    def save_journal(self, fn: str = "history_container.jsonl", snapshot_interval: int = 1000,
+                     overwrite: bool = False):
+        """
+        Saves runhistory on disk as an append-only journal (one json record per line).
 
-        self.logger.info('Load history from %s. len = %d.' % (fn, len(all_data['data'])))
+        Only observations that are not yet in the journal are appended, so calling this method
+        after every observation costs O(1) I/O. Every snapshot_interval observations, the whole
+        history is compacted into a snapshot file (fn + '.snapshot') and the journal is emptied.
+
+        An existing journal is only appended to if this history was loaded from it
+        (see load_history_from_journal). Otherwise, a FileExistsError is raised unless overwrite is True.
+
+        Parameters
+        ----------
+        fn : str
+            file name of the journal
+        snapshot_interval : int
+            number of journal records between two snapshots. Set to 0 to disable snapshots.
+        overwrite : bool
+            whether to replace an existing journal which this history was not loaded from
+        """
+        snapshot_fn = fn + '.snapshot'
+        num_data = len(self.configurations)
+
+        if self._journal_fn != os.path.abspath(fn):
+            if not overwrite and (os.path.exists(fn) or os.path.exists(snapshot_fn)):
+                raise FileExistsError('History journal %s already exists. Load the history from it with '
+                                      'load_history_from_journal to continue it, or set overwrite=True '
+                                      'to replace it.' % fn)
+            # start a new journal
+            if os.path.exists(snapshot_fn):
+                os.remove(snapshot_fn)
+            open(fn, 'w').close()
+            self._journal_fn = os.path.abspath(fn)
+            self._num_journaled = 0
+            self._num_snapshotted = 0
+
+        if snapshot_interval > 0 and num_data - self._num_snapshotted >= snapshot_interval:
+            self._save_snapshot(snapshot_fn)
+            # Records in journal whose index < len(snapshot) are skipped when loading,
+            # so it is safe to crash before the journal is emptied.
+            open(fn, 'w').close()
+            self._num_journaled = self._num_snapshotted = num_data
+            self.logger.info('Save history snapshot to %s. len = %d.' % (snapshot_fn, num_data))
+            return
+
+        if self._num_journaled == num_data:
+            return
+        with open(fn, 'a') as fp:
+            for idx in range(self._num_journaled, num_data):
+                fp.write(json.dumps(self._get_data_item(idx)) + '\n')
+            fp.flush()
+            os.fsync(fp.fileno())
+        self._num_journaled = num_data
+
+    def _save_snapshot(self, snapshot_fn):
+        data = [self._get_data_item(idx) for idx in range(len(self.configurations))]
+        tmp_fn = snapshot_fn + '.tmp'
+        with open(tmp_fn, 'w') as fp:
+            json.dump({'data': data}, fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_fn, snapshot_fn)
+
+    def _read_journal(self, fn):
+        """
+        Stream data items from a journal. A truncated or corrupted tail (e.g. after a crash) is dropped
+        and cut from the file, so that the journal can be appended again.
+        """
+        valid_size = 0
+        error = None
+        with open(fn, 'rb') as fp:
+            for line in fp:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('Incomplete record.')
+                    data_item = json.loads(line)
+                except ValueError as e:
+                    error = e
+                    break
+                valid_size += len(line)
+                yield data_item
+
+        if error is not None:
+            file_size = os.path.getsize(fn)
+            self.logger.warning('Drop %d bytes of broken tail in history journal %s: %s'
+                                % (file_size - valid_size, fn, error))
+            os.truncate(fn, valid_size)
+
+    def load_history_from_journal(self, fn: str = "history_container.jsonl", config_space: ConfigurationSpace = None):
+        """Load history in journal representation (see save_journal) from disk.
+        Parameters
+        ----------
+        fn : str
+            file name of the journal to load from
+        config_space : ConfigSpace
+            instance of configuration space
+        """
+
+        if config_space is None:
+            config_space = self.config_space
+        if config_space is None:
+            raise ValueError('Please provide config_space to load_history_from_journal!')
+
+        num_data_before = len(self.configurations)
+        snapshot_fn = fn + '.snapshot'
+        num_snapshotted = 0
+        if os.path.exists(snapshot_fn):
+            with open(snapshot_fn, 'r') as fp:
+                snapshot_data = json.load(fp)['data']
+            num_snapshotted = len(snapshot_data)
+            self.update_observations(self._get_observation(data_item, config_space) for data_item in snapshot_data)
+
+        if os.path.exists(fn):
+            self.update_observations(
+                self._get_observation(data_item, config_space) for data_item in self._read_journal(fn)
+                if data_item['index'] >= num_snapshotted
+            )
+
+        num_loaded = len(self.configurations) - num_data_before
+        if num_data_before == 0:
+            # continue appending to the loaded journal
+            self._journal_fn = os.path.abspath(fn)
+            self._num_journaled = num_loaded
+            self._num_snapshotted = num_snapshotted
+        self.logger.info('Load history from %s. len = %d.' % (fn, num_loaded))
 
 
 class MOHistoryContainer(HistoryContainer):
@@ -460,6 +810,7 @@ class MOHistoryContainer(HistoryContainer):
         self.mo_incumbents = [list() for _ in range(self.num_objs)]
         self.ref_point = ref_point
         self.hv_data = list()
+        self._hv_tracker = IncrementalHypervolume(ref_point) if ref_point is not None else None
 
         self.max_y = [MAXINT] * self.num_objs
 
@@ -500,14 +851,9 @@ class MOHistoryContainer(HistoryContainer):
                 self.mo_incumbent_value[i] = perf[i]
                 self.mo_incumbents[i].append((config, perf[i], perf))
 
-        # Calculate current hypervolume if reference point is provided
-        if self.ref_point is not None:
-            pareto_front = self.get_pareto_front()
-            if pareto_front:
-                hv = Hypervolume(ref_point=self.ref_point).compute(pareto_front)
-            else:
-                hv = 0
-            self.hv_data.append(hv)
+        # Update current hypervolume incrementally if reference point is provided
+        if self._hv_tracker is not None:
+            self.hv_data.append(self._hv_tracker.add(perf))
 
     def get_incumbents(self):
         return self.get_pareto()
@@ -531,6 +877,8 @@ class MOHistoryContainer(HistoryContainer):
         if ref_point is None:
             ref_point = self.ref_point
         assert ref_point is not None
+        if self._hv_tracker is not None and np.array_equal(ref_point, self.ref_point):
+            return self._hv_tracker.hypervolume
         pareto_front = self.get_pareto_front()
         if pareto_front:
             hv = Hypervolume(ref_point=ref_point).compute(pareto_front)
@@ -538,6 +886,20 @@ class MOHistoryContainer(HistoryContainer):
             hv = 0
         return hv
 
+    def get_hypervolume_contributions(self):
+        """
+        Get the exclusive hypervolume contribution of each pareto point w.r.t. ref_point.
+
+        Returns
+        -------
+        A list aligned with get_pareto(). Points not better than ref_point contribute 0.
+        """
+        assert self._hv_tracker is not None, 'Please provide ref_point to compute hypervolume contributions!'
+        front = self._hv_tracker.get_pareto_front()
+        contributions = self._hv_tracker.get_contributions()
+        contribution_dict = {tuple(point): c for point, c in zip(front.tolist(), contributions.tolist())}
+        return [contribution_dict.get(tuple(float(p) for p in perf), 0.0) for perf in self.pareto.values()]
+
     def plot_convergence(self, *args, **kwargs):
         raise NotImplementedError('plot_convergence only supports single objective!')
 
@@ -598,6 +960,9 @@ class MultiStartHistoryContainer(object):
     def update_observation(self, observation: Observation):
         return self.current.update_observation(observation)
 
+    def update_observations(self, observations: List[Observation]):
+        return self.current.update_observations(observations)
+
     def add(self, config: Configuration, perf: Perf):
         self.current.add(config, perf)
 
@@ -621,6 +986,17 @@ class MultiStartHistoryContainer(object):
     def successful_perfs(self):
         return self.current.successful_perfs
 
+    @property
+    def config_index(self):
+        return self.current.config_index
+
+    @property
+    def running_config_index(self):
+        return self.current.running_config_index
+
+    def get_config_array(self):
+        return self.current.get_config_array()
+
     def get_transformed_perfs(self, *args, **kwargs):
         return self.current.get_transformed_perfs(*args, **kwargs)
 
@@ -686,3 +1062,30 @@ class MultiStartHistoryContainer(object):
             instance of configuration space
         """
         self.current.load_history_from_json(fn, config_space)
+
+    def save_journal(self, fn: str = "history_container.jsonl", snapshot_interval: int = 1000,
+                     overwrite: bool = False):
+        """
+        Saves runhistory on disk as an append-only journal.
+
+        Parameters
+        ----------
+        fn : str
+            file name of the journal
+        snapshot_interval : int
+            number of journal records between two snapshots. Set to 0 to disable snapshots.
+        overwrite : bool
+            whether to replace an existing journal which this history was not loaded from
+        """
+        self.current.save_journal(fn, snapshot_interval, overwrite)
+
+    def load_history_from_journal(self, fn: str = "history_container.jsonl", config_space: ConfigurationSpace = None):
+        """Load history in journal representation from disk.
+        Parameters
+        ----------
+        fn : str
+            file name of the journal to load from
+        config_space : ConfigSpace
+            instance of configuration space
+        """
+        self.current.load_history_from_journal(fn, config_space)
@@ -1,6 +1,7 @@
 # License: MIT
 
-from .hypervolume import Hypervolume
+from .hypervolume import Hypervolume, IncrementalHypervolume
 from .scalarization import get_chebyshev_scalarization
-from .box_decomposition import NondominatedPartitioning
-from .pareto import get_pareto_front
+from .box_decomposition import NondominatedPartitioning, IncrementalNondominatedPartitioning, APPROX_MAX_CELLS
+from .pareto import get_pareto_front, is_non_dominated, non_dominated_sort, crowding_distance, \
+    pareto_layers, pareto_frontier
@@ -12,6 +12,11 @@ References
     2012 IEEE Congress on Evolutionary Computation, Brisbane, QLD, 2012,
     pp. 1-8.
 
+.. [Lacour2017]
+    R. Lacour, K. Klamroth and C. Fonseca, "A box decomposition algorithm to
+    compute the hypervolume indicator," Computers & Operations Research,
+    Volume 79, 2017, pp. 347-360.
+
 """
 
 from typing import Optional
@@ -19,6 +24,9 @@ import numpy as np
 
 from openbox.utils.multi_objective.pareto import is_non_dominated
 
+# Maximum number of hypercells of the approximate partitioning used by the advisors for m >= 4 objectives
+APPROX_MAX_CELLS = 1024
+
 
 class NondominatedPartitioning(object):
     r"""A class for partitioning the non-dominated space into hyper-cells.
@@ -292,6 +300,37 @@ class NondominatedPartitioning(object):
         cell_bounds_values = aug_pareto_Y[indexers].reshape(2, -1, self.num_objs)
         return cell_bounds_values
 
+    def _get_lower_bounds(self, Z: np.ndarray) -> np.ndarray:
+        # the cell of the local upper bound u is bounded below by the defining points of
+        # the next components: lower_j = max_{k > j} z^k(u)_j, lower_m = -inf
+        next_objs = np.arange(self.num_objs)[:, None] > np.arange(self.num_objs)[None, :]
+        return np.where(next_objs, Z, -np.inf).max(axis=1)
+
+    def compute_hypervolume_improvement(self, y: np.ndarray, ref_point: np.ndarray) -> float:
+        r"""Compute the hypervolume improvement of a point without inserting it.
+
+        Note: This assumes minimization.
+
+        The improvement is the volume of the non-dominated cells within the box
+        between y and the reference point. Only the cells of the local upper bounds
+        dominated by y intersect the box. All cells are taken into account,
+        regardless of `max_cells`.
+
+        Args:
+            y: A `m`-dim array of outcomes.
+            ref_point: A `m`-dim array containing the reference point.
+
+        Returns:
+            The hypervolume improvement. It is zero iff y is weakly dominated by
+            the pareto front or not better than the reference point.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        ref_point = np.asarray(ref_point, dtype=np.float64)
+        y_dominates_U = (self._U > y).all(axis=-1)
+        lower = np.maximum(self._get_lower_bounds(self._Z[y_dominates_U]), y)
+        upper = np.minimum(self._U[y_dominates_U], ref_point)
+        return float((upper - lower).clip(min=0).prod(axis=-1).sum())
+
     def compute_hypervolume(self, ref_point: np.ndarray) -> float:
         r"""Compute the hypervolume for the given reference point.
 
@@ -325,3 +364,210 @@ class NondominatedPartitioning(object):
             (cell_bounds_values[1] - cell_bounds_values[0]).prod(axis=-1).sum()
         )
         return total_volume - non_dom_volume
+
+
+class IncrementalNondominatedPartitioning(object):
+    r"""A partitioning of the non-dominated space into hyper-cells, updated
+    incrementally as points are added.
+
+    Note: this assumes minimization.
+
+    The non-dominated space is the union of the boxes below the local upper
+    bounds of the pareto front. When a point is inserted, only the local upper
+    bounds dominated by the point are replaced [Lacour2017]_, and the pareto
+    points it dominates are removed. Every local upper bound u defines one cell
+    with upper vertex u, so the cells are rebuilt from the local upper bounds in
+    a single vectorized pass instead of partitioning the space from scratch.
+
+    The number of cells grows quickly with the number of objectives. For `m>=4`
+    objectives, `max_cells` can be set to obtain an approximate partitioning:
+    only the `max_cells` cells with the largest volume between the ideal point
+    and the reference point are kept, the others are discarded as in the
+    approximate decomposition of `NondominatedPartitioning` (alpha > 0).
+    """
+
+    def __init__(
+        self,
+        num_objs: int,
+        Y: Optional[np.ndarray] = None,
+        max_cells: Optional[int] = None,
+    ) -> None:
+        """Initialize IncrementalNondominatedPartitioning.
+
+        Args:
+            num_objs: The number of objective functions
+            Y: A `n x m`-dim array
+            max_cells: maximum number of hypercells returned by `get_hypercell_bounds`.
+                None means an exact partitioning.
+        """
+        self.num_objs = num_objs
+        self.max_cells = max_cells
+        self.reset()
+        if Y is not None:
+            self.update(Y=Y)
+
+    def reset(self) -> None:
+        r"""Reset the partitioning to the whole space."""
+        m = self.num_objs
+        self.Y = np.empty((0, m))
+        self._pareto_Y = np.empty((0, m))
+        # local upper bounds. Start with a single bound at infinity.
+        # The reference point is only applied in get_hypercell_bounds.
+        self._U = np.full((1, m), np.inf)
+        # defining points: _Z[i, k] is the pareto point that defines the k-th component of _U[i].
+        # Initial dummy points are -inf except for the defined component.
+        self._Z = np.full((1, m, m), -np.inf)
+        self._Z[0, np.arange(m), np.arange(m)] = np.inf
+
+    @property
+    def pareto_Y(self) -> np.ndarray:
+        r"""This returns the non-dominated set assuming minimization.
+
+        Returns:
+            A `n_pareto x m`-dim array of outcomes, sorted by the first objective.
+        """
+        return self._pareto_Y[np.argsort(self._pareto_Y[:, 0], kind='stable')]
+
+    def update(self, Y: np.ndarray) -> None:
+        r"""Update non-dominated front and decomposition.
+
+        If the previous outcomes are the first rows of Y, only the new rows are
+        inserted. Otherwise, the decomposition is rebuilt.
+
+        Args:
+            Y: A `n x m`-dim array of outcomes.
+        """
+        Y = np.asarray(Y, dtype=np.float64)
+        n_prev = self.Y.shape[0]
+        if Y.shape[0] < n_prev or not np.array_equal(Y[:n_prev], self.Y):
+            self.reset()
+            n_prev = 0
+        new_Y = Y[n_prev:]
+        self.Y = Y.copy()
+        if new_Y.shape[0] > 0:
+            # points dominated by other new points do not change the decomposition. Inserting the others
+            # by increasing sum avoids creating cells that are removed by the next insertions.
+            new_Y = new_Y[is_non_dominated(new_Y)]
+            for y in new_Y[np.argsort(new_Y.sum(axis=1), kind='stable')]:
+                self.add(y)
+
+    def add(self, y: np.ndarray) -> bool:
+        r"""Insert a point into the decomposition.
+
+        Args:
+            y: A `m`-dim array of outcomes.
+
+        Returns:
+            Whether the point is added to the pareto front.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        # local upper bounds dominated by y are the search zones that contain y.
+        # If there is none, y is weakly dominated by the pareto front.
+        y_dominates_U = (self._U > y).all(axis=-1)
+        if not y_dominates_U.any():
+            return False
+
+        A = self._U[y_dominates_U]
+        A_Z = self._Z[y_dominates_U]
+        new_U = [self._U[~y_dominates_U]]
+        new_Z = [self._Z[~y_dominates_U]]
+        for j in range(self.num_objs):
+            other_objs = np.arange(self.num_objs) != j
+            # y replaces the j-th component of u only if u stays defined by the other points
+            z_uj_max = A_Z[:, other_objs, j].max(axis=-1)
+            add_y = y[j] >= z_uj_max
+            if add_y.any():
+                u_j = A[add_y]
+                u_j[:, j] = y[j]
+                Z_uj = A_Z[add_y]
+                Z_uj[:, j] = y
+                new_U.append(u_j)
+                new_Z.append(Z_uj)
+        self._U = np.concatenate(new_U, axis=0)
+        self._Z = np.concatenate(new_Z, axis=0)
+
+        # y is not weakly dominated, so y dominates a pareto point iff y <= the point
+        y_dominates_pareto_Y = (y <= self._pareto_Y).all(axis=-1)
+        self._pareto_Y = np.concatenate([self._pareto_Y[~y_dominates_pareto_Y], y[None]], axis=0)
+        return True
+
+    def get_hypercell_bounds(self, ref_point: np.ndarray) -> np.ndarray:
+        r"""Get the bounds of each hypercell in the decomposition.
+
+        Args:
+            ref_point: A `m`-dim array containing the reference point.
+
+        Returns:
+            A `2 x num_cells x num_objs`-dim array containing the
+                lower and upper vertices bounding each hypercell.
+        """
+        ref_point = np.asarray(ref_point, dtype=np.float64)
+        lower = self._get_lower_bounds(self._Z)
+        upper = np.minimum(self._U, ref_point)
+        # remove empty cells
+        non_empty = (upper > lower).all(axis=-1)
+        lower, upper = lower[non_empty], upper[non_empty]
+
+        if self.max_cells is not None and lower.shape[0] > self.max_cells:
+            ideal_point = self._pareto_Y.min(axis=0) if self._pareto_Y.shape[0] > 0 else ref_point
+            volume = (upper - np.maximum(lower, ideal_point)).clip(min=0).prod(axis=-1)
+            keep = np.argpartition(-volume, self.max_cells - 1)[:self.max_cells]
+            lower, upper = lower[keep], upper[keep]
+        return np.stack([lower, upper], axis=0)
+
+    def _get_lower_bounds(self, Z: np.ndarray) -> np.ndarray:
+        # the cell of the local upper bound u is bounded below by the defining points of
+        # the next components: lower_j = max_{k > j} z^k(u)_j, lower_m = -inf
+        next_objs = np.arange(self.num_objs)[:, None] > np.arange(self.num_objs)[None, :]
+        return np.where(next_objs, Z, -np.inf).max(axis=1)
+
+    def compute_hypervolume_improvement(self, y: np.ndarray, ref_point: np.ndarray) -> float:
+        r"""Compute the hypervolume improvement of a point without inserting it.
+
+        Note: This assumes minimization.
+
+        The improvement is the volume of the non-dominated cells within the box
+        between y and the reference point. Only the cells of the local upper bounds
+        dominated by y intersect the box. All cells are taken into account,
+        regardless of `max_cells`.
+
+        Args:
+            y: A `m`-dim array of outcomes.
+            ref_point: A `m`-dim array containing the reference point.
+
+        Returns:
+            The hypervolume improvement. It is zero iff y is weakly dominated by
+            the pareto front or not better than the reference point.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        ref_point = np.asarray(ref_point, dtype=np.float64)
+        y_dominates_U = (self._U > y).all(axis=-1)
+        lower = np.maximum(self._get_lower_bounds(self._Z[y_dominates_U]), y)
+        upper = np.minimum(self._U[y_dominates_U], ref_point)
+        return float((upper - lower).clip(min=0).prod(axis=-1).sum())
+
+    def compute_hypervolume(self, ref_point: np.ndarray) -> float:
+        r"""Compute the hypervolume for the given reference point.
+
+        Note: This assumes minimization.
+
+        The hypervolume is the volume of the box between the ideal point and the
+        reference point minus the volume of the non-dominated cells in the box.
+        Cells discarded by `max_cells` are not taken into account.
+
+        Args:
+            ref_point: A `m`-dim array containing the reference point.
+
+        Returns:
+            The dominated hypervolume.
+        """
+        ref_point = np.asarray(ref_point, dtype=np.float64)
+        if self._pareto_Y.shape[0] == 0:
+            return 0.0
+        ideal_point = np.minimum(self._pareto_Y.min(axis=0), ref_point)
+        cell_bounds_values = self.get_hypercell_bounds(ref_point=ref_point)
+        total_volume = (ref_point - ideal_point).prod()
+        non_dom_volume = (
+            (cell_bounds_values[1] - np.maximum(cell_bounds_values[0], ideal_point)).prod(axis=-1).sum()
+        )
+        return float(total_volume - non_dom_volume)
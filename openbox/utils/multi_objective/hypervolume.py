@@ -2,6 +2,10 @@
 
 from typing import List
 import numpy as np
+from sortedcontainers import SortedList
+
+from openbox.utils.multi_objective.pareto import get_pareto_front
+from openbox.utils.multi_objective.box_decomposition import IncrementalNondominatedPartitioning
 
 
 class Hypervolume:
@@ -177,6 +181,192 @@ class Hypervolume:
             self.list.extend(nodes, i)
 
 
+class IncrementalHypervolume:
+    r"""Hypervolume of a growing point set, updated incrementally as points are added.
+
+    Only the non-dominated points strictly better than the reference point are kept.
+    Dominated points are rejected without changing the hypervolume. For 2 objectives,
+    the front is kept in a sorted container and each insertion is an exact sweep-line
+    update over the neighbors of the new point, in O(log n) plus the removal of the
+    points it dominates. For 3+ objectives, the non-dominated space is kept as an
+    IncrementalNondominatedPartitioning, and the hypervolume improvement of a new point p
+    is the volume of the cells within the box [p, ref], which only involves the local
+    upper bounds dominated by p.
+
+    The exclusive contributions of all points are computed in one sweep over the third
+    objective for 3 objectives [Emmerich2011]_, and as prod(ref - p) - HV(max(front, p))
+    [While2012]_ for 4+ objectives, which only involves the (usually few) non-dominated
+    points of the limited front.
+
+    Minimization is assumed.
+
+    .. [Emmerich2011] M. Emmerich and C. Fonseca. Computing Hypervolume Contributions
+        in Low Dimensions: Asymptotically Optimal Algorithm and Complexity Results.
+        EMO 2011.
+    .. [While2012] L. While, L. Bradstreet and L. Barone. A Fast Way of Calculating Exact
+        Hypervolumes. IEEE Transactions on Evolutionary Computation, 2012.
+    """
+
+    def __init__(self, ref_point) -> None:
+        r"""Initialize incremental hypervolume object.
+
+        Args:
+            ref_point: `m`-dim numpy array containing the reference point.
+        """
+        assert ref_point is not None
+        self.ref_point = np.asarray(ref_point, dtype=np.float64)
+        self.num_objs = self.ref_point.shape[0]
+        self.hypervolume = 0.0
+        # front of (f0, f1) sorted by the first objective (2 objectives)
+        self._front_2d = SortedList()
+        # decomposition of the non-dominated space (3+ objectives)
+        self._partitioning = IncrementalNondominatedPartitioning(self.num_objs) if self.num_objs > 2 else None
+
+    def add(self, point) -> float:
+        r"""Add a point and update the hypervolume.
+
+        Args:
+            point: `m`-dim array of objectives.
+
+        Returns:
+            The hypervolume after adding the point.
+        """
+        point = np.asarray(point, dtype=np.float64)
+        if not np.all(point < self.ref_point):
+            # zero volume, and can only dominate points of zero volume
+            return self.hypervolume
+
+        if self.num_objs == 2:
+            self.hypervolume += self._add_2d(point[0], point[1])
+        else:
+            self.hypervolume += self._add_nd(point)
+        return self.hypervolume
+
+    def _add_2d(self, p0, p1) -> float:
+        p0, p1 = float(p0), float(p1)
+        front = self._front_2d
+        # the points of the front have distinct f0, and the last point with f0 <= p0 has the smallest f1 among them
+        j = front.bisect_right((p0, np.inf)) - 1
+        if j >= 0 and front[j][1] <= p1:
+            return 0.0
+
+        # points dominated by p are contiguous, starting from the first point with f0 >= p0
+        i = front.bisect_left((p0, -np.inf))
+        dominated = list()
+        for point in front.islice(i):
+            if point[1] < p1:
+                break
+            dominated.append(point)
+        k = i + len(dominated)
+
+        # sweep over the strip [p0, right neighbor) and sum up the area newly dominated by p
+        xs = [p0] + [point[0] for point in dominated] + [front[k][0] if k < len(front) else self.ref_point[0]]
+        heights = [front[i - 1][1] if i > 0 else self.ref_point[1]] + [point[1] for point in dominated]
+        improvement = 0.0
+        for t, height in enumerate(heights):
+            improvement += (xs[t + 1] - xs[t]) * (height - p1)
+
+        del front[i:k]
+        front.add((p0, p1))
+        return improvement
+
+    def _add_nd(self, point) -> float:
+        improvement = self._partitioning.compute_hypervolume_improvement(point, self.ref_point)
+        self._partitioning.add(point)
+        return improvement
+
+    def _exclusive_volume(self, point, others) -> float:
+        volume = float(np.prod(self.ref_point - point))
+        if others.shape[0] == 0:
+            return volume
+        limited = np.maximum(others, point)
+        limited = limited[np.all(limited < self.ref_point, axis=1)]
+        if limited.shape[0] == 0:
+            return volume
+        limited = limited[get_pareto_front(limited)]
+        return volume - Hypervolume(self.ref_point).compute(limited)
+
+    def get_pareto_front(self) -> np.ndarray:
+        r"""Get the non-dominated points strictly better than the reference point.
+
+        Returns:
+            A `k x m`-dim array of points.
+        """
+        if self.num_objs == 2:
+            return np.array(list(self._front_2d), dtype=np.float64).reshape(-1, 2)
+        return self._partitioning.pareto_Y
+
+    def get_contributions(self) -> np.ndarray:
+        r"""Compute the exclusive hypervolume contribution of each point in the front,
+        i.e., the hypervolume lost if the point is removed.
+
+        Returns:
+            A `k`-dim array, aligned with get_pareto_front().
+        """
+        front = self.get_pareto_front()
+        if self.num_objs == 2:
+            f0, f1 = front[:, 0], front[:, 1]
+            right = np.append(f0[1:], self.ref_point[0])
+            upper = np.insert(f1[:-1], 0, self.ref_point[1])
+            return (right - f0) * (upper - f1)
+        if self.num_objs == 3:
+            return self._get_contributions_3d(front)
+
+        contributions = np.empty(front.shape[0], dtype=np.float64)
+        for i in range(front.shape[0]):
+            contributions[i] = self._exclusive_volume(front[i], np.delete(front, i, axis=0))
+        return contributions
+
+    def _get_contributions_3d(self, front) -> np.ndarray:
+        # Sweep the third objective upwards. At height z, the exclusive area of a point in the
+        # 2-D front of (f0, f1) of the points with f2 <= z is the box up to its two neighbors,
+        # minus the area dominated by the points it removed from the 2-D front. It changes only
+        # when a neighbor is inserted or removed. The exclusive volume is the integral over z.
+        ref0, ref1, ref2 = self.ref_point.tolist()
+        contributions = np.zeros(front.shape[0], dtype=np.float64)
+        areas = np.zeros(front.shape[0], dtype=np.float64)
+        z_last = np.zeros(front.shape[0], dtype=np.float64)
+        removed = [list() for _ in range(front.shape[0])]  # (f0, f1) removed by each point, sorted by f0
+        sweep = SortedList()  # (f0, f1, index) of the current 2-D front
+
+        def update(pos, z):
+            # accumulate the volume below z and recompute the exclusive area of sweep[pos]
+            f0, f1, idx = sweep[pos]
+            contributions[idx] += areas[idx] * (z - z_last[idx])
+            z_last[idx] = z
+            right = sweep[pos + 1][0] if pos + 1 < len(sweep) else ref0
+            upper = sweep[pos - 1][1] if pos > 0 else ref1
+            area = (right - f0) * (upper - f1)
+            # the removed points are mutually non-dominated, so f1 decreases along them
+            stair = [point for point in removed[idx] if point[0] < right and point[1] < upper]
+            for t, (g0, g1) in enumerate(stair):
+                next_g0 = stair[t + 1][0] if t + 1 < len(stair) else right
+                area -= (next_g0 - g0) * (upper - g1)
+            areas[idx] = area
+
+        for idx in np.argsort(front[:, 2], kind='stable'):
+            p0, p1, z = front[idx].tolist()
+            # the projection of a point of the front is not weakly dominated by the points below it,
+            # and the projections it dominates are contiguous from the first one with f0 >= p0
+            i = sweep.bisect_left((p0, -np.inf, -1))
+            k = i
+            while k < len(sweep) and sweep[k][1] >= p1:
+                g0, g1, other = sweep[k]
+                contributions[other] += areas[other] * (z - z_last[other])
+                removed[idx].append((g0, g1))
+                k += 1
+            del sweep[i:k]
+            sweep.add((p0, p1, idx))
+            z_last[idx] = z
+            for pos in (i - 1, i, i + 1):
+                if 0 <= pos < len(sweep):
+                    update(pos, z)
+
+        for f0, f1, idx in sweep:
+            contributions[idx] += areas[idx] * (ref2 - z_last[idx])
+        return contributions
+
+
 class Node:
     r"""Node in the MultiList data structure."""
 
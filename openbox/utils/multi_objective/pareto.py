@@ -1,25 +1,226 @@
 # License: MIT
 
+import bisect
+from typing import List
+
 import numpy as np
 
+# Maximum number of elements of the boolean arrays of one chunk of pairwise comparisons
+MAX_CHUNK_ELEMENTS = 2 ** 24
+
 
-def is_non_dominated(Y: np.ndarray) -> np.ndarray:
+def is_non_dominated(Y: np.ndarray, max_chunk_elements: int = MAX_CHUNK_ELEMENTS) -> np.ndarray:
     r"""Computes the non-dominated front.
 
     Note: this assumes minimization.
 
+    For 2 objectives, the front is found by a sort in O(n log n). Otherwise, the
+    points are processed in the order of their sums and compared to the front found
+    so far in chunks of rows, so that the memory stays bounded by `max_chunk_elements`
+    instead of growing as n x n x m.
+
     Args:
         Y: a `(batch_shape) x n x m`-dim array of outcomes.
+        max_chunk_elements: maximum number of elements of one chunk of comparisons.
 
     Returns:
         A `(batch_shape) x n`-dim boolean array indicating whether
         each point is non-dominated.
     """
-    expanded_shape = Y.shape[:-2] + Y.shape[-2:-1] + Y.shape[-2:]
-    Y1 = np.broadcast_to(np.expand_dims(Y, -3), expanded_shape)
-    Y2 = np.broadcast_to(np.expand_dims(Y, -2), expanded_shape)
-    dominates = (Y1 <= Y2).all(axis=-1) & (Y1 < Y2).any(axis=-1)
-    return ~(dominates.any(axis=-1))
+    Y = np.asarray(Y)
+    if Y.ndim > 2:
+        return np.stack([is_non_dominated(y, max_chunk_elements) for y in Y])
+    n, m = Y.shape
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    if m == 2:
+        return _is_non_dominated_2d(Y)
+
+    unique_Y, inverse = _unique_sorted_by_sum(Y)
+    n_unique = unique_Y.shape[0]
+    chunk_size = max(1, max_chunk_elements // (n_unique * m))
+    # a dominated point is also dominated by some non-dominated point, which comes before it
+    front = np.zeros((0, m), dtype=unique_Y.dtype)
+    unique_non_dominated = np.zeros(n_unique, dtype=bool)
+    for start in range(0, n_unique, chunk_size):
+        Y_chunk = unique_Y[start:start + chunk_size]
+        candidates = np.concatenate([front, Y_chunk])
+        dominates = (candidates <= Y_chunk[:, None, :]).all(axis=-1)
+        # points are distinct, so a point only fails to be dominated by itself
+        dominates[:, front.shape[0]:][np.diag_indices(Y_chunk.shape[0])] = False
+        chunk_non_dominated = ~dominates.any(axis=-1)
+        unique_non_dominated[start:start + chunk_size] = chunk_non_dominated
+        front = np.concatenate([front, Y_chunk[chunk_non_dominated]])
+    return unique_non_dominated[inverse]
+
+
+def _unique_sorted_by_sum(Y: np.ndarray):
+    """
+    Returns the distinct points sorted by their sums (ties broken lexicographically),
+    so that a point always comes after the points dominating it, and the position
+    of every point in the sorted distinct points.
+    """
+    unique_Y, inverse = np.unique(Y, axis=0, return_inverse=True)
+    order = np.argsort(unique_Y.sum(axis=1), kind='stable')
+    rank_in_order = np.empty_like(order)
+    rank_in_order[order] = np.arange(order.shape[0])
+    return unique_Y[order], rank_in_order[inverse.reshape(-1)]
+
+
+def _is_non_dominated_2d(Y: np.ndarray) -> np.ndarray:
+    """is_non_dominated() for 2 objectives in O(n log n)."""
+    n = Y.shape[0]
+    order = np.lexsort((Y[:, 1], Y[:, 0]))
+    y0, y1 = Y[order, 0], Y[order, 1]
+    # after sorting by (y0, y1), the candidates to dominate a point are the points before it.
+    # owner[k] is the first point in y0-order which attains the minimum y1 of the first k + 1 points
+    prefix_min = np.minimum.accumulate(y1)
+    is_new_min = np.empty(n, dtype=bool)
+    is_new_min[0] = True
+    is_new_min[1:] = y1[1:] < prefix_min[:-1]
+    owner = np.maximum.accumulate(np.where(is_new_min, np.arange(n), 0))
+    prev = owner[:-1]
+    dominated = np.zeros(n, dtype=bool)
+    # equal points do not dominate each other
+    dominated[1:] = (y1[prev] < y1[1:]) | ((y1[prev] == y1[1:]) & (y0[prev] < y0[1:]))
+    non_dominated = np.empty(n, dtype=bool)
+    non_dominated[order] = ~dominated
+    return non_dominated
+
+
+def non_dominated_sort(Y: np.ndarray, max_chunk_elements: int = MAX_CHUNK_ELEMENTS) -> np.ndarray:
+    r"""Computes the non-dominated front (rank) of every point.
+
+    Note: this assumes minimization.
+
+    Rank 0 is the non-dominated front, rank 1 is the front of the remaining points, etc.
+    The rank of a point is the length of the longest chain of points dominating it.
+    For 2 objectives, the fronts are built in one pass over the sorted points in
+    O(n log n). Otherwise, the points are processed in the order of their sums, since
+    a point can only be dominated by points with a smaller sum, and compared in chunks
+    bounded by `max_chunk_elements`.
+
+    Args:
+        Y: a `n x m`-dim array of outcomes.
+        max_chunk_elements: maximum number of elements of one chunk of comparisons.
+
+    Returns:
+        A `n`-dim integer array of ranks.
+    """
+    Y = np.asarray(Y)
+    n, m = Y.shape
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if m == 2:
+        return _non_dominated_sort_2d(Y)
+
+    Y_sorted, inverse = _unique_sorted_by_sum(Y)
+    n_unique = Y_sorted.shape[0]
+    sorted_ranks = np.zeros(n_unique, dtype=np.int64)
+    chunk_size = max(1, max_chunk_elements // (n_unique * m))
+    for start in range(0, n_unique, chunk_size):
+        end = min(start + chunk_size, n_unique)
+        # dominates[i, j]: point j of the prefix dominates point i of the chunk (points are distinct)
+        dominates = (Y_sorted[:end] <= Y_sorted[start:end, None, :]).all(axis=-1)
+        dominates[:, start:end][np.diag_indices(end - start)] = False
+        rank_from_prefix = np.where(dominates[:, :start], sorted_ranks[:start] + 1, 0).max(axis=1, initial=0)
+        # propagate the ranks along the dominance chains inside the chunk until they are stable
+        within = dominates[:, start:end]
+        chunk_ranks = rank_from_prefix
+        while True:
+            new_ranks = np.maximum(rank_from_prefix, np.where(within, chunk_ranks + 1, 0).max(axis=1))
+            if np.array_equal(new_ranks, chunk_ranks):
+                break
+            chunk_ranks = new_ranks
+        sorted_ranks[start:end] = chunk_ranks
+    return sorted_ranks[inverse]
+
+
+def _non_dominated_sort_2d(Y: np.ndarray) -> np.ndarray:
+    """non_dominated_sort() for 2 objectives in O(n log n)."""
+    unique_Y, inverse = np.unique(Y, axis=0, return_inverse=True)
+    # np.unique sorts the distinct points by (y0, y1), so the points dominating a point come before it.
+    # front_min_y1[k] is the minimum y1 of front k so far and is non-decreasing in k
+    front_min_y1 = []
+    unique_ranks = np.empty(unique_Y.shape[0], dtype=np.int64)
+    for idx, y1 in enumerate(unique_Y[:, 1].tolist()):
+        rank = bisect.bisect_right(front_min_y1, y1)
+        if rank == len(front_min_y1):
+            front_min_y1.append(y1)
+        else:
+            front_min_y1[rank] = y1
+        unique_ranks[idx] = rank
+    return unique_ranks[inverse.reshape(-1)]
+
+
+def crowding_distance(Y: np.ndarray) -> np.ndarray:
+    r"""Computes the crowding distance of every point of a front (NSGA-II).
+
+    The distance of a point is the sum over the objectives of the normalized
+    distance between its two neighbors. The boundary points of every objective
+    get an infinite distance.
+
+    Args:
+        Y: a `n x m`-dim array of outcomes.
+
+    Returns:
+        A `n`-dim array of crowding distances.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    n, m = Y.shape
+    distances = np.zeros(n)
+    if n <= 2:
+        distances[:] = np.inf
+        return distances
+    order = np.argsort(Y, axis=0, kind='stable')
+    Y_sorted = np.take_along_axis(Y, order, axis=0)
+    span = Y_sorted[-1] - Y_sorted[0]
+    span[span == 0] = 1
+    gaps = np.empty((n, m))
+    gaps[1:-1] = (Y_sorted[2:] - Y_sorted[:-2]) / span
+    gaps[[0, -1]] = np.inf
+    np.add.at(distances, order.ravel(), gaps.ravel())
+    return distances
+
+
+def pareto_layers(population: list) -> List[list]:
+    r"""Splits a population into its non-dominated fronts.
+
+    Note: this assumes minimization.
+
+    Args:
+        population: a list of individuals with a `perf` attribute (a float or a list of objectives).
+
+    Returns:
+        A list of fronts, from the non-dominated one. Individuals keep their order inside a front.
+    """
+    if not population:
+        return []
+    ranks = non_dominated_sort(_perf_array(population))
+    order = np.argsort(ranks, kind='stable')
+    bounds = np.flatnonzero(np.diff(ranks[order])) + 1
+    return [[population[i] for i in layer] for layer in np.split(order, bounds)]
+
+
+def pareto_frontier(population: list) -> list:
+    r"""Returns the non-dominated individuals of a population.
+
+    Note: this assumes minimization.
+
+    Args:
+        population: a list of individuals with a `perf` attribute (a float or a list of objectives).
+
+    Returns:
+        A list of the non-dominated individuals, in their original order.
+    """
+    if not population:
+        return []
+    mask = is_non_dominated(_perf_array(population))
+    return [x for x, non_dominated in zip(population, mask) if non_dominated]
+
+
+def _perf_array(population: list) -> np.ndarray:
+    return np.array([x.perf for x in population], dtype=np.float64).reshape(len(population), -1)
 
 
 def get_pareto_front(Y: np.ndarray):
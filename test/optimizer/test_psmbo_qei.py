@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+from openbox.optimizer.parallel_smbo import pSMBO
+from openbox.core.sync_batch_advisor import SyncBatchAdvisor
+from openbox.core.base import Observation
+from openbox.benchmark.objective_functions.synthetic import Branin
+
+prob = Branin()
+seed = np.random.randint(100)
+
+# the whole batch is optimized at once on the joint (noisy) expected improvement
+for batch_strategy in ['qei', 'qnei']:
+    bo = pSMBO(prob.evaluate, prob.config_space,
+               parallel_strategy='sync',
+               batch_size=4,
+               batch_strategy=batch_strategy,
+               num_objs=1,
+               num_constraints=0,
+               max_runs=60,
+               surrogate_type='gp',
+               time_limit_per_trial=180,
+               random_state=seed,
+               task_id=batch_strategy)
+    bo.run()
+    print(batch_strategy, '=' * 30)
+    print(bo.get_incumbent())
+
+# kriging believer with more than 300 observations: the auto-selected GP is replaced by the sparse GP
+# at 300 observations, and the batch configs are fantasized on the sparse GP
+num_random = 296
+batch_size = 4
+advisor = SyncBatchAdvisor(prob.config_space,
+                           batch_size=batch_size,
+                           batch_strategy='kriging_believer',
+                           surrogate_type='auto',
+                           task_id='kriging_believer',
+                           random_state=seed)
+configs = prob.config_space.sample_configuration(num_random)
+observations = [Observation(config=config, objs=prob.evaluate(config)['objs']) for config in configs]
+advisor.get_history().update_observations(observations)
+for i in range(5):
+    start_time = time.time()
+    configs = advisor.get_suggestions()
+    suggest_time = time.time() - start_time
+    for config in configs:
+        advisor.update_observation(Observation(config=config, objs=prob.evaluate(config)['objs']))
+    print('batch %d: n_observations = %d, surrogate = %s, suggestion time = %.2fs'
+          % (i, len(advisor.get_history().configurations), advisor.surrogate_type, suggest_time))
+print('kriging_believer', '=' * 30)
+print(advisor.get_history().get_incumbents())
@@ -0,0 +1,27 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+from openbox.optimizer.parallel_smbo import pSMBO
+from openbox.benchmark.objective_functions.synthetic import Branin
+
+prob = Branin()
+seed = np.random.randint(100)
+
+# every posterior function sample proposes its minimizer, so the cost of a batch grows slowly with the batch size
+for parallel_strategy, surrogate_type in [('sync', 'gp'), ('sync', 'prf'), ('async', 'gp')]:
+    bo = pSMBO(prob.evaluate, prob.config_space,
+               parallel_strategy=parallel_strategy,
+               batch_size=8,
+               batch_strategy='thompson_sampling',
+               num_objs=1,
+               num_constraints=0,
+               max_runs=80,
+               surrogate_type=surrogate_type,
+               time_limit_per_trial=180,
+               random_state=seed,
+               task_id='ts_%s_%s' % (parallel_strategy, surrogate_type))
+    bo.run()
+    print(parallel_strategy, surrogate_type, '=' * 30)
+    print(bo.get_incumbent())
@@ -0,0 +1,50 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from openbox.optimizer.generic_smbo import SMBO
+from openbox.optimizer.parallel_smbo import pSMBO
+from openbox.benchmark.objective_functions.synthetic import BNH, Branin
+
+seed = np.random.randint(100)
+
+# multi-objective with constraints: the objectives and constraints share one multi-output GP
+prob = BNH()
+initial_runs = 6
+max_runs = 50 + initial_runs
+
+bo = SMBO(prob.evaluate, prob.config_space,
+          task_id='ehvic_gp_multi',
+          num_objs=prob.num_objs,
+          num_constraints=prob.num_constraints,
+          acq_type='ehvic',
+          acq_optimizer_type='random_scipy',
+          surrogate_type='gp_multi',
+          ref_point=prob.ref_point,
+          max_runs=max_runs,
+          initial_runs=initial_runs,
+          init_strategy='sobol',
+          random_state=seed)
+bo.run()
+print('EHVIC', '=' * 30)
+print(bo.get_history().get_pareto_front())
+print('hypervolume:', bo.get_history().hv_data[-1])
+
+# Monte Carlo acquisition on the function samples of the multi-output GP
+prob = Branin()
+bo = pSMBO(prob.evaluate, prob.config_space,
+           parallel_strategy='sync',
+           batch_size=4,
+           batch_strategy='qei',
+           num_objs=1,
+           num_constraints=0,
+           max_runs=60,
+           surrogate_type='gp_multi',
+           time_limit_per_trial=180,
+           random_state=seed,
+           task_id='qei_gp_multi')
+bo.run()
+print('qEI', '=' * 30)
+print(bo.get_incumbent())
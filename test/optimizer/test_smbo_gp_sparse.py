@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+from openbox.core.generic_advisor import Advisor
+from openbox.core.base import Observation
+from openbox.utils.config_space import ConfigurationSpace, UniformFloatHyperparameter
+
+
+def branin(x):
+    xs = x.get_dictionary()
+    x1 = xs['x1']
+    x2 = xs['x2']
+    a = 1.
+    b = 5.1 / (4. * np.pi ** 2)
+    c = 5. / np.pi
+    r = 6.
+    s = 10.
+    t = 1. / (8. * np.pi)
+    ret = a * (x2 - b * x1 ** 2 + c * x1 - r) ** 2 + s * (1 - t) * np.cos(x1) + s
+    return {'objs': (ret,)}
+
+
+cs = ConfigurationSpace()
+x1 = UniformFloatHyperparameter("x1", -5, 10, default_value=0)
+x2 = UniformFloatHyperparameter("x2", 0, 15, default_value=0)
+cs.add_hyperparameters([x1, x2])
+
+seed = np.random.randint(100)
+num_random = 500
+max_runs = 20
+
+# the sparse GP uses at most 200 inducing points, so training costs O(N * 200^2) instead of O(N^3)
+advisor = Advisor(cs, surrogate_type='gp_sparse', task_id='gp_sparse', random_state=seed)
+configs = cs.sample_configuration(num_random)
+observations = [Observation(config=config, objs=branin(config)['objs']) for config in configs]
+advisor.get_history().update_observations(observations)
+
+for i in range(max_runs):
+    start_time = time.time()
+    config = advisor.get_suggestion()
+    suggest_time = time.time() - start_time
+    ret = branin(config)
+    advisor.update_observation(Observation(config=config, objs=ret['objs']))
+    print('iter %d: n_observations = %d, objs = %.4f, suggestion time = %.2fs'
+          % (i, num_random + i, ret['objs'][0], suggest_time))
+
+inc_value = advisor.get_history().get_incumbents()
+print('BO', '=' * 30)
+print(inc_value)
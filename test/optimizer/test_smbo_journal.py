@@ -0,0 +1,74 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+from openbox.core.generic_advisor import Advisor
+from openbox.core.base import Observation
+from openbox.utils.config_space import ConfigurationSpace, UniformFloatHyperparameter
+
+
+def branin(x):
+    xs = x.get_dictionary()
+    x1 = xs['x1']
+    x2 = xs['x2']
+    a = 1.
+    b = 5.1 / (4. * np.pi ** 2)
+    c = 5. / np.pi
+    r = 6.
+    s = 10.
+    t = 1. / (8. * np.pi)
+    ret = a * (x2 - b * x1 ** 2 + c * x1 - r) ** 2 + s * (1 - t) * np.cos(x1) + s
+    return {'objs': (ret,)}
+
+
+def get_cs():
+    cs = ConfigurationSpace()
+    x1 = UniformFloatHyperparameter("x1", -5, 10, default_value=0)
+    x2 = UniformFloatHyperparameter("x2", 0, 15, default_value=0)
+    cs.add_hyperparameters([x1, x2])
+    return cs
+
+
+max_runs = 30
+snapshot_interval = 10
+journal_fn = os.path.join('logs', 'bo_history', 'bo_history_journal.jsonl')
+if not os.path.exists(os.path.dirname(journal_fn)):
+    os.makedirs(os.path.dirname(journal_fn))
+
+advisor = Advisor(get_cs(), task_id='journal', random_state=1)
+for i in range(max_runs):
+    config = advisor.get_suggestion()
+    ret = branin(config)
+    advisor.update_observation(Observation(config=config, objs=ret['objs']))
+    # only the new observation is appended to the journal. The journal of an earlier run is replaced.
+    advisor.get_history().save_journal(journal_fn, snapshot_interval=snapshot_interval, overwrite=True)
+print('journal size: %d bytes, snapshot size: %d bytes'
+      % (os.path.getsize(journal_fn), os.path.getsize(journal_fn + '.snapshot')))
+
+# simulate a crash while writing the last record
+with open(journal_fn, 'a') as fp:
+    fp.write('{"index": %d, "config": {"x1": 1.' % max_runs)
+
+# a fresh history does not replace the journal by accident
+new_advisor = Advisor(get_cs(), task_id='journal', random_state=1)
+try:
+    new_advisor.save_history(journal=True)
+    raise AssertionError('The journal is replaced by an empty history.')
+except FileExistsError:
+    pass
+
+# resume from the snapshot and the journal, the broken tail is dropped
+new_advisor.load_history_from_json(journal_fn, journal=True)
+history, new_history = advisor.get_history(), new_advisor.get_history()
+assert new_history.configurations == history.configurations
+assert np.allclose(new_history.get_transformed_perfs(), history.get_transformed_perfs())
+
+# continue the optimization and appending to the journal
+for i in range(10):
+    config = new_advisor.get_suggestion()
+    ret = branin(config)
+    new_advisor.update_observation(Observation(config=config, objs=ret['objs']))
+    new_advisor.save_history(journal=True)
+print('BO', '=' * 30)
+print(new_history)
@@ -0,0 +1,43 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+from openbox.optimizer.generic_smbo import SMBO
+from openbox.utils.config_space import ConfigurationSpace, UniformFloatHyperparameter, \
+    UniformIntegerHyperparameter, CategoricalHyperparameter
+
+
+def mixed_branin(x):
+    xs = x.get_dictionary()
+    x1 = xs['x1']
+    x2 = xs['x2']
+    a = 1.
+    b = 5.1 / (4. * np.pi ** 2)
+    c = 5. / np.pi
+    r = 6.
+    s = 10.
+    t = 1. / (8. * np.pi)
+    ret = a * (x2 - b * x1 ** 2 + c * x1 - r) ** 2 + s * (1 - t) * np.cos(x1) + s
+    ret += {'a': 0., 'b': 1., 'c': 2.}[xs['x3']] + 0.1 * abs(xs['x4'] - 3)
+    return {'objs': (ret,)}
+
+
+cs = ConfigurationSpace()
+x1 = UniformFloatHyperparameter("x1", -5, 10, default_value=0)
+x2 = UniformFloatHyperparameter("x2", 0, 15, default_value=0)
+x3 = CategoricalHyperparameter("x3", ['a', 'b', 'c'], default_value='c')
+x4 = UniformIntegerHyperparameter("x4", 0, 10, default_value=0)
+cs.add_hyperparameters([x1, x2, x3, x4])
+
+seed = np.random.randint(100)
+
+# between full refits, only one tree is regrown and the new observations are added to the leaves of the others
+bo = SMBO(mixed_branin, cs,
+          surrogate_type='prf_incremental',
+          max_runs=200,
+          task_id='prf_incremental', random_state=seed)
+bo.run()
+inc_value = bo.get_incumbent()
+print('BO', '=' * 30)
+print(inc_value)